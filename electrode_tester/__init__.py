@@ -19,6 +19,10 @@ if not (_sys.version_info.major == 3 and _sys.version_info.minor >= 9):
 
 from ._experiment import Experiment
 from ._analysis import MeasurementAnalysis, ExperimentAnalysis
+from ._catalog import Catalog
+from ._cache import LoadCache, enable_load_cache, disable_load_cache
+from ._result_cache import ResultCache
+from ._basis import BasisCache, enable_basis_cache, disable_basis_cache
 
 from . import electrodes
 from . import devices
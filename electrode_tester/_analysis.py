@@ -1,17 +1,36 @@
+import math
+import os
+import pickle
+import time
+
 from collections import defaultdict
-from datetime import timedelta
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+
 from .utils import resistance_measuerment_error, limit_measurements
 from .estimators import FitSinus, BaseEstimator, FitFourier
+from ._excitation import chirp_response
 
 class ExperimentAnalysis():
-    __default_estimator = FitSinus()
         
     def analyze(self, experiment, *, time_limit: timedelta=timedelta(hours=24), 
-                                     estimator=None, calculate_parameters=None, estimator_params={}):
+                                     estimator=None, calculate_parameters=None, estimator_params={},
+                                     n_jobs: int=1, executor: Executor=None, chunk_size: int=None, cache=None):
+        """
+        :param n_jobs: number of worker processes analysing measurements, -1 for all processors
+        :param executor: executor running analysis of measurements instead of new process pool
+        :param chunk_size: number of measurements sent to worker at once
+        :param cache: `ResultCache` with fits of measurements analysed before, shared by workers
+        results are the same as of serial analysis, estimator is copied to every worker,
+        so estimators with warm start, whose results depend on previous fits, can't be run in parallel
+        """
 
         
         if not estimator:
-            estimator = ExperimentAnalysis.__default_estimator
+            # new for every call, so state of the estimator (warm start, counters) is not shared between calls
+            estimator = FitSinus()
         self.estimator = estimator
         
         self.experiment = experiment
@@ -24,29 +43,38 @@ class ExperimentAnalysis():
         self.resistivities = defaultdict(list)
         self.resistivites_error = defaultdict(list)
 
-        if not estimator:
-            estimator = ExperimentAnalysis.__default_estimator
-        self.estimator = estimator
-        
-        measurement_analysiator = MeasurementAnalysis()
+        self.phases = defaultdict(list)
+        self.phases_errors = defaultdict(list)
+
+        analyze_params = dict(electrode=self.experiment.electrode, estimator=self.estimator,
+                              calculate_parameters=calculate_parameters, estimator_params=estimator_params,
+                              cache=cache)
         time_deltas = []
+        measurements = []
         for time_delta, measurement in limit_measurements(self.experiment, time_limit):
+            if not measurement:
+                # interrupted measurement waiting for `Experiment.resume`
+                continue
             time_deltas.append(time_delta)
-            results = measurement_analysiator.analyze(measurement, electrode=self.experiment.electrode, estimator=self.estimator, calculate_parameters=calculate_parameters, estimator_params=estimator_params)
-            if calculate_parameters is None or 'resistance' in calculate_parameters:
-                resistances, resistances_errors = results['resistance']
-                for key, val in zip(measurement.frequencies, resistances):
-                    self.resistances[key].append(val)
-                for key, val in zip(measurement.frequencies, resistances_errors):
-                    self.resistances_errors[key].append(val)
-
-            if calculate_parameters is None or 'resistivity' in calculate_parameters:              
-                resistivities, resistivites_error = results['resistivity']
-                
-                for key, val in zip(measurement.frequencies, resistivities):
-                    self.resistivities[key].append(val)
-                for key, val in zip(measurement.frequencies, resistivites_error):
-                    self.resistivites_error[key].append(val) 
+            measurements.append(measurement)
+
+        # results of measurements analysed before the same way are read from catalog of the experiment
+        catalog = getattr(experiment, 'catalog', None)
+        all_results = [self._catalog_results(catalog, measurement, calculate_parameters)
+                       for measurement in measurements]
+        missing = [i for i, results in enumerate(all_results) if results is None]
+        missing_measurements = [measurements[i] for i in missing]
+        if executor is None and n_jobs == 1:
+            analysed = _analyze_measurements(missing_measurements, analyze_params)
+        else:
+            analysed = self._analyze_parallel(missing_measurements, analyze_params, n_jobs=n_jobs,
+                                              executor=executor, chunk_size=chunk_size)
+        for i, results in zip(missing, analysed):
+            all_results[i] = results
+            self._add_catalog_results(catalog, measurements[i], results)
+
+        for measurement, results in zip(measurements, all_results):
+            self._extend(measurement, results, calculate_parameters)
 
         results = dict()
         if calculate_parameters is None or 'resistance' in calculate_parameters:
@@ -55,41 +83,303 @@ class ExperimentAnalysis():
         if calculate_parameters is None or 'resistivity' in calculate_parameters:
             results['resistivity'] = (self.resistivities, self.resistivites_error)
 
+        if calculate_parameters is None or 'phase' in calculate_parameters:
+            results['phase'] = (self.phases, self.phases_errors)
+
         return time_deltas, results
+
+    def follow(self, path, *, time_limit: timedelta=None, estimator=None, calculate_parameters=None,
+               estimator_params={}, poll_interval: float=1., idle_timeout: float=None, callback=None,
+               cache=None):
+        """
+        :param path: path to the exp file of experiment which is being recorded
+        :param time_limit: maximal time since the first measurement
+        :param poll_interval: seconds between checks for new measurements
+        :param idle_timeout: seconds without new measurement after which following stops,
+                             None to follow until all tries are done
+        :param callback: function called with time since first measurement and results of every new measurement
+        :param cache: `ResultCache` with fits of measurements analysed before
+        analyse every measurement once it is finished, yield time since first measurement and its results,
+        `time_deltas`, `resistances`, `resistivities` and their errors grow with every measurement
+        """
+        from ._experiment import Experiment
+
+        if not estimator:
+            # new for every call, so state of the estimator (warm start, counters) is not shared between calls
+            estimator = FitSinus()
+        self.estimator = estimator
+        self.estimator_params = estimator_params
+
+        self.time_deltas = []
+        self.resistances = defaultdict(list)
+        self.resistances_errors = defaultdict(list)
+
+        self.resistivities = defaultdict(list)
+        self.resistivites_error = defaultdict(list)
+
+        self.phases = defaultdict(list)
+        self.phases_errors = defaultdict(list)
+
+        measurement_analysiator = MeasurementAnalysis()
+        position = 0
+        first_date = None
+        last_change = time.monotonic()
+        while True:
+            experiment = Experiment.load(path)
+            self.experiment = experiment
+            self.electrode = experiment.electrode
+            try:
+                while position < len(experiment):
+                    try:
+                        measurement = experiment[position]
+                    except (EOFError, pickle.UnpicklingError, ValueError):
+                        # measurement file is being written
+                        break
+                    if not measurement:
+                        # wait until the measurement is finished or resumed
+                        break
+                    if first_date is None:
+                        first_date = measurement._date
+                    if time_limit is not None and measurement._date - first_date > time_limit.total_seconds():
+                        return
+                    time_delta = datetime.fromtimestamp(measurement._date) - datetime.fromtimestamp(first_date)
+                    catalog = experiment.catalog
+                    results = self._catalog_results(catalog, measurement, calculate_parameters)
+                    if results is None:
+                        results = measurement_analysiator.analyze(measurement, electrode=self.electrode,
+                                                                  estimator=self.estimator,
+                                                                  calculate_parameters=calculate_parameters,
+                                                                  estimator_params=estimator_params,
+                                                                  cache=cache)
+                        self._add_catalog_results(catalog, measurement, results)
+                    self._extend(measurement, results, calculate_parameters)
+                    self.time_deltas.append(time_delta)
+                    position += 1
+                    last_change = time.monotonic()
+                    if callback is not None:
+                        callback(time_delta, results)
+                    yield time_delta, results
+                finished = bool(experiment.tries) and position >= experiment.tries
+            finally:
+                experiment.close()
+
+            if finished:
+                return
+            if idle_timeout is not None and time.monotonic() - last_change > idle_timeout:
+                return
+            time.sleep(poll_interval)
+
+    def _extend(self, measurement, results, calculate_parameters) -> None:
+        """
+        :param measurement: analysed measurement
+        :param results: results of `MeasurementAnalysis.analyze`
+        :param calculate_parameters: parameters which were calculated
+        append results of the measurement to series of every frequency
+        """
+        if calculate_parameters is None or 'resistance' in calculate_parameters:
+            resistances, resistances_errors = results['resistance']
+            for key, val in zip(measurement.frequencies, resistances):
+                self.resistances[key].append(val)
+            for key, val in zip(measurement.frequencies, resistances_errors):
+                self.resistances_errors[key].append(val)
+
+        if calculate_parameters is None or 'resistivity' in calculate_parameters:
+            resistivities, resistivites_error = results['resistivity']
+
+            for key, val in zip(measurement.frequencies, resistivities):
+                self.resistivities[key].append(val)
+            for key, val in zip(measurement.frequencies, resistivites_error):
+                self.resistivites_error[key].append(val)
+
+        if calculate_parameters is None or 'phase' in calculate_parameters:
+            phases, phases_errors = results['phase']
+            for key, val in zip(measurement.frequencies, phases):
+                self.phases[key].append(val)
+            for key, val in zip(measurement.frequencies, phases_errors):
+                self.phases_errors[key].append(val)
+
+    def _catalog_identity(self):
+        """
+        return name of the estimator and parameters identifying results in catalog
+        """
+        estimator = f'{type(self.estimator).__module__}.{type(self.estimator).__qualname__}'
+        parameters = {'version': self.estimator.version, 'config': self.estimator.config(),
+                      'params': self.estimator_params or {}}
+        return estimator, parameters
+
+    def _catalog_results(self, catalog, measurement, calculate_parameters):
+        """
+        :param catalog: `Catalog` of the experiment, None if it has no catalog
+        :param measurement: complete measurement
+        :param calculate_parameters: parameters which are calculated
+        return results of the measurement like `MeasurementAnalysis.analyze` from catalog,
+        None if some of them are not cached
+        """
+        if catalog is None:
+            return None
+        rows = {row['frequency']: row for row in catalog.results(measurement.uuid, *self._catalog_identity())}
+        results = dict()
+        for name in ('resistance', 'resistivity', 'phase'):
+            if calculate_parameters is not None and name not in calculate_parameters:
+                continue
+            try:
+                values = [rows[float(frequency)][name] for frequency in measurement.frequencies]
+                errors = [rows[float(frequency)][name + '_error'] for frequency in measurement.frequencies]
+            except KeyError:
+                return None
+            if None in values or None in errors:
+                return None
+            results[name] = values, errors
+        return results
+
+    def _add_catalog_results(self, catalog, measurement, results) -> None:
+        """
+        :param catalog: `Catalog` of the experiment, None if it has no catalog
+        :param measurement: analysed measurement
+        :param results: results of `MeasurementAnalysis.analyze`
+        add results of the measurement to catalog of the experiment
+        """
+        if catalog is not None:
+            catalog.add_results(measurement.uuid, *self._catalog_identity(), measurement.frequencies, results)
+
+    @staticmethod
+    def _analyze_parallel(measurements, analyze_params, *, n_jobs, executor, chunk_size):
+        """
+        :param measurements: measurements to analyse
+        :param analyze_params: keyword arguments of `MeasurementAnalysis.analyze`
+        analyse chunks of measurements in worker processes, return results in order of measurements
+        """
+        if executor is None:
+            if not isinstance(n_jobs, int) or not (n_jobs > 0 or n_jobs == -1):
+                raise ValueError(f'"n_jobs" should be positive integer or -1, not "{n_jobs}"')
+        if getattr(analyze_params['estimator'], 'warm_start', False):
+            # chunks would start from solutions of other measurements than in serial analysis
+            raise ValueError('estimator with warm start should be run with "n_jobs" 1 and no "executor"')
+        workers = n_jobs if n_jobs > 0 else os.cpu_count()
+        if chunk_size is None:
+            # a few chunks per worker balance load without sending every measurement separately
+            chunk_size = max(1, math.ceil(len(measurements) / (4 * workers)))
+        if not isinstance(chunk_size, int) or chunk_size <= 0:
+            raise ValueError(f'"chunk_size" should be positive integer, not "{chunk_size}"')
+
+        chunks = [measurements[i:i + chunk_size] for i in range(0, len(measurements), chunk_size)]
+        own_executor = executor is None
+        if own_executor:
+            executor = ProcessPoolExecutor(max_workers=workers)
+        try:
+            futures = [executor.submit(_analyze_measurements, chunk, analyze_params) for chunk in chunks]
+            return [results for future in futures for results in future.result()]
+        finally:
+            if own_executor:
+                executor.shutdown()
+
+
+def _analyze_measurements(measurements, analyze_params):
+    """
+    :param measurements: measurements to analyse
+    :param analyze_params: keyword arguments of `MeasurementAnalysis.analyze`
+    return results of `MeasurementAnalysis.analyze` of every measurement
+    """
+    measurement_analysiator = MeasurementAnalysis()
+    return [measurement_analysiator.analyze(measurement, **analyze_params) for measurement in measurements]
         
 
 class MeasurementAnalysis():
-    __default_estimator = FitSinus()
     
 
     def _calc_resistances(self):
 
-        resistances, errors = [] , []
-        
-        for frequency_signal_container in self.measurement:
-        
-            Vr1_fit = self.estimator.estimate(x=self.measurement.time_vector,
-                                     y=frequency_signal_container.v1, 
-                                     frequency=frequency_signal_container.frequency,
-                                     **self.estimator_params
-                                    )
-            R1 = self.measurement.r1
-            Vg_fit = self.estimator.estimate(x=self.measurement.time_vector,
-                                    y=frequency_signal_container.v2, 
-                                    frequency=frequency_signal_container.frequency,
-                                    **self.estimator_params
-                                   )
-            
-            
-            
-            Rg = Vg_fit.amplitude * R1 / Vr1_fit.amplitude
-            error = self._resistance_error(Vg_fit, Vr1_fit, R1)
-            
-            resistances.append(Rg)
-            errors.append(error)
+        if not len(self.measurement):
+            return [], []
+        if self.measurement.excitation == 'chirp':
+            return self._calc_chirp_resistances()
+
+        Vr1_fit, Vg_fit = self._fit()
+        R1 = self.measurement.r1
+
+        Rg = Vg_fit.amplitude * R1 / Vr1_fit.amplitude
+        error = self._resistance_error(Vg_fit, Vr1_fit, R1)
+
+        resistances = list(Rg)
+        errors = list(error)
         return resistances, errors
+
+    def _calc_phases(self):
+        """
+        return phase of impedance of the electrode (v2 against v1) in radians and its error at every frequency
+        """
+        if not len(self.measurement):
+            return [], []
+        if self.measurement.excitation == 'chirp':
+            H, error = self._chirp_response()
+            return list(np.angle(H)), list(error)
+
+        Vr1_fit, Vg_fit = self._fit()
+        phase = np.angle(np.exp(1j * (np.asarray(Vg_fit.phase) - np.asarray(Vr1_fit.phase))))
+        if Vg_fit.phase_error is None or Vr1_fit.phase_error is None:
+            error = np.full(len(phase), np.nan)
+        else:
+            error = (np.asarray(Vg_fit.phase_error)**2 + np.asarray(Vr1_fit.phase_error)**2)**.5
+        return list(phase), list(error)
+
+    def _fit(self):
+        """
+        return fits of v1 and v2 of all frequencies, from cache if the measurement was analysed before
+        """
+        if self._fits is not None:
+            return self._fits
+        key = None
+        if self.cache is not None:
+            key = self.cache.key(self.measurement, self.estimator, self.estimator_params)
+            fits = self.cache.get(key)
+            if fits is not None:
+                self._fits = fits
+                return fits
+
+        containers = list(self.measurement)
+        frequencies = [container.frequency for container in containers]
+        # all frequencies of the measurement are estimated at once
+        Vr1_fit = self.estimator.estimate_batch(self.measurement.time_vector,
+                                                np.stack([container.v1 for container in containers]),
+                                                frequencies,
+                                                channel='v1',
+                                                **self.estimator_params
+                                               )
+        Vg_fit = self.estimator.estimate_batch(self.measurement.time_vector,
+                                               np.stack([container.v2 for container in containers]),
+                                               frequencies,
+                                               channel='v2',
+                                               **self.estimator_params
+                                              )
+        if key is not None:
+            self.cache.put(key, (Vr1_fit, Vg_fit))
+        self._fits = Vr1_fit, Vg_fit
+        return self._fits
     
 
+    def _calc_chirp_resistances(self):
+        """
+        return resistances and errors at every frequency from cross-spectrum of v1 and v2 of the sweep,
+        estimator is not used
+        """
+        H, error = self._chirp_response()
+        R1 = self.measurement.r1
+        gain = np.abs(H)
+        Rg = gain * R1
+        uR1 = resistance_measuerment_error(R1) / 3**.5
+        urg = ((Rg * error)**2 + (gain * uR1)**2)**.5
+        return list(Rg), list(urg)
+
+    def _chirp_response(self):
+        """
+        return v2 / v1 transfer function of the sweep at every frequency and its relative error
+        """
+        if self._response is None:
+            container = self.measurement[0]
+            self._response = chirp_response(container.v1, container.v2, self.measurement.frequencies,
+                                            self.measurement.sampling_rate)
+        return self._response
+
     def _resistance_error(self, Vg_fit, Vr1_fit, R1):
         
         Vg = Vg_fit.amplitude
@@ -135,20 +425,29 @@ class MeasurementAnalysis():
         
    
 
-    def analyze(self, measurement, *, electrode, estimator=None, calculate_parameters=None, estimator_params={}):
+    def analyze(self, measurement, *, electrode, estimator=None, calculate_parameters=None, estimator_params={},
+                cache=None):
+        """
+        :param cache: `ResultCache` with fits of measurements analysed before
+        """
 
         self.measurement = measurement
         self.electrode = electrode
         self.estimator_params = estimator_params
+        self.cache = cache
 
         self.resistances = None
         self.resistances_errors = None
 
         self.resistivities = None
         self.resistivites_error = None
+        # fits and sweep response are computed once for all parameters
+        self._fits = None
+        self._response = None
 
         if not estimator:
-            estimator = MeasurementAnalysis.__default_estimator
+            # new for every call, so state of the estimator (warm start, counters) is not shared between calls
+            estimator = FitSinus()
         self.estimator = estimator
             
         results = dict()
@@ -165,4 +464,7 @@ class MeasurementAnalysis():
             resistivities, resistivites_error = self._calc_resistivities()
             results['resistivity'] = resistivities, resistivites_error
 
+        if calculate_parameters is None or 'phase' in calculate_parameters:
+            results['phase'] = self._calc_phases()
+
         return results
@@ -0,0 +1,222 @@
+import threading
+
+from collections import OrderedDict
+from typing import Iterable, Union
+
+import numpy as np
+
+from ._cache import CacheStats
+
+
+class BasisCache:
+    '''
+    Least recently used cache of time vectors and sinus/cosinus bases.
+
+    Time vectors are keyed by sampling rate and sampling time and are returned
+    read-only, so every analysis of measurements with the same configuration
+    shares one array. Bases exp(2j pi f t) are keyed by sampling rate, sampling
+    time and frequency and are cached only for time vectors returned by this
+    cache. Entries are evicted when their size exceeds `max_bytes`.
+    '''
+
+    def __init__(self, max_bytes:int=64 * 2**20):
+        '''
+        :param max_bytes: maximal size of cached arrays in bytes
+        '''
+        if not isinstance(max_bytes, int) or max_bytes <= 0:
+            raise ValueError(f'"max_bytes" should be positive integer, not "{max_bytes}"')
+        self._max_bytes = max_bytes
+        self._entries = OrderedDict()
+        # id of cached time vector -> its sampling rate and sampling time
+        self._time_keys = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __repr__(self) -> str:
+        return f'BasisCache(max_bytes={self._max_bytes}, {self.stats})'
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @property
+    def stats(self) -> CacheStats:
+        '''
+        return hit, miss and eviction counters with current size
+        '''
+        return CacheStats(self._hits, self._misses, 0, self._evictions, self._size, len(self._entries))
+
+    def time_vector(self, sampling_rate:float, sampling_time:float) -> np.ndarray:
+        '''
+        :param sampling_rate: sampling rate in Hz
+        :param sampling_time: duration of the signal in seconds
+        return read-only vector with time samples
+        '''
+        key = ('time', sampling_rate, sampling_time)
+        with self._lock:
+            x = self._get(key)
+            if x is not None:
+                return x
+        x = time_vector(sampling_rate, sampling_time)
+        x.setflags(write=False)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                return cached
+            self._put(key, x)
+            if key in self._entries:
+                self._time_keys[id(x)] = key[1:]
+        return x
+
+    def phasors(self, x:np.ndarray, frequencies:Iterable[float]) -> np.ndarray:
+        '''
+        :param x: time vector
+        :param frequencies: frequency of every signal
+        return exp(2j pi f t) of every frequency in every sample, signals x samples array,
+        rows are cached if `x` was returned by `time_vector`
+        '''
+        frequencies = np.asarray(frequencies, dtype=float)
+        with self._lock:
+            time_key = self._time_keys.get(id(x))
+            if time_key is None or self._entries.get(('time',) + time_key) is not x:
+                time_key = None
+        if time_key is None:
+            return phasors(x, frequencies)
+
+        rows = {}
+        with self._lock:
+            for frequency in np.unique(frequencies):
+                row = self._get(('phasors',) + time_key + (float(frequency),))
+                if row is not None:
+                    rows[frequency] = row
+        missing = np.array([frequency for frequency in np.unique(frequencies) if frequency not in rows])
+        if len(missing):
+            computed = phasors(x, missing)
+            with self._lock:
+                for frequency, row in zip(missing, computed):
+                    # own copy, a view would keep all computed rows alive
+                    row = row.copy()
+                    row.setflags(write=False)
+                    rows[frequency] = row
+                    self._put(('phasors',) + time_key + (float(frequency),), row)
+        return np.stack([rows[frequency] for frequency in frequencies]) if len(frequencies) \
+            else np.empty((0, x.size), dtype=complex)
+
+    def clear(self) -> None:
+        '''
+        remove all cached arrays, counters are kept
+        '''
+        with self._lock:
+            self._entries.clear()
+            self._time_keys.clear()
+            self._size = 0
+
+    def _get(self, key:tuple) -> Union[np.ndarray, None]:
+        array = self._entries.get(key)
+        if array is None:
+            self._misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return array
+
+    def _put(self, key:tuple, array:np.ndarray) -> None:
+        if array.nbytes > self._max_bytes or key in self._entries:
+            return
+        self._entries[key] = array
+        self._size += array.nbytes
+        while self._size > self._max_bytes:
+            self._remove(next(iter(self._entries)))
+            self._evictions += 1
+
+    def _remove(self, key:tuple) -> None:
+        array = self._entries.pop(key)
+        self._size -= array.nbytes
+        if key[0] == 'time':
+            self._time_keys.pop(id(array), None)
+
+
+def time_vector(sampling_rate:float, sampling_time:float) -> np.ndarray:
+    '''
+    :param sampling_rate: sampling rate in Hz
+    :param sampling_time: duration of the signal in seconds
+    return vector with time samples
+    '''
+    return np.linspace(0,
+                       sampling_time,
+                       int(sampling_rate * sampling_time),
+                       endpoint=True)
+
+
+def phasors(x:np.ndarray, frequencies:Iterable[float]) -> np.ndarray:
+    '''
+    :param x: time vector
+    :param frequencies: frequency of every signal
+    return exp(2j pi f t) of every frequency in every sample, signals x samples array
+    '''
+    phase_step = 2 * np.pi * np.asarray(frequencies, dtype=float)[:, None]
+    n = x.size
+    block = int(np.ceil(n**.5))
+    step = (x[-1] - x[0]) / (n - 1) if n > 1 else 0.
+    if n < 64 or not np.allclose(np.diff(x), step, rtol=1e-9, atol=0):
+        phase = phase_step * x
+        return np.cos(phase) + 1j * np.sin(phase)
+
+    # evenly sampled time, exp(i(u + v)) = exp(iu) exp(iv) of coarse u and fine v grids
+    # costs one multiplication per sample instead of calling sin and cos
+    coarse = phase_step * (x[0] + step * block * np.arange(-(-n // block)))
+    fine = phase_step * (step * np.arange(block))
+    E = np.exp(1j * coarse)[:, :, None] * np.exp(1j * fine)[:, None, :]
+    return E.reshape(len(phase_step), -1)[:, :n]
+
+
+_basis_cache = BasisCache()
+
+
+def enable_basis_cache(max_bytes:int=64 * 2**20) -> BasisCache:
+    '''
+    :param max_bytes: maximal size of cached arrays in bytes
+    replace active cache of time vectors and bases with new one, return the cache
+    '''
+    global _basis_cache
+    _basis_cache = BasisCache(max_bytes)
+    return _basis_cache
+
+
+def disable_basis_cache() -> None:
+    '''
+    compute time vectors and bases every time they are needed
+    '''
+    global _basis_cache
+    _basis_cache = None
+
+
+def get_basis_cache() -> Union[BasisCache, None]:
+    '''
+    return active cache, None if caching is disabled
+    '''
+    return _basis_cache
+
+
+def cached_time_vector(sampling_rate:float, sampling_time:float) -> np.ndarray:
+    '''
+    return time vector from active cache, or new one if caching is disabled
+    '''
+    if _basis_cache is None:
+        return time_vector(sampling_rate, sampling_time)
+    return _basis_cache.time_vector(sampling_rate, sampling_time)
+
+
+def cached_phasors(x:np.ndarray, frequencies:Iterable[float]) -> np.ndarray:
+    '''
+    return bases from active cache, or new ones if caching is disabled
+    '''
+    if _basis_cache is None:
+        return phasors(x, frequencies)
+    return _basis_cache.phasors(x, frequencies)
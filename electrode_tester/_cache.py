@@ -0,0 +1,189 @@
+import copy
+import mmap
+import os
+import threading
+
+from collections import OrderedDict, namedtuple
+from pathlib import Path
+from typing import Union, Callable, Hashable
+
+import numpy as np
+
+CacheStats = namedtuple('CacheStats', ['hits', 'misses', 'invalidations', 'evictions', 'size', 'entries'])
+
+
+class LoadCache:
+    '''
+    Least recently used cache of objects loaded from files.
+
+    Entries are evicted when their estimated size exceeds `max_bytes` and are
+    invalidated when modification time or size of their file changes.
+    Values computed once by the object (e.g. differences between channels)
+    are computed before it is cached. Callers get copies sharing these arrays,
+    with own lists and dicts, so neither iteration state nor appended entries
+    reach the cached object.
+    '''
+
+    def __init__(self, max_bytes:int=256 * 2**20):
+        '''
+        :param max_bytes: maximal estimated size of cached objects in bytes
+        '''
+        if not isinstance(max_bytes, int) or max_bytes <= 0:
+            raise ValueError(f'"max_bytes" should be positive integer, not "{max_bytes}"')
+        self._max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __repr__(self) -> str:
+        return f'LoadCache(max_bytes={self._max_bytes}, {self.stats})'
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @property
+    def stats(self) -> CacheStats:
+        '''
+        return hit, miss, invalidation and eviction counters with current size
+        '''
+        return CacheStats(self._hits, self._misses, self._invalidations, self._evictions,
+                          self._size, len(self._entries))
+
+    def get(self, key:Hashable, path:Union[str, Path], load:Callable):
+        '''
+        :param key: identifier of the object
+        :param path: file the object is loaded from
+        :param load: function loading the object
+        return copy of cached object, loading it if missing or outdated
+        '''
+        stamp = self._stamp(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                obj, entry_stamp, size = entry
+                if entry_stamp == stamp:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return self._copy(obj)
+                self._invalidations += 1
+                self._remove(key)
+            self._misses += 1
+
+        obj = load()
+        prepare = getattr(obj, '_prepare_cached', None)
+        if prepare is not None:
+            prepare()
+        size = self._size_of(obj)
+        with self._lock:
+            if size <= self._max_bytes:
+                if key in self._entries:
+                    self._remove(key)
+                self._entries[key] = (obj, stamp, size)
+                self._size += size
+                while self._size > self._max_bytes:
+                    self._remove(next(iter(self._entries)))
+                    self._evictions += 1
+        return self._copy(obj)
+
+    def clear(self) -> None:
+        '''
+        remove all cached objects, counters are kept
+        '''
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _remove(self, key:Hashable) -> None:
+        _, _, size = self._entries.pop(key)
+        self._size -= size
+
+    @staticmethod
+    def _stamp(path:Union[str, Path]) -> tuple:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def _copy(obj):
+        '''
+        :param obj: cached object
+        return shallow copy of the object with copies of its lists, dicts and sets,
+        attributes are copied directly, so values dropped by `__getstate__` are shared too
+        '''
+        if not hasattr(obj, '__dict__'):
+            return copy.copy(obj)
+        cls = type(obj)
+        new = cls.__new__(cls)
+        for name, value in vars(obj).items():
+            if isinstance(value, (list, dict, set)):
+                value = copy.copy(value)
+            new.__dict__[name] = value
+        return new
+
+    @staticmethod
+    def _size_of(obj) -> int:
+        '''
+        :param obj: loaded object
+        return estimated size of the object in memory, arrays kept by its attributes
+        are counted once and memory mapped arrays are not counted
+        '''
+        size = 1024
+        counted = set()
+        for value in getattr(obj, '__dict__', {}).values():
+            if not isinstance(value, np.ndarray):
+                continue
+            base = value
+            while isinstance(base.base, np.ndarray):
+                base = base.base
+            if isinstance(base, np.memmap) or isinstance(base.base, mmap.mmap) or id(base) in counted:
+                continue
+            counted.add(id(base))
+            size += base.nbytes
+        return size
+
+
+_load_cache = None
+
+
+def enable_load_cache(max_bytes:int=256 * 2**20) -> LoadCache:
+    '''
+    :param max_bytes: maximal estimated size of cached objects in bytes
+    start caching measurements and containers loaded by experiments, return the cache
+    '''
+    global _load_cache
+    _load_cache = LoadCache(max_bytes)
+    return _load_cache
+
+
+def disable_load_cache() -> None:
+    '''
+    stop caching loaded measurements and containers
+    '''
+    global _load_cache
+    _load_cache = None
+
+
+def get_load_cache() -> Union[LoadCache, None]:
+    '''
+    return active cache, None if caching is disabled
+    '''
+    return _load_cache
+
+
+def cached_load(key:Hashable, path:Union[str, Path], load:Callable):
+    '''
+    :param key: identifier of the object
+    :param path: file the object is loaded from
+    :param load: function loading the object
+    load object through active cache, or directly if caching is disabled
+    '''
+    if _load_cache is None:
+        return load()
+    return _load_cache.get(key, path, load)
@@ -0,0 +1,312 @@
+import dataclasses
+import datetime
+import json
+import sqlite3
+
+from pathlib import Path
+from typing import Union, List, Iterable, Dict
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS electrodes (
+    id INTEGER PRIMARY KEY,
+    key TEXT UNIQUE NOT NULL,
+    electrode_type TEXT,
+    salt_type TEXT,
+    salty_value REAL,
+    normal_height REAL,
+    squeeze_height REAL,
+    width REAL,
+    height_delta REAL,
+    normal_height_var REAL
+);
+CREATE TABLE IF NOT EXISTS experiments (
+    uuid TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    date REAL NOT NULL,
+    electrode_id INTEGER REFERENCES electrodes(id),
+    storage TEXT,
+    voltage REAL,
+    sampling_rate INTEGER,
+    sampling_time REAL,
+    r1 TEXT,
+    r2 TEXT,
+    tries INTEGER,
+    comment TEXT
+);
+CREATE TABLE IF NOT EXISTS frequencies (
+    experiment_uuid TEXT NOT NULL REFERENCES experiments(uuid) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    frequency REAL NOT NULL,
+    PRIMARY KEY (experiment_uuid, position)
+);
+CREATE TABLE IF NOT EXISTS measurements (
+    uuid TEXT PRIMARY KEY,
+    experiment_uuid TEXT NOT NULL REFERENCES experiments(uuid) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    entry TEXT NOT NULL,
+    date REAL NOT NULL,
+    complete INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS analysis_results (
+    measurement_uuid TEXT NOT NULL REFERENCES measurements(uuid) ON DELETE CASCADE,
+    estimator TEXT NOT NULL,
+    parameters TEXT NOT NULL,
+    frequency REAL NOT NULL,
+    resistance REAL,
+    resistance_error REAL,
+    resistivity REAL,
+    resistivity_error REAL,
+    phase REAL,
+    phase_error REAL,
+    PRIMARY KEY (measurement_uuid, estimator, parameters, frequency)
+);
+CREATE INDEX IF NOT EXISTS measurements_experiment ON measurements(experiment_uuid, position);
+CREATE INDEX IF NOT EXISTS frequencies_frequency ON frequencies(frequency);
+'''
+
+
+class Catalog:
+    '''
+    SQLite index of experiments saved in `results_path`.
+
+    Experiments, electrodes, measurements, frequencies and analysis results
+    can be searched without loading pickle files. The index is kept up to date
+    by experiments created with `use_catalog=True`, every saved measurement of
+    such experiment updates its row, `ExperimentAnalysis` adds results of their
+    analysis, and the index can be rebuilt from files with `rebuild`.
+    '''
+
+    # parameters of analysis results, every one has value and error column
+    _RESULTS = ('resistance', 'resistivity', 'phase')
+    # columns of results added after the table was created, added to older catalogs on open
+    _RESULT_COLUMNS = ('phase', 'phase_error')
+
+    FILE_NAME = 'catalog.sqlite'
+
+    def __init__(self, results_path:Union[str, Path]):
+        '''
+        :param results_path: folder with experiments, index is kept in `FILE_NAME` inside it
+        '''
+        self._results_path = Path(results_path)
+        if not self._results_path.is_dir():
+            raise ValueError(f'"{results_path}" is not a folder')
+        self._connection = sqlite3.connect(self._results_path / self.FILE_NAME)
+        self._connection.row_factory = sqlite3.Row
+        self._connection.execute('PRAGMA foreign_keys = ON')
+        self._connection.executescript(_SCHEMA)
+        columns = {row['name'] for row in self._connection.execute('PRAGMA table_info(analysis_results)')}
+        with self._connection:
+            for column in self._RESULT_COLUMNS:
+                if column not in columns:
+                    self._connection.execute(f'ALTER TABLE analysis_results ADD COLUMN {column} REAL')
+
+    def __enter__(self) -> 'Catalog':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        '''
+        return number of indexed experiments
+        '''
+        return self._connection.execute('SELECT COUNT(*) FROM experiments').fetchone()[0]
+
+    @property
+    def path(self) -> Path:
+        return self._results_path / self.FILE_NAME
+
+    def close(self) -> None:
+        '''
+        close connection to the index
+        '''
+        self._connection.close()
+
+    def add_experiment(self, experiment) -> None:
+        '''
+        :param experiment: saved experiment
+        add or update experiment with its electrode and frequencies
+        '''
+        with self._connection:
+            electrode_id = self._add_electrode(experiment.electrode)
+            r1, r2 = experiment.resistances
+            self._connection.execute(
+                'INSERT INTO experiments (uuid, path, date, electrode_id, storage, voltage, '
+                'sampling_rate, sampling_time, r1, r2, tries, comment) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT(uuid) DO UPDATE SET path=excluded.path, tries=excluded.tries, '
+                'comment=excluded.comment',
+                (experiment.uuid, str(experiment.save_name), experiment._date, electrode_id,
+                 experiment.storage, experiment.voltage, experiment.sampling_rate,
+                 experiment.sampling_time, str(r1), str(r2), experiment.tries, experiment.comment))
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO frequencies (experiment_uuid, position, frequency) '
+                'VALUES (?, ?, ?)',
+                [(experiment.uuid, i, f) for i, f in enumerate(experiment.frequencies)])
+
+    def add_measurement(self, experiment, measurement, position:int) -> None:
+        '''
+        :param experiment: experiment the measurement belongs to
+        :param measurement: saved measurement
+        :param position: index of the measurement in the experiment
+        add or update measurement
+        '''
+        with self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO measurements '
+                '(uuid, experiment_uuid, position, entry, date, complete) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (measurement.uuid, experiment.uuid, position, str(measurement.entry),
+                 measurement._date, int(bool(measurement))))
+
+    def add_results(self, measurement_uuid:str, estimator:str, parameters:Dict,
+                    frequencies:Iterable[float], results:Dict) -> bool:
+        '''
+        :param measurement_uuid: uuid of analysed measurement
+        :param estimator: name of the estimator
+        :param parameters: parameters of the estimator
+        :param frequencies: frequencies of the measurement
+        :param results: results of `MeasurementAnalysis.analyze`
+        cache results of analysis, parameters missing in results keep their cached values,
+        return False if the measurement is not indexed
+        '''
+        frequencies = list(frequencies)
+        nothing = [None] * len(frequencies)
+        pairs = [results.get(name, (nothing, nothing)) for name in self._RESULTS]
+        rows = zip(frequencies, *(values for pair in pairs for values in pair))
+        columns = [column for name in self._RESULTS for column in (name, name + '_error')]
+        update = ', '.join(f'{column}=COALESCE(excluded.{column}, {column})' for column in columns)
+        parameters = self._parameters_key(parameters)
+        with self._connection:
+            indexed = self._connection.execute('SELECT 1 FROM measurements WHERE uuid=?',
+                                               (measurement_uuid,)).fetchone()
+            if indexed is None:
+                return False
+            self._connection.executemany(
+                f'INSERT INTO analysis_results (measurement_uuid, estimator, parameters, frequency, '
+                f'{", ".join(columns)}) VALUES (?, ?, ?, ?{", ?" * len(columns)}) '
+                f'ON CONFLICT(measurement_uuid, estimator, parameters, frequency) DO UPDATE SET {update}',
+                [(measurement_uuid, estimator, parameters, *(self._float(v) for v in row))
+                 for row in rows])
+        return True
+
+    def results(self, measurement_uuid:str, estimator:str, parameters:Dict) -> List[dict]:
+        '''
+        :param measurement_uuid: uuid of analysed measurement
+        :param estimator: name of the estimator
+        :param parameters: parameters of the estimator
+        return cached results of analysis for every frequency, empty list if not cached
+        '''
+        rows = self._connection.execute(
+            'SELECT frequency, resistance, resistance_error, resistivity, resistivity_error, phase, phase_error '
+            'FROM analysis_results WHERE measurement_uuid=? AND estimator=? AND parameters=? '
+            'ORDER BY frequency',
+            (measurement_uuid, estimator, self._parameters_key(parameters)))
+        return [dict(row) for row in rows]
+
+    def find(self, *, electrode_type:str=None, salt_type:str=None,
+             since:datetime.datetime=None, until:datetime.datetime=None,
+             frequency:float=None) -> List[Path]:
+        '''
+        :param electrode_type: type of the electrode
+        :param salt_type: type of the salt
+        :param since: earliest start of the experiment
+        :param until: latest start of the experiment
+        :param frequency: frequency which must be measured
+        return paths of matching experiments sorted by date
+        '''
+        query = ('SELECT DISTINCT experiments.path, experiments.date FROM experiments '
+                 'LEFT JOIN electrodes ON electrodes.id = experiments.electrode_id '
+                 'LEFT JOIN frequencies ON frequencies.experiment_uuid = experiments.uuid')
+        conditions, values = [], []
+        if electrode_type is not None:
+            conditions.append('electrodes.electrode_type = ?')
+            values.append(electrode_type)
+        if salt_type is not None:
+            conditions.append('electrodes.salt_type = ?')
+            values.append(salt_type)
+        if since is not None:
+            conditions.append('experiments.date >= ?')
+            values.append(since.timestamp())
+        if until is not None:
+            conditions.append('experiments.date <= ?')
+            values.append(until.timestamp())
+        if frequency is not None:
+            conditions.append('frequencies.frequency = ?')
+            values.append(frequency)
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += ' ORDER BY experiments.date'
+        return [self._results_path / row['path'] for row in self._connection.execute(query, values)]
+
+    def measurement_dates(self, experiment_uuid:str, time_limit:datetime.timedelta=None) -> List[tuple]:
+        '''
+        :param experiment_uuid: uuid of the experiment
+        :param time_limit: maximal time since the first measurement
+        return (position, time since first measurement) of the same measurements as
+        `utils.limit_measurements` selects, without loading them; the first measurement is always selected
+        and incomplete ones are not skipped
+        '''
+        rows = self._connection.execute(
+            'SELECT position, date FROM measurements WHERE experiment_uuid=? '
+            'ORDER BY position', (experiment_uuid,)).fetchall()
+        if not rows:
+            return []
+        first = rows[0]['date']
+        limit = time_limit.total_seconds() if time_limit is not None else float('inf')
+        selected = [(rows[0]['position'], datetime.timedelta(0))]
+        for row in rows[1:]:
+            if row['date'] - first > limit:
+                break
+            # computed from datetimes like by `utils.limit_measurements`, so they are equal to microsecond
+            time_delta = datetime.datetime.fromtimestamp(row['date']) - datetime.datetime.fromtimestamp(first)
+            selected.append((row['position'], time_delta))
+        return selected
+
+    def limit_measurements(self, experiment, time_limit:datetime.timedelta=None):
+        '''
+        :param experiment: indexed experiment
+        :param time_limit: maximal time since the first measurement
+        yield (time since first measurement, measurement) loading only selected measurements
+        '''
+        for position, time_delta in self.measurement_dates(experiment.uuid, time_limit):
+            yield time_delta, experiment[position]
+
+    def rebuild(self) -> int:
+        '''
+        index again all experiments found in `results_path`, return their number
+        '''
+        from ._experiment import Experiment
+
+        with self._connection:
+            for table in ('analysis_results', 'measurements', 'frequencies', 'experiments', 'electrodes'):
+                self._connection.execute(f'DELETE FROM {table}')
+
+        paths = sorted(self._results_path.glob('*.exp'))
+        for path in paths:
+            experiment = Experiment.load(path)
+            self.add_experiment(experiment)
+            for position, measurement in enumerate(experiment):
+                self.add_measurement(experiment, measurement, position)
+            experiment.close()
+        return len(paths)
+
+    def _add_electrode(self, electrode) -> int:
+        fields = dataclasses.asdict(electrode)
+        key = json.dumps(fields, sort_keys=True, default=str)
+        self._connection.execute(
+            'INSERT OR IGNORE INTO electrodes (key, electrode_type, salt_type, salty_value, '
+            'normal_height, squeeze_height, width, height_delta, normal_height_var) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (key, fields['electrode_type'], fields['salt_type'], fields['salty_value'],
+             fields['normal_height'], fields['squeeze_height'], fields['width'],
+             fields['height_delta'], fields['normal_height_var']))
+        return self._connection.execute('SELECT id FROM electrodes WHERE key=?', (key,)).fetchone()[0]
+
+    @staticmethod
+    def _parameters_key(parameters:Dict) -> str:
+        return json.dumps(parameters or {}, sort_keys=True, default=repr)
+
+    @staticmethod
+    def _float(value) -> Union[float, None]:
+        return None if value is None else float(value)
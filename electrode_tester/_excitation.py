@@ -0,0 +1,173 @@
+from typing import Iterable, List, Tuple
+
+import numpy as np
+
+EXCITATIONS = ('stepped', 'multisine', 'sequence', 'chirp')
+
+# chirp sweeps slightly wider than measured frequencies, so they are not at its edges
+CHIRP_MARGIN = 1.1
+
+
+def schroeder_phases(n_tones:int) -> np.ndarray:
+    '''
+    :param n_tones: number of tones of equal amplitude
+    return Schroeder phases giving low crest factor of sum of tones
+    '''
+    k = np.arange(1, n_tones + 1)
+    return -np.pi * k * (k - 1) / n_tones
+
+
+def multisine(frequencies:Iterable[float], sampling_rate:float, sampling_time:float) -> np.ndarray:
+    '''
+    :param frequencies: frequencies of tones, whole number of periods in `sampling_time`
+    :param sampling_rate: sampling rate of the waveform in Hz
+    :param sampling_time: duration of one repetition of the waveform in seconds
+    return one repetition of sum of tones with Schroeder phases, scaled to peak 1
+    '''
+    frequencies = np.asarray(frequencies, dtype=float)
+    t = np.arange(int(sampling_rate * sampling_time)) / sampling_rate
+    phases = schroeder_phases(len(frequencies))
+    waveform = np.sin(2 * np.pi * frequencies[:, None] * t + phases[:, None]).sum(axis=0)
+    return waveform / np.max(np.abs(waveform))
+
+
+def check_multisine(frequencies:Iterable[float], sampling_time:float) -> None:
+    '''
+    :param frequencies: frequencies of tones
+    :param sampling_time: duration of the capture in seconds
+    raise ValueError if a frequency has not whole number of periods in the capture
+    '''
+    periods = np.asarray(frequencies, dtype=float) * sampling_time
+    wrong = [f for f, p in zip(frequencies, periods) if abs(p - round(p)) > 1e-6 * max(1., p)]
+    if wrong:
+        raise ValueError(f'frequencies {wrong} have not whole number of periods in "sampling_time" '
+                         f'{sampling_time} s, multisine can\'t separate them')
+
+
+def split_multisine(data:np.ndarray, frequencies:Iterable[float], sampling_rate:float) -> List[np.ndarray]:
+    '''
+    :param data: channels x samples array captured during multisine excitation
+    :param frequencies: frequencies of tones
+    :param sampling_rate: sampling rate in Hz
+    return channels x samples array with offset, one tone of every frequency and residual of the capture,
+    tones are read from one FFT of the capture; residual is the capture without offset and all tones,
+    so errors estimated from residuals of fits of every tone come from noise of the capture
+    '''
+    data = np.asarray(data, dtype=float)
+    n = data.shape[-1]
+    spectrum = np.fft.rfft(data, axis=-1)
+    offset = spectrum[:, :1].real / n
+    t = np.arange(n) / sampling_rate
+    tones = []
+    for frequency in frequencies:
+        index = int(round(frequency * n / sampling_rate))
+        tones.append((2 / n * spectrum[:, index:index + 1] * np.exp(2j * np.pi * frequency * t)).real)
+    residual = data - offset - sum(tones)
+    return [tone + offset + residual for tone in tones]
+
+
+def sequence(frequencies:Iterable[float], sampling_rate:float, sampling_time:float,
+             settling_periods:float) -> Tuple[np.ndarray, np.ndarray]:
+    '''
+    :param frequencies: frequencies measured one after another
+    :param sampling_rate: sampling rate of the waveform in Hz
+    :param sampling_time: duration of the signal of every frequency in seconds
+    :param settling_periods: number of periods of every frequency played before its signal is recorded
+    return waveform with segments of all frequencies and index of the first recorded sample of every segment
+    '''
+    n_samples = int(sampling_rate * sampling_time)
+    segments = []
+    starts = []
+    position = 0
+    for frequency in frequencies:
+        settling = int(np.ceil(settling_periods * sampling_rate / frequency))
+        t = np.arange(settling + n_samples) / sampling_rate
+        segments.append(np.sin(2 * np.pi * frequency * t))
+        starts.append(position + settling)
+        position += len(t)
+    return np.concatenate(segments), np.array(starts)
+
+
+def split_sequence(data:np.ndarray, starts:Iterable[int], n_samples:int,
+                   waveform:np.ndarray=None) -> List[np.ndarray]:
+    '''
+    :param data: channels x samples array captured during the sequence
+    :param starts: index of the first recorded sample of every segment returned by `sequence`
+    :param n_samples: number of recorded samples of every segment
+    :param waveform: repeated waveform returned by `sequence`, capture is expected to start with it if None
+    return channels x samples array of every frequency without settling,
+    with `waveform` the capture is first aligned to its start by `align_capture`
+    '''
+    if waveform is not None:
+        data = align_capture(data, waveform)
+    if len(starts) and data.shape[-1] < starts[-1] + n_samples:
+        raise ValueError(f'capture has {data.shape[-1]} samples, sequence needs {starts[-1] + n_samples}')
+    return [data[:, start:start + n_samples] for start in starts]
+
+
+def align_capture(data:np.ndarray, waveform:np.ndarray) -> np.ndarray:
+    '''
+    :param data: channels x samples array captured while the generator repeats the waveform,
+                 the first channel is output of the generator
+    :param waveform: repeated waveform
+    return one repetition of the waveform from the capture, rotated so it starts with the waveform;
+    the scope triggers on a level, not on the start of the waveform, so the start is found
+    by circular cross-correlation of the first channel with the waveform
+    '''
+    n = len(waveform)
+    data = np.asarray(data)
+    if data.shape[-1] < n:
+        raise ValueError(f'capture has {data.shape[-1]} samples, sequence needs {n}')
+    data = data[:, :n]
+    reference = np.asarray(waveform, dtype=float)
+    generator = np.asarray(data[0], dtype=float)
+    correlation = np.fft.irfft(np.conj(np.fft.rfft(generator - np.mean(generator)))
+                               * np.fft.rfft(reference - np.mean(reference)), n)
+    # sample j of the capture is sample (j + lag) % n of the waveform
+    lag = int(np.argmax(correlation))
+    return np.roll(data, lag, axis=-1)
+
+
+def chirp(frequencies:Iterable[float], sampling_rate:float, sampling_time:float) -> np.ndarray:
+    '''
+    :param frequencies: measured frequencies
+    :param sampling_rate: sampling rate of the waveform in Hz
+    :param sampling_time: duration of the sweep in seconds
+    return sine with frequency growing exponentially from below the lowest to above the highest frequency
+    '''
+    start = min(frequencies) / CHIRP_MARGIN
+    stop = min(max(frequencies) * CHIRP_MARGIN, 0.45 * sampling_rate)
+    t = np.arange(int(sampling_rate * sampling_time)) / sampling_rate
+    if stop <= start:
+        return np.sin(2 * np.pi * start * t)
+    rate = np.log(stop / start)
+    phase = 2 * np.pi * start * sampling_time / rate * np.expm1(rate * t / sampling_time)
+    return np.sin(phase)
+
+
+def chirp_response(v1:np.ndarray, v2:np.ndarray, frequencies:Iterable[float], sampling_rate:float, *,
+                   bins:int=5) -> Tuple[np.ndarray, np.ndarray]:
+    '''
+    :param v1: voltage on reference resistor during the sweep
+    :param v2: voltage on measured electrode during the sweep
+    :param frequencies: frequencies at which response is computed
+    :param sampling_rate: sampling rate in Hz
+    :param bins: number of FFT bins around every frequency averaged in cross-spectrum
+    return v2 / v1 transfer function (H1 estimate from cross-spectrum) at every frequency
+    and relative error of its magnitude, which is also error of its phase in radians
+    '''
+    n = len(v1)
+    V1 = np.fft.rfft(np.asarray(v1, dtype=float) - np.mean(v1))
+    V2 = np.fft.rfft(np.asarray(v2, dtype=float) - np.mean(v2))
+    centers = np.rint(np.asarray(frequencies, dtype=float) * n / sampling_rate).astype(int)
+    offsets = np.arange(bins) - bins // 2
+    index = np.clip(centers[:, None] + offsets, 1, len(V1) - 1)
+
+    S12 = np.sum(np.conj(V1[index]) * V2[index], axis=1)
+    S11 = np.sum(np.abs(V1[index])**2, axis=1)
+    S22 = np.sum(np.abs(V2[index])**2, axis=1)
+    H = S12 / S11
+    coherence = np.abs(S12)**2 / (S11 * S22)
+    # random error of H1 estimate averaged over `bins` bins
+    error = np.sqrt(np.maximum(1 - coherence, 0)) / np.sqrt(coherence * 2 * bins)
+    return H, error
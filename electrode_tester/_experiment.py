@@ -1,13 +1,15 @@
 import copy
 import datetime
 # import logging
-import os
 import time
 import uuid
 import warnings
 import itertools
 import pickle
 import decimal
+import json
+import math
+import os
 import sys
 
 from pathlib import Path
@@ -17,9 +19,12 @@ from functools import total_ordering
 from tqdm.auto import tqdm
 
 from ._measurement import Measurement
+from ._catalog import Catalog
+from ._excitation import EXCITATIONS, check_multisine
 from .devices import BaseDevice
 from .common import date_format
 from .electrodes import BaseElectrode
+from .storage import ChunkedFile, Durability, BackgroundWriter, SAMPLE_FORMATS
 
 @total_ordering
 class Experiment():
@@ -41,6 +46,15 @@ class Experiment():
                 save_name: Union[str, Path]='',
                 scope_range = 2,
                 comment: str='',
+                storage: str='pickle',
+                durability: str='file',
+                write_queue_size: int=0,
+                write_workers: int=1,
+                sample_format: str='float64',
+                use_catalog: bool=False,
+                journal_compaction: int=100,
+                excitation: str='stepped',
+                settling_periods: float=2,
                 ):
 
         self._uuid = str(uuid.uuid4())
@@ -56,6 +70,14 @@ class Experiment():
         self.delay = delay
         self.tries = tries
         self.comment = comment
+        self.scope_range = scope_range
+        self.storage = storage
+        self.durability = durability
+        self.write_queue_size = write_queue_size
+        self.write_workers = write_workers
+        self.sample_format = sample_format
+        self.use_catalog = use_catalog
+        self.journal_compaction = journal_compaction
 
         self._measurements = []
 
@@ -71,6 +93,8 @@ class Experiment():
                 self.set_channel(key, val)
 
         self._frequencies = self._parse_frequencies(frequencies)
+        self.excitation = excitation
+        self.settling_periods = settling_periods
 
         self.results_path = results_path
         self.save_name = save_name
@@ -78,6 +102,9 @@ class Experiment():
         self.device.set_scope(frequency=sampling_rate, scope_range=scope_range,
                               record_time=sampling_time)
         self.__working_dir = self.results_path
+        self.__store = None
+        self.__mmap = False
+        self.__catalog = None
         self.save()
         print(f'starting experiment: "{self.save_path.absolute()}"')
 
@@ -86,7 +113,7 @@ class Experiment():
         return self
 
     def __next__(self) -> Measurement:
-        measurement = Measurement.load(self.__working_dir / self.folder_path.name / next(self.__iter_measurements), working_dir=self.__working_dir / self.folder_path.name)
+        measurement = self._load_measurement(next(self.__iter_measurements))
         return measurement
 
     def __getitem__(self, index) -> List[Measurement]:
@@ -94,9 +121,19 @@ class Experiment():
             measurements = self._measurements[index]
         except IndexError:
             raise IndexError('"index" must be between 0 and number of measurements')
-        if isinstance(measurements, str):
-            return Measurement.load(self.__working_dir / self.folder_path.name / measurements, working_dir=self.__working_dir / self.folder_path.name)
-        return [Measurement.load(self.__working_dir / self.folder_path.name / m, working_dir=self.__working_dir / self.folder_path.name) for m in measurements]
+        if isinstance(index, slice):
+            return [self._load_measurement(m) for m in measurements]
+        return self._load_measurement(measurements)
+
+    def _load_measurement(self, entry:Union[str, int]) -> Measurement:
+        """
+        :param entry: file name of the measurement or index of the try in chunked file
+        load measurement of the experiment
+        """
+        if self.storage == 'chunked':
+            return Measurement.load_from_store(self.store, entry)
+        working_dir = self.__working_dir / self.folder_path.name
+        return Measurement.load(working_dir / entry, working_dir=working_dir)
     
     def __repr__(self) -> str:
         """
@@ -136,6 +173,8 @@ class Experiment():
 
     def __exit__(self, exc_type, exc_val, exc_tb) -> None:
         self.save(overwrite=True)
+        self.durability_policy.commit('experiment')
+        self.close()
 
     def __len__(self) -> int:
         return len(self._measurements)
@@ -225,6 +264,8 @@ class Experiment():
     def sampling_rate(self, sampling_rate:int):
         if not isinstance(sampling_rate, (int)) or sampling_rate <= 0:
             raise ValueError(f'"sampling rate" should be positive integer, not "{sampling_rate}"')
+        if hasattr(self, '_frequencies'):
+            self._check_excitation(self.excitation, self.frequencies, sampling_rate, self.sampling_time)
         self._sampling_rate = sampling_rate
 
     @property
@@ -243,6 +284,8 @@ class Experiment():
     def sampling_time(self, sampling_time:float):
         if not isinstance(sampling_time, (int)) or sampling_time <= 0:
             raise ValueError(f'"sampling time" should be positive float, not "{sampling_time}"')
+        if hasattr(self, '_frequencies'):
+            self._check_excitation(self.excitation, self.frequencies, self.sampling_rate, sampling_time)
         self._sampling_time = sampling_time
 
     @property
@@ -280,7 +323,7 @@ class Experiment():
 
     @property
     def scope_range(self) -> float:
-        return self._scope_range
+        return getattr(self, '_scope_range', 2.)
 
     @scope_range.setter
     def scope_range(self, value:Union[float, int]):
@@ -289,6 +332,144 @@ class Experiment():
                              f'float, not "{value}"')
         self._scope_range = float(value)
 
+    @property
+    def storage(self) -> str:
+        return getattr(self, '_storage', 'pickle')
+
+    @storage.setter
+    def storage(self, storage:str):
+        if storage not in ('pickle', 'chunked'):
+            raise ValueError(f'"storage" should be "pickle" or "chunked", not "{storage}"')
+        self._storage = storage
+
+    @property
+    def durability(self) -> str:
+        return self.durability_policy.mode
+
+    @durability.setter
+    def durability(self, durability:str):
+        self._durability = Durability(durability)
+
+    @property
+    def durability_policy(self) -> Durability:
+        """
+        return policy deciding when saved files are forced to disk
+        """
+        if not hasattr(self, '_durability'):
+            self._durability = Durability()
+        return self._durability
+
+    @property
+    def write_queue_size(self) -> int:
+        return getattr(self, '_write_queue_size', 0)
+
+    @write_queue_size.setter
+    def write_queue_size(self, size:int):
+        if not isinstance(size, int) or size < 0:
+            raise ValueError(f'"write_queue_size" should be non negative integer, not "{size}"')
+        self._write_queue_size = size
+
+    @property
+    def write_workers(self) -> int:
+        return getattr(self, '_write_workers', 1)
+
+    @write_workers.setter
+    def write_workers(self, workers:int):
+        if not isinstance(workers, int) or workers <= 0:
+            raise ValueError(f'"write_workers" should be positive integer, not "{workers}"')
+        self._write_workers = workers
+
+    def _make_writer(self) -> Union[BackgroundWriter, None]:
+        """
+        return writer saving containers in background, None if containers are saved synchronously
+        """
+        if not self.write_queue_size:
+            return None
+        return BackgroundWriter(workers=self.write_workers, queue_size=self.write_queue_size)
+
+    @property
+    def sample_format(self) -> str:
+        return getattr(self, '_sample_format', 'float64')
+
+    @sample_format.setter
+    def sample_format(self, sample_format:str):
+        if sample_format not in SAMPLE_FORMATS:
+            formats = '", "'.join(SAMPLE_FORMATS)
+            raise ValueError(f'"sample_format" should be one of "{formats}", not "{sample_format}"')
+        self._sample_format = sample_format
+
+    @property
+    def excitation(self) -> str:
+        """
+        return how frequencies are excited: "stepped" one after another,
+        "multisine" all at once in one capture, "sequence" one after another in one capture,
+        "chirp" with one sweep from the lowest to the highest frequency
+        """
+        return getattr(self, '_excitation', 'stepped')
+
+    @excitation.setter
+    def excitation(self, excitation:str):
+        if excitation not in EXCITATIONS:
+            excitations = '", "'.join(EXCITATIONS)
+            raise ValueError(f'"excitation" should be one of "{excitations}", not "{excitation}"')
+        self._check_excitation(excitation, self.frequencies, self.sampling_rate, self.sampling_time)
+        self._excitation = excitation
+
+    @staticmethod
+    def _check_excitation(excitation:str, frequencies:Iterable, sampling_rate:int, sampling_time:float) -> None:
+        """
+        raise ValueError if the excitation can't measure frequencies with the sampling rate and time
+        """
+        if excitation == 'multisine':
+            check_multisine(frequencies, sampling_time)
+        if excitation == 'chirp' and max(frequencies) >= sampling_rate / 2:
+            raise ValueError(f'frequencies should be lower than half of "sampling_rate" {sampling_rate} '
+                             f'for chirp excitation')
+
+    @property
+    def settling_periods(self) -> float:
+        """
+        return number of periods of every frequency skipped before its signal in "sequence" excitation
+        """
+        return getattr(self, '_settling_periods', 2.)
+
+    @settling_periods.setter
+    def settling_periods(self, settling_periods:float):
+        if not isinstance(settling_periods, (int, float)) or settling_periods < 0:
+            raise ValueError(f'"settling_periods" should be non negative number, not "{settling_periods}"')
+        self._settling_periods = float(settling_periods)
+
+    @property
+    def use_catalog(self) -> bool:
+        return getattr(self, '_use_catalog', False)
+
+    @use_catalog.setter
+    def use_catalog(self, use_catalog:bool):
+        if not isinstance(use_catalog, bool):
+            raise ValueError(f'"use_catalog" should be bool, not "{use_catalog}"')
+        self._use_catalog = use_catalog
+
+    @property
+    def journal_compaction(self) -> int:
+        return getattr(self, '_journal_compaction', 100)
+
+    @journal_compaction.setter
+    def journal_compaction(self, count:int):
+        if not isinstance(count, int) or count <= 0:
+            raise ValueError(f'"journal_compaction" should be positive integer, not "{count}"')
+        self._journal_compaction = count
+
+    @property
+    def catalog(self) -> Union[Catalog, None]:
+        """
+        return index of experiments in results folder, None if experiment does not use it
+        """
+        if not self.use_catalog:
+            return None
+        if self.__catalog is None:
+            self.__catalog = Catalog(self.__working_dir)
+        return self.__catalog
+
     @property
     def date(self) -> datetime.datetime:
         return datetime.datetime.fromtimestamp(self._date).strftime(date_format)
@@ -323,7 +504,9 @@ class Experiment():
 
     @frequencies.setter
     def frequencies(self, frequencies:Iterable):
-        self._frequencies = self._parse_frequencies(frequencies)
+        frequencies = self._parse_frequencies(frequencies)
+        self._check_excitation(self.excitation, frequencies, self.sampling_rate, self.sampling_time)
+        self._frequencies = frequencies
 
     @classmethod
     def _parse_frequencies(cls, frequencies: Iterable[Union[int, float]]):
@@ -380,59 +563,188 @@ class Experiment():
     @property
     def folder_path(self) -> Path:
         return self.save_path.with_suffix('')
-      
+
+    @property
+    def data_path(self) -> Path:
+        return self.save_path.with_suffix(ChunkedFile.SUFFIX)
+
+    @property
+    def journal_path(self) -> Path:
+        return self.save_path.with_suffix('.journal')
+
+    @property
+    def store(self) -> Union[ChunkedFile, None]:
+        """
+        return opened chunked file with signals, None if experiment uses pickle storage
+        """
+        if self.storage != 'chunked':
+            return None
+        if self.__store is None or self.__store.closed:
+            mode = 'r+' if self.device else 'r'
+            self.__store = ChunkedFile(self.__working_dir / self.data_path.name, mode=mode,
+                                       mmap=self.__mmap)
+        return self.__store
+
+    def close(self) -> None:
+        """
+        close chunked file with signals and index of experiments
+        """
+        if self.__store is not None:
+            self.__store.close()
+        if self.__catalog is not None:
+            self.__catalog.close()
+            self.__catalog = None
+
     def start(self, save=True) -> None:
 
         if not self.device:
             raise Exception('Can\'t run loaded "Experiment"')
 
-        done = False
-        finished = False
+        tries_done = len(self._measurements)
+        done = finished = bool(self.tries) and tries_done >= self.tries
     
-        progress = tqdm(total=self.tries, unit=' measurement')
-        for i in itertools.count():
+        progress = tqdm(total=self.tries, initial=tries_done, unit=' measurement')
+        writer = self._make_writer()
+        try:
+            for i in itertools.count(tries_done):
 
-            if not done:
-                try:
-                    progress.desc = 'taking measurement'
-                    progress.refresh()
-                    measurement = Measurement(self)
-                    measurement.make_measurement(self.device, progress=progress)
-                    measurement_save_path = measurement.save(overwrite=True)
-                    self._measurements.append(measurement_save_path.name)
-                    if save:
-                        self.save(overwrite=True)
-                    progress.update()
-                    progress.refresh()
-                    
-                    if self.tries and self.tries == i + 1:
-                        done = True
-                        finished = True
-                        progress.desc = 'done'
-                        progress.refresh()
-                except KeyboardInterrupt:
-                    wanring = f'Przerwano pomiar numer {i + 1}, pomiar niezapisany'
-                    warnings.warn(wanring)
-                    done = True
-                
                 if not done:
+                    measurement = None
                     try:
-                        sleep_time_left = self.delay
-                        while sleep_time_left:
-                            progress.desc = f'wating {sleep_time_left}s'
+                        progress.desc = 'taking measurement'
+                        progress.refresh()
+                        measurement = Measurement(self)
+                        # listed before measuring, so interrupted measurement can be resumed
+                        self._measurements.append(measurement.entry)
+                        if save:
+                            self._append_journal(measurement.entry)
+                        self._measure(measurement, progress=progress, writer=writer, save=save)
+                        progress.update()
+                        progress.refresh()
+                    
+                        if self.tries and self.tries == i + 1:
+                            done = True
+                            finished = True
+                            progress.desc = 'done'
                             progress.refresh()
-                            time.sleep(1)
-                            sleep_time_left -= 1
                     except KeyboardInterrupt:
-                        wanring = f'Zakończono na pomiarze numer {i + 1}'
+                        wanring = f'Przerwano pomiar numer {i + 1}, pomiar niezapisany'
+                        if measurement is not None and measurement.entry in self._measurements[-1:]:
+                            wanring = f'Przerwano pomiar numer {i + 1}, zapisano {len(measurement)} '\
+                                      f'z {len(measurement.frequencies)} częstotliwości'
                         warnings.warn(wanring)
                         done = True
-            else:
-                break
+                
+                    if not done:
+                        try:
+                            self._wait(self.delay, progress)
+                        except KeyboardInterrupt:
+                            wanring = f'Zakończono na pomiarze numer {i + 1}'
+                            warnings.warn(wanring)
+                            done = True
+                else:
+                    break
+        except BaseException:
+            if writer is not None:
+                # error of the measurement is more important than error of saving its containers
+                writer.close(raise_error=False)
+            raise
+        if writer is not None:
+            writer.close()
 
         progress.close()
+        self.durability_policy.commit('experiment')
         return self.save_path.absolute(), finished
 
+    def _measure(self, measurement:Measurement, *, progress, writer, save) -> None:
+        """
+        :param measurement: last measurement of the experiment
+        :param progress: information about progress of experiment
+        :param writer: `BackgroundWriter` saving containers, None if they are saved synchronously
+        :param save: if save experiment
+        measure missing frequencies of the measurement, on interruption save measured part
+        """
+        try:
+            measurement.make_measurement(self.device, progress=progress, writer=writer)
+        except KeyboardInterrupt:
+            if writer is not None:
+                writer.flush()
+            measurement.save(overwrite=True)
+            raise
+        if save and not len(self._measurements) % self.journal_compaction:
+            self.save(overwrite=True)
+        self.durability_policy.commit('measurement')
+
+    @staticmethod
+    def _wait(seconds:float, progress) -> None:
+        """
+        :param seconds: time to wait
+        :param progress: information about progress of experiment
+        wait showing time left
+        """
+        sleep_time_left = math.ceil(seconds)
+        while sleep_time_left > 0:
+            progress.desc = f'wating {sleep_time_left}s'
+            progress.refresh()
+            time.sleep(1)
+            sleep_time_left -= 1
+
+    @staticmethod
+    def resume(path:str, device, *, partial:str='finish', save=True) -> None:
+        """
+        :param path: path to the pickle file of interrupted experiment
+        :param device: object with device class
+        :param partial: "finish" to measure missing frequencies of interrupted measurement,
+                        "discard" to remove it from the experiment
+        :param save: if save experiment after every measurement
+        continue interrupted experiment, return the same as `start`
+        """
+        if partial not in ('finish', 'discard'):
+            raise ValueError(f'"partial" should be "finish" or "discard", not "{partial}"')
+
+        experiment = Experiment.load(path)
+        experiment._device = device
+        device.set_scope(frequency=experiment.sampling_rate, scope_range=experiment.scope_range,
+                         record_time=experiment.sampling_time)
+
+        with experiment:
+            # only the last measurement can be interrupted
+            measurement = experiment[-1] if experiment else None
+            if measurement is not None and not measurement:
+                if partial == 'discard':
+                    experiment._measurements.pop()
+                    experiment.save(overwrite=True)
+                    measurement = experiment[-1] if experiment else None
+                else:
+                    measurement.reattach(experiment)
+                    progress = tqdm(total=len(measurement.frequencies), initial=len(measurement),
+                                    unit=' frequency')
+                    writer = experiment._make_writer()
+                    try:
+                        experiment._measure(measurement, progress=progress, writer=writer, save=save)
+                    except KeyboardInterrupt:
+                        warnings.warn(f'Przerwano pomiar numer {len(experiment)}, zapisano {len(measurement)} '
+                                      f'z {len(measurement.frequencies)} częstotliwości')
+                        return experiment.save_path.absolute(), False
+                    finally:
+                        if writer is not None:
+                            writer.close()
+                        progress.close()
+
+            if measurement is not None and not (experiment.tries and len(experiment) >= experiment.tries):
+                # keep delay between the last and the next measurement
+                finish_date = measurement.finish_date or measurement._date
+                progress = tqdm(total=1, unit=' measurement')
+                try:
+                    experiment._wait(experiment.delay - (time.time() - finish_date), progress)
+                except KeyboardInterrupt:
+                    warnings.warn(f'Zakończono na pomiarze numer {len(experiment)}')
+                    return experiment.save_path.absolute(), False
+                finally:
+                    progress.close()
+
+            return experiment.start(save=save)
+
     def save(self, overwrite=False) -> None:
         """
         save data to pickle file with exp extension
@@ -442,24 +754,106 @@ class Experiment():
             if not overwrite:
                 raise OSError(f'File "{self.save_path} already exists')
 
-        if self.folder_path.exists() and self.folder_path.is_dir():
-            if not overwrite:
-                raise OSError(f'Folder "{self.folder_path} already exists')
-        self.folder_path.mkdir(exist_ok=overwrite)
-
-        with open(self.save_path, "wb") as file:
+        if self.storage == 'chunked':
+            self._create_store(overwrite)
+        else:
+            if self.folder_path.exists() and self.folder_path.is_dir():
+                if not overwrite:
+                    raise OSError(f'Folder "{self.folder_path} already exists')
+            self.folder_path.mkdir(exist_ok=overwrite)
+
+        # whole state is written to temporary file, so crash never leaves broken exp file
+        temporary_path = self.save_path.with_suffix('.exp.tmp')
+        with open(temporary_path, "wb") as file:
             device = self.device
             self._device = None
             object_data = copy.copy(self.__dict__)
+            object_data.pop('_Experiment__store', None)
+            object_data.pop('_Experiment__mmap', None)
+            object_data.pop('_Experiment__catalog', None)
             pickle.dump(object_data, file)
             self._device = device
-        os.sync()
+            self.durability_policy.written(file)
+        os.replace(temporary_path, self.save_path)
+        # saved file contains all measurements from the journal
+        journal_path = self.__working_dir / self.journal_path.name
+        if journal_path.exists():
+            journal_path.unlink()
+        if self.catalog is not None:
+            self.catalog.add_experiment(self)
         return self.save_path
 
+    def _append_journal(self, entry:Union[str, int]) -> None:
+        """
+        :param entry: entry of finished measurement
+        append record of the measurement to the journal instead of saving whole experiment
+        """
+        record = {'position': len(self._measurements) - 1, 'entry': entry}
+        journal_path = self.__working_dir / self.journal_path.name
+        self._truncate_torn_record(journal_path)
+        with open(journal_path, 'a') as file:
+            file.write(json.dumps(record) + '\n')
+            self.durability_policy.written(file)
+
+    @staticmethod
+    def _truncate_torn_record(journal_path:Path) -> None:
+        """
+        :param journal_path: path to the journal
+        remove the last record if crash tore it, so the next record is not appended to its line
+        """
+        if not journal_path.exists():
+            return
+        with open(journal_path, 'rb+') as file:
+            if not file.seek(0, os.SEEK_END):
+                return
+            file.seek(-1, os.SEEK_END)
+            if file.read(1) == b'\n':
+                return
+            file.seek(0)
+            file.truncate(file.read().rfind(b'\n') + 1)
+
+    def _replay_journal(self) -> None:
+        """
+        add measurements recorded in the journal after the experiment was saved
+        """
+        journal_path = self.__working_dir / self.journal_path.name
+        if not journal_path.exists():
+            return
+        with open(journal_path) as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # record torn by crash during writing
+                    break
+                if record['position'] == len(self._measurements):
+                    self._measurements.append(record['entry'])
+
+    def _create_store(self, overwrite:bool) -> None:
+        """
+        :param overwrite: if existing chunked file can be reused
+        create chunked file with signals if it does not exist yet
+        """
+        data_path = self.__working_dir / self.data_path.name
+        if data_path.exists():
+            if not overwrite:
+                raise OSError(f'File "{data_path} already exists')
+            return
+        metadata = {
+            'uuid': self.uuid,
+            'date': self._date,
+            'sampling_rate': self.sampling_rate,
+            'sampling_time': self.sampling_time,
+        }
+        self.__store = ChunkedFile.create(data_path, frequencies=self.frequencies,
+                                          n_samples=int(self.sampling_rate * self.sampling_time),
+                                          dtype=self.sample_format, metadata=metadata)
+
     @staticmethod
-    def load(path:str) -> 'Experiment':
+    def load(path:str, *, mmap:bool=False) -> 'Experiment':
         """
         :param path: path to the pickle file
+        :param mmap: if signals of chunked storage should stay on disk behind memory map
         load pickle file with exp extension
         """
 
@@ -473,5 +867,9 @@ class Experiment():
             new_data = pickle.load(file)
             new.__dict__ = new_data
             new.__working_dir = path.parent
+            new.__store = None
+            new.__mmap = mmap
+            new.__catalog = None
+        new._replay_journal()
 
         return new
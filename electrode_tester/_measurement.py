@@ -1,10 +1,11 @@
 import copy
 import datetime
-import os
 import time
 import uuid
 import pickle
 import decimal
+import os
+import weakref
 
 from pathlib import Path
 from typing import Tuple, Union, Iterable, List
@@ -14,6 +15,10 @@ import numpy as np
 
 from ._signal_container import SignalContainer
 from .common import date_format
+from .storage import Durability
+from ._cache import cached_load, get_load_cache
+from ._basis import cached_time_vector
+from ._excitation import multisine, split_multisine, sequence, split_sequence, chirp
 
 
 @total_ordering
@@ -22,17 +27,29 @@ class Measurement():
     def __init__(self, parent):
     
         self.__loaded = False
+        self.__store = getattr(parent, 'store', None)
+        self.__durability = getattr(parent, 'durability_policy', None) or Durability()
+        # experiment whose catalog is updated on save, not saved with the measurement
+        self.__parent = weakref.ref(parent)
+        self._store_index = None
 
         self._uuid = str(uuid.uuid4())
         self._date = time.time()
         self._measurements_data = []
+        self._finish_date = None
 
         self.frequencies = copy.deepcopy(parent.frequencies)
         self.resistances = copy.deepcopy(parent.resistances)
         self.voltage = copy.copy(parent.voltage)
         self.sampling_rate = copy.copy(parent.sampling_rate)
         self.sampling_time = copy.copy(parent.sampling_time)
+        self._sample_format = getattr(parent, 'sample_format', 'float64')
+        self._excitation = getattr(parent, 'excitation', 'stepped')
+        self._settling_periods = getattr(parent, 'settling_periods', 2.)
+        self._scope_range = getattr(parent, 'scope_range', 2.)
         self.parent_folder_path = parent.folder_path
+        if self.__store is not None:
+            self._store_index = self.__store.append_try()
         self.save(overwrite=True)
         self.__working_dir = Path('')
 
@@ -41,13 +58,25 @@ class Measurement():
         return iterator object
         """
         self.__iter_data = iter(self._measurements_data)
+        self.__iter_block = None
+        if self.__store is not None and self._measurements_data and get_load_cache() is None:
+            # one read for all containers of the try
+            self.__iter_block = self.__store.read_try(self._store_index, raw=True)
+            self.__iter_scales = self.__store.read_scales(self._store_index)
         return self
 
     def __next__(self) -> SignalContainer:
         """
         return next item of the data
         """
-        return SignalContainer.load(self.__working_dir / self.folder_path.name / next(self.__iter_data))
+        entry = next(self.__iter_data)
+        if self.__iter_block is not None:
+            scales, offsets = self.__iter_scales
+            if scales is None:
+                return SignalContainer(self.__iter_block[entry], frequency=self.frequencies[entry])
+            return SignalContainer(self.__iter_block[entry], frequency=self.frequencies[entry],
+                                   scale=scales[entry], offset=offsets[entry])
+        return self._load_container(entry)
 
 
     def __getitem__(self, index) -> List[SignalContainer]:
@@ -57,9 +86,9 @@ class Measurement():
         """
         try:
             containers = self._measurements_data[index]
-            if isinstance(containers, str):
-                return SignalContainer.load(self.__working_dir / self.folder_path.name / containers)
-            return [SignalContainer.load(self.__working_dir / self.folder_path.name / path) for path in containers]
+            if isinstance(index, slice):
+                return [self._load_container(entry) for entry in containers]
+            return self._load_container(containers)
         except IndexError:
             raise IndexError('"index" must be between 0 and length of frequencies')
 
@@ -71,7 +100,56 @@ class Measurement():
         if frequency not in self.frequencies:
             raise ValueError('A given frequency does not exist in this object')
         index = self.frequencies.index(frequency)
-        return SignalContainer.load(self.__working_dir / self.folder_path.name / self._measurements_data[index])
+        return self._load_container(self._measurements_data[index])
+
+    def _load_container(self, entry:Union[str, int]) -> SignalContainer:
+        """
+        :param entry: file name of the container or index of the frequency in chunked file
+        load container of the measurement
+        """
+        if self.__store is not None:
+            def load():
+                data = self.__store.read_container(self._store_index, entry, raw=True)
+                scale, offset = self.__store.read_scale(self._store_index, entry)
+                return SignalContainer(data, frequency=self.frequencies[entry], scale=scale, offset=offset)
+            key = ('container', self.__store.path, self._store_index, entry)
+            return cached_load(key, self.__store.path, load)
+        return SignalContainer.load(self.__working_dir / self.folder_path.name / entry)
+
+    def _containers_identity(self) -> list:
+        """
+        return description of saved containers, which changes when they are written again
+        """
+        if self.__store is not None:
+            return [self.__store.name, self._store_index, list(self._measurements_data)]
+        folder = self.__working_dir / self.folder_path.name
+        identity = []
+        for entry in self._measurements_data:
+            stat = os.stat(folder / entry)
+            identity.append([entry, stat.st_size, stat.st_mtime_ns])
+        return identity
+
+    def _container_entry(self, index:int) -> Union[str, int]:
+        """
+        :param index: index of the frequency
+        return entry under which container for the frequency is saved
+        """
+        if self.__store is not None:
+            return index
+        return f'{index}_container.cont'
+
+    def _save_container(self, entry:Union[str, int], container:SignalContainer) -> None:
+        """
+        :param entry: entry returned by `_container_entry`
+        :param container: container with signals for the frequency
+        save container
+        """
+        if self.__store is not None:
+            self.__store.write_container(self._store_index, entry, container.data)
+            self.__durability.written(self.__store)
+            return
+        container = container.encode(self._sample_format)
+        container.save(self.folder_path / entry, durability=self.__durability)
 
     def __repr__(self) -> str:
         """
@@ -120,8 +198,11 @@ class Measurement():
 
     def __bool__(self) -> bool:
         """
-        check if length of data matrix is equal number of frequencies
+        check if length of data matrix is equal number of frequencies,
+        chirp measurement has one container with the whole sweep
         """
+        if self.excitation == 'chirp':
+            return len(self._measurements_data) == 1
         return len(self._measurements_data) == len(self.frequencies)
 
     def __length_hint__(self) -> int:
@@ -276,15 +357,26 @@ class Measurement():
         """
         return datetime.datetime.fromtimestamp(self._date).strftime(date_format)
 
+    @property
+    def finish_date(self) -> Union[float, None]:
+        """
+        return timestamp of the end of the measurement, None if it is not finished
+        """
+        return getattr(self, '_finish_date', None)
+
+    @property
+    def excitation(self) -> str:
+        """
+        return how frequencies were excited, "stepped", "multisine", "sequence" or "chirp"
+        """
+        return getattr(self, '_excitation', 'stepped')
+
     @property
     def time_vector(self) -> np.ndarray:
         """
         return vector with time samples 
         """
-        return np.linspace(0,
-                           self.sampling_time,
-                           int(self.sampling_rate * self.sampling_time),
-                           endpoint=True)
+        return cached_time_vector(self.sampling_rate, self.sampling_time)
 
     @property
     def parent_folder_path(self) -> Path:
@@ -304,11 +396,26 @@ class Measurement():
     @property
     def folder_path(self) -> Path:
         return self.save_path.with_suffix('')
+
+    @property
+    def entry(self) -> Union[str, int]:
+        """
+        return entry under which parent experiment loads this measurement
+        """
+        if self.__store is not None:
+            return self._store_index
+        return self.save_path.name
     
     def save(self, overwrite=False) -> None:
         """
-        saves data to file with mes extension
+        saves data to file with mes extension or to header of the try in chunked file
         """
+        if self.__store is not None:
+            self.__store.write_header(self._store_index, self._to_header())
+            self.__durability.written(self.__store)
+            self._update_catalog()
+            return self.__store.path
+
         if self.save_path.exists() and self.save_path.is_file():
             if not overwrite:
                 raise IOError(f'File "{self.save_path}" already exists')
@@ -319,12 +426,27 @@ class Measurement():
         self.folder_path.mkdir(exist_ok=overwrite)
 
         with open(self.save_path, "wb") as file:
-            object_data = self.__dict__
+            object_data = copy.copy(self.__dict__)
             object_data['parent'] = ''
+            object_data.pop('_Measurement__durability', None)
+            object_data.pop('_Measurement__parent', None)
             pickle.dump(object_data, file)
-        os.sync()
+            self.__durability.written(file)
+        self._update_catalog()
         return self.save_path
 
+    def _update_catalog(self) -> None:
+        """
+        update row of the measurement in catalog of its experiment, if the experiment uses catalog
+        """
+        parent_reference = getattr(self, '_Measurement__parent', None)
+        parent = parent_reference() if parent_reference is not None else None
+        catalog = getattr(parent, 'catalog', None)
+        # measurement is listed in the experiment after it is created
+        if catalog is None or self.entry not in parent._measurements:
+            return
+        catalog.add_measurement(parent, self, parent._measurements.index(self.entry))
+
     @staticmethod
     def load(path:Union[str, Path], working_dir:Union[str, Path]='') -> 'Measurement':
         """
@@ -336,35 +458,194 @@ class Measurement():
        
         if not path.suffix == '.mes':
             raise ValueError('Wrong file extension! Load "mes" file.')
-        with open(path, "rb") as file:
+
+        def load():
+            with open(path, "rb") as file:
+                new = Measurement.__new__(Measurement)
+                new_data = pickle.load(file)
+                new.__dict__ = new_data
+                new.__loaded = True
+                new.__working_dir = Path(working_dir)
+                new.__store = None
+                new.__durability = Durability()
+            return new
+
+        return cached_load(('measurement', path.absolute(), Path(working_dir)), path, load)
+
+    def _to_header(self) -> dict:
+        """
+        return JSON serializable metadata of the measurement
+        """
+        return {
+            'uuid': self._uuid,
+            'date': self._date,
+            'frequencies': list(self._frequencies),
+            'resistances': [str(r) for r in self._resistances],
+            'voltage': self._voltage,
+            'sampling_rate': self._sampling_rate,
+            'sampling_time': self._sampling_time,
+            'measurements_data': list(self._measurements_data),
+            'finish_date': self.finish_date,
+            'excitation': self.excitation,
+            'settling_periods': getattr(self, '_settling_periods', 2.),
+        }
+
+    @staticmethod
+    def load_from_store(store, index:int) -> 'Measurement':
+        """
+        :param store: opened chunked file of the experiment
+        :param index: index of the try in the file
+        load measurement from header of the try in chunked file
+        """
+        def load():
+            header = store.read_header(index)
+
             new = Measurement.__new__(Measurement)
-            new_data = pickle.load(file)
-            new.__dict__ = new_data
+            new._uuid = header['uuid']
+            new._date = header['date']
+            new._measurements_data = list(header['measurements_data'])
+            new._finish_date = header.get('finish_date')
+            # headers written before excitations were added are stepped
+            new._excitation = header.get('excitation', 'stepped')
+            new._settling_periods = header.get('settling_periods', 2.)
+            new.frequencies = header['frequencies']
+            new.resistances = tuple(decimal.Decimal(r) for r in header['resistances'])
+            new.voltage = header['voltage']
+            new.sampling_rate = header['sampling_rate']
+            new.sampling_time = header['sampling_time']
+            new.parent_folder_path = store.path.with_suffix('')
+            new._store_index = index
+            new.__durability = Durability()
             new.__loaded = True
-            new.__working_dir = Path(working_dir)
+            new.__working_dir = Path('')
+            return new
 
+        new = cached_load(('measurement', store.path, index), store.path, load)
+        # cached measurement may come from file opened earlier
+        new.__store = store
         return new
 
-    def make_measurement(self, device, *, progress=None, save=True) -> None:
+    def make_measurement(self, device, *, progress=None, save=True, writer=None) -> None:
         """
         :param device: object with device class
         :param progress: information about progress of experiment
         :param save: if save measurement file
+        :param writer: `BackgroundWriter` saving containers while next frequency is measured
         make measurement for every given frequency
         """
         if self.__loaded:
             raise Exception('Can\'t use it on loaded "measurement"')
+        # frequencies measured before interruption are kept
+        measured = len(self._measurements_data)
+        if self.excitation == 'multisine':
+            signals = self._measure_multisine(device, self.frequencies[measured:], progress=progress)
+        elif self.excitation == 'sequence':
+            signals = self._measure_sequence(device, self.frequencies[measured:], progress=progress)
+        elif self.excitation == 'chirp':
+            # whole sweep is saved as container of the first frequency
+            signals = [] if measured else self._measure_chirp(device, progress=progress)
+        else:
+            signals = self._measure_stepped(device, self.frequencies[measured:], progress=progress)
+        for i, (frequency, measurement_data) in enumerate(zip(self.frequencies[measured:], signals), measured):
+            container = SignalContainer(measurement_data, frequency=frequency)
+            entry = self._container_entry(i)
+            if writer is not None:
+                writer.submit(self._save_container, entry, container)
+            else:
+                self._save_container(entry, container)
+            self._measurements_data.append(entry)
+        if writer is not None:
+            writer.flush()
+        self._finish_date = time.time()
+        if save:
+            self.save(overwrite=True)
+
+    def _measure_stepped(self, device, frequencies, *, progress=None) -> Iterable[np.ndarray]:
+        """
+        :param device: object with device class
+        :param frequencies: frequencies to measure
+        :param progress: information about progress of experiment
+        yield signals of every frequency, generator is set to one frequency at a time
+        """
         total = len(self.frequencies)
-        for i, frequency in enumerate(self.frequencies):
+        offset = total - len(frequencies)
+        for i, frequency in enumerate(frequencies, offset):
             if progress is not None:
                 progress.desc = f'{i+1}/{total} freq={frequency}Hz'
                 progress.refresh()
             device.set_generator(frequency=frequency, amplitude=self.voltage)
             measurement_data = device.get_data()
-            measurement_data = measurement_data[:3]
-            container = SignalContainer(measurement_data, frequency=frequency)
-            container_path = self.folder_path / f'{i}_container.cont'
-            container_path = container.save(container_path)
-            self._measurements_data.append(container_path.name)
-        if save:
-            self.save(overwrite=True)
+            yield measurement_data[:3]
+
+    def _measure_multisine(self, device, frequencies, *, progress=None) -> List[np.ndarray]:
+        """
+        :param device: object with device class
+        :param frequencies: frequencies to measure
+        :param progress: information about progress of experiment
+        return signals of every frequency separated from one capture of sum of all frequencies
+        """
+        if progress is not None:
+            progress.desc = f'multisine {len(frequencies)} freq'
+            progress.refresh()
+        waveform = multisine(frequencies, self.sampling_rate, self.sampling_time)
+        # the waveform is repeated once per capture
+        device.set_generator(frequency=1 / self.sampling_time, amplitude=self.voltage,
+                             signal_type='arbitrary', waveform=waveform)
+        measurement_data = device.get_data()
+        return split_multisine(measurement_data[:3], frequencies, self.sampling_rate)
+
+    def _measure_sequence(self, device, frequencies, *, progress=None) -> List[np.ndarray]:
+        """
+        :param device: object with device class
+        :param frequencies: frequencies to measure
+        :param progress: information about progress of experiment
+        return signals of every frequency cut from one capture of all frequencies played one after another,
+        settling periods at the beginning of every frequency are skipped
+        """
+        if progress is not None:
+            progress.desc = f'sequence {len(frequencies)} freq'
+            progress.refresh()
+        waveform, starts = sequence(frequencies, self.sampling_rate, self.sampling_time,
+                                    getattr(self, '_settling_periods', 2.))
+        duration = len(waveform) / self.sampling_rate
+        scope_range = getattr(self, '_scope_range', 2.)
+        # one extra sample, so rounding of record length can't cut the last frequency
+        device.set_scope(frequency=self.sampling_rate, scope_range=scope_range,
+                         record_time=(len(waveform) + 1) / self.sampling_rate)
+        try:
+            device.set_generator(frequency=1 / duration, amplitude=self.voltage,
+                                 signal_type='arbitrary', waveform=waveform)
+            measurement_data = device.get_data()
+        finally:
+            device.set_scope(frequency=self.sampling_rate, scope_range=scope_range,
+                             record_time=self.sampling_time)
+        n_samples = int(self.sampling_rate * self.sampling_time)
+        # the capture starts at trigger, not with the waveform, it is aligned by the known waveform
+        return split_sequence(np.asarray(measurement_data)[:3], starts, n_samples, waveform)
+
+    def _measure_chirp(self, device, *, progress=None) -> List[np.ndarray]:
+        """
+        :param device: object with device class
+        :param progress: information about progress of experiment
+        return signals of one capture of sweep through all frequencies
+        """
+        if progress is not None:
+            progress.desc = f'chirp {min(self.frequencies)}-{max(self.frequencies)}Hz'
+            progress.refresh()
+        waveform = chirp(self.frequencies, self.sampling_rate, self.sampling_time)
+        # the sweep is repeated once per capture
+        device.set_generator(frequency=1 / self.sampling_time, amplitude=self.voltage,
+                             signal_type='arbitrary', waveform=waveform)
+        measurement_data = device.get_data()
+        return [measurement_data[:3]]
+
+    def reattach(self, parent) -> None:
+        """
+        :param parent: loaded experiment with device attached again
+        allow loaded partial measurement to measure missing frequencies
+        """
+        self.__loaded = False
+        self.__store = getattr(parent, 'store', None)
+        self.__durability = parent.durability_policy
+        self.__parent = weakref.ref(parent)
+        self._sample_format = parent.sample_format
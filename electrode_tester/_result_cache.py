@@ -0,0 +1,164 @@
+import hashlib
+import json
+import os
+
+from collections import namedtuple
+from pathlib import Path
+from typing import Union, Dict, Tuple
+
+import numpy as np
+
+from .estimators import BaseEstimator, Params
+
+ResultCacheStats = namedtuple('ResultCacheStats', ['hits', 'misses', 'evictions', 'size', 'entries'])
+
+
+class ResultCache:
+    '''
+    Folder with results of fits of analysed measurements.
+
+    Fits of v1 and v2 of every frequency are saved in npz file named by hash
+    of measurement uuid, identity of files with its containers, estimator
+    (class, `version` and `config`) and estimator parameters, so results are
+    reused only for the same data analysed the same way. When files take more
+    than `max_bytes`, least recently used ones are removed. Many processes can
+    use the same folder.
+    '''
+
+    SUFFIX = '.npz'
+
+    def __init__(self, path:Union[str, Path], *, max_bytes:int=256 * 2**20):
+        '''
+        :param path: folder for cached results, created if it does not exist
+        :param max_bytes: maximal size of cached results in bytes
+        '''
+        if not isinstance(max_bytes, int) or max_bytes <= 0:
+            raise ValueError(f'"max_bytes" should be positive integer, not "{max_bytes}"')
+        self._path = Path(path)
+        self._path.mkdir(parents=True, exist_ok=True)
+        self._max_bytes = max_bytes
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __repr__(self) -> str:
+        return f'ResultCache("{self._path}", max_bytes={self._max_bytes})'
+
+    def __len__(self) -> int:
+        return len(self._files())
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @property
+    def stats(self) -> ResultCacheStats:
+        '''
+        return hits, misses and evictions of this object with current size of the folder
+        '''
+        files = self._files()
+        return ResultCacheStats(self._hits, self._misses, self._evictions,
+                                sum(stat.st_size for _, stat in files), len(files))
+
+    @staticmethod
+    def key(measurement, estimator:BaseEstimator, estimator_params:Dict) -> str:
+        '''
+        :param measurement: analysed measurement
+        :param estimator: estimator fitting signals
+        :param estimator_params: parameters passed to the estimator
+        return hash identifying results of the analysis
+        '''
+        identity = {
+            'uuid': measurement.uuid,
+            'containers': measurement._containers_identity(),
+            'estimator': f'{type(estimator).__module__}.{type(estimator).__qualname__}',
+            'version': estimator.version,
+            'config': estimator.config(),
+            'params': estimator_params or {},
+        }
+        raw = json.dumps(identity, sort_keys=True, default=repr)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, key:str) -> Union[Tuple[Params, Params], None]:
+        '''
+        :param key: hash returned by `key`
+        return fits of v1 and v2, None if results are not cached
+        '''
+        path = self._path / (key + self.SUFFIX)
+        try:
+            with np.load(path) as data:
+                fits = tuple(self._params(data, channel) for channel in ('v1', 'v2'))
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            self._misses += 1
+            return None
+        self._hits += 1
+        return fits
+
+    def put(self, key:str, fits:Tuple[Params, Params]) -> None:
+        '''
+        :param key: hash returned by `key`
+        :param fits: fits of v1 and v2 returned by `BaseEstimator.estimate_batch`
+        save results and remove least recently used ones if cache is too big
+        '''
+        arrays = {}
+        for channel, params in zip(('v1', 'v2'), fits):
+            for name, value in params._asdict().items():
+                if name != 'function' and value is not None:
+                    arrays[f'{channel}_{name}'] = np.asarray(value, dtype=float)
+
+        path = self._path / (key + self.SUFFIX)
+        temporary_path = self._path / f'.{key}.{os.getpid()}.tmp'
+        with open(temporary_path, 'wb') as file:
+            np.savez(file, **arrays)
+        os.replace(temporary_path, path)
+        self._evict()
+
+    def clear(self) -> None:
+        '''
+        remove all cached results
+        '''
+        for path, _ in self._files():
+            self._remove(path)
+
+    def _files(self) -> list:
+        files = []
+        for entry in os.scandir(self._path):
+            if entry.name.endswith(self.SUFFIX):
+                try:
+                    files.append((Path(entry.path), entry.stat()))
+                except FileNotFoundError:
+                    pass
+        return files
+
+    def _evict(self) -> None:
+        files = self._files()
+        size = sum(stat.st_size for _, stat in files)
+        if size <= self._max_bytes:
+            return
+        for path, stat in sorted(files, key=lambda file: file[1].st_mtime_ns):
+            if size <= self._max_bytes:
+                break
+            self._remove(path)
+            size -= stat.st_size
+            self._evictions += 1
+
+    @staticmethod
+    def _remove(path:Path) -> None:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            # removed by other process
+            pass
+
+    @staticmethod
+    def _params(data, channel:str) -> Params:
+        fields = {}
+        for name in Params._fields:
+            key = f'{channel}_{name}'
+            fields[name] = data[key] if key in data.files else None
+        return Params(**fields)
@@ -1,17 +1,30 @@
-import os
 import pickle
 import warnings
 
 from typing import Union
 from pathlib import Path
+from functools import cached_property
 
 import numpy as np
 
-class SignalContainer:
+from .storage import Durability, encode as encode_samples, decode as decode_samples
+from ._cache import cached_load
 
-    def __init__(self, data, *, frequency):
+class SignalContainer:
+    _scale = None
+    _offset = None
+
+    def __init__(self, data, *, frequency, scale=None, offset=None):
+        '''
+        :param data: 3 by n array of samples or integer codes
+        :param frequency: frequency of the signal
+        :param scale: per channel scale of integer codes
+        :param offset: per channel offset of integer codes
+        '''
         self._data = self._parse_data(data)
         self._frequency = self._parse_frequency(frequency)
+        if scale is not None:
+            self._scale, self._offset = self._parse_scale(scale, offset)
 
     def __iter__(self):
         """
@@ -42,9 +55,43 @@ class SignalContainer:
     @property
     def data(self):
         """
-        make copy of the data
+        return read only view of the data, integer codes are decoded on first access
+        """
+        return self._readonly(self._samples)
+
+    @cached_property
+    def _samples(self):
+        """
+        return samples decoded to float64, saved samples if they are float64 already
         """
-        return self._data.copy()
+        return decode_samples(self._data, self._scale, self._offset)
+
+    @property
+    def sample_format(self) -> str:
+        """
+        get the type of saved samples
+        """
+        return self._data.dtype.name
+
+    def encode(self, sample_format:str) -> 'SignalContainer':
+        """
+        :param sample_format: one of `storage.SAMPLE_FORMATS`
+        return container with samples saved in `sample_format`
+        """
+        if sample_format == self.sample_format and self._scale is None:
+            return self
+        codes, scale, offset = encode_samples(self.data, sample_format)
+        return SignalContainer(codes, frequency=self.frequency, scale=scale, offset=offset)
+
+    @staticmethod
+    def _readonly(array):
+        """
+        :param array: array to protect
+        return view of the array which can't be modified
+        """
+        view = array.view()
+        view.flags.writeable = False
+        return view
 
     def _parse_data(self, data):
         """
@@ -64,6 +111,18 @@ class SignalContainer:
             warnings.warn(f'Truncating data to shape 3 by {data.shape[1]}')
         return data
 
+    def _parse_scale(self, scale, offset):
+        """
+        :param scale: per channel scale of integer codes
+        :param offset: per channel offset of integer codes
+        check shape of scale and offset
+        """
+        scale = np.asarray(scale, dtype=np.float64)
+        offset = np.zeros_like(scale) if offset is None else np.asarray(offset, dtype=np.float64)
+        if scale.shape != (3,) or offset.shape != (3,):
+            raise ValueError(f'scale and offset should be shape (3,), not {scale.shape}, {offset.shape}')
+        return scale, offset
+
     @property
     def frequency(self):
         """
@@ -97,48 +156,71 @@ class SignalContainer:
         """
         get data from channel 1
         """
-        return self._data[0]
+        return self._readonly(self._samples[0])
 
     @property
     def chan2(self):
         """
         get data from channel 2
         """
-        return self._data[1]
+        return self._readonly(self._samples[1])
 
     @property
     def chan3(self):
         """
         get data from channel 3
         """
-        return self._data[2]
+        return self._readonly(self._samples[2])
 
-    @property
+    @cached_property
     def v1(self):
         """
-        get the difference of channel 2 and channel 1
+        get the difference of channel 2 and channel 1, computed once
         """
-        return self.chan1 - self.chan2
+        return self._readonly(self.chan1 - self.chan2)
 
-    @property
+    @cached_property
     def v2(self):
         """
-        get the difference of channel 3 and channel 2
+        get the difference of channel 3 and channel 2, computed once
+        """
+        return self._readonly(self.chan2 - self.chan3)
+
+    def _prepare_cached(self) -> None:
+        """
+        compute differences between channels before `LoadCache` keeps the container,
+        so its copies share them
         """
-        return self.chan2 - self.chan3
+        self.v1, self.v2
 
-    def save(self, path, overwrite=False) -> None:
+    def __getstate__(self):
         """
-        saves data to file with mes extension
+        return state for pickling without cached differences
+        """
+        state = self.__dict__.copy()
+        state.pop('_samples', None)
+        state.pop('v1', None)
+        state.pop('v2', None)
+        # memory mapped samples are saved as regular array
+        state['_data'] = np.asarray(state['_data'])
+        return state
+
+    def save(self, path, overwrite=False, durability:Durability=None) -> None:
+        """
+        :param path: path to the file
+        :param overwrite: if overwrite existing file
+        :param durability: policy deciding when file is forced to disk, fsync file by default
+        saves data to file with cont extension
         """
         path = Path(path)
         if path.exists() and path.is_file():
             if not overwrite:
                 raise IOError(f'File "{path}" already exists')
 
+        durability = durability or Durability()
         with open(path, "wb") as file:
             pickle.dump(self, file)
-        os.sync()
+            durability.written(file)
         return path
 
     @staticmethod
@@ -150,6 +232,9 @@ class SignalContainer:
         path = Path(path)
         if not path.suffix == '.cont':
             raise ValueError('Wrong file extension! Load "cont" file.')
-        with open(path, "rb") as file:
-            container = pickle.load(file)
-        return container
\ No newline at end of file
+
+        def load():
+            with open(path, "rb") as file:
+                return pickle.load(file)
+
+        return cached_load(('container', path.absolute()), path, load)
\ No newline at end of file
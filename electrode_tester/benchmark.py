@@ -0,0 +1,174 @@
+"""
+Accuracy and speed of estimators measured on synthetic signals.
+
+Sines with random amplitude, phase and offset and white gaussian noise of
+given SNR are generated for every frequency, fitted by every estimator and
+compared with true parameters. Bias and standard deviation of errors of
+amplitude, phase and offset are reported together with mean standard
+deviation reported by the estimator, time of estimation and number of
+signals estimated per second, for every combination of sampling rate,
+signal duration and SNR.
+
+usage: python -m electrode_tester.benchmark [options]
+"""
+import argparse
+import json
+import sys
+
+from collections import namedtuple
+from itertools import product
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from .estimators import (BaseEstimator, FitFourier, FitHilbert, FitSinus, FitSinusThreeParam,
+                         FitSinusFourParam, FitLockIn)
+from .estimators._simulation import PARAMETERS, synthetic_signals, estimation_errors
+
+BenchmarkResult = namedtuple('BenchmarkResult', ['estimator', 'fs', 'T', 'snr', 'frequencies', 'signals',
+                                                 'seconds', 'throughput', 'bias', 'std', 'reported_error'])
+
+ESTIMATORS = {
+    'fourier': FitFourier,
+    'hilbert': FitHilbert,
+    'sinus': FitSinus,
+    'three-param': FitSinusThreeParam,
+    'four-param': FitSinusFourParam,
+    'lock-in': FitLockIn,
+}
+
+
+def benchmark(estimators:Dict[str, BaseEstimator], *, frequencies:Iterable[float], fs:Iterable[float],
+              T:Iterable[float], snr:Iterable[float], trials:int=100, batch_size:int=1000, seed:int=None,
+              progress=None) -> List[BenchmarkResult]:
+    '''
+    :param estimators: tested estimators by name
+    :param frequencies: frequencies of signals, frequencies not lower than half of sampling rate are skipped
+    :param fs: sampling rates in Hz
+    :param T: durations of signals in seconds
+    :param snr: signal to noise ratios in dB
+    :param trials: number of signals of every frequency
+    :param batch_size: maximal number of signals generated and estimated at once
+    :param seed: seed of random numbers, every estimator gets the same signals
+    :param progress: function called with every `BenchmarkResult` when it is ready
+    return results of every estimator for every combination of sampling rate, duration and SNR
+    '''
+    if not isinstance(trials, int) or trials <= 0:
+        raise ValueError(f'"trials" should be positive integer, not "{trials}"')
+    if not isinstance(batch_size, int) or batch_size <= 0:
+        raise ValueError(f'"batch_size" should be positive integer, not "{batch_size}"')
+
+    frequencies = np.asarray(list(frequencies), dtype=float)
+    results = []
+    for fs_value, T_value, snr_value in product(fs, T, snr):
+        used = frequencies[frequencies < fs_value / 2]
+        if not len(used):
+            raise ValueError(f'all frequencies are higher than half of sampling rate {fs_value}')
+        # batches contain all trials of some frequencies
+        per_batch = max(1, batch_size // trials)
+        errors = {name: {parameter: [] for parameter in PARAMETERS} for name in estimators}
+        reported = {name: {parameter: [] for parameter in PARAMETERS} for name in estimators}
+        seconds = dict.fromkeys(estimators, 0.)
+        rng = np.random.default_rng(seed)
+        for start in range(0, len(used), per_batch):
+            t, Y, truth = synthetic_signals(used[start:start + per_batch], fs_value, T_value, snr_value,
+                                            trials=trials, rng=rng)
+            for name, estimator in estimators.items():
+                batch_errors, batch_reported, batch_seconds = estimation_errors(estimator, t, Y, truth, fs_value)
+                seconds[name] += batch_seconds
+                for parameter in PARAMETERS:
+                    errors[name][parameter].append(batch_errors[parameter].reshape(-1, trials))
+                    reported[name][parameter].append(batch_reported[parameter].reshape(-1, trials))
+
+        for name in estimators:
+            result = _summarize(name, fs_value, T_value, snr_value, used, trials,
+                                seconds[name], errors[name], reported[name])
+            results.append(result)
+            if progress is not None:
+                progress(result)
+    return results
+
+
+def _summarize(name:str, fs:float, T:float, snr:float, frequencies:np.ndarray, trials:int, seconds:float,
+               errors:Dict, reported:Dict) -> BenchmarkResult:
+    '''
+    return result with bias and standard deviation of errors over all signals and of every frequency
+    '''
+    bias = {}
+    std = {}
+    reported_error = {}
+    for parameter in PARAMETERS:
+        parameter_errors = np.concatenate(errors[parameter])
+        bias[parameter] = {'all': float(np.mean(parameter_errors)),
+                           'frequency': np.mean(parameter_errors, axis=1).tolist()}
+        std[parameter] = {'all': float(np.std(parameter_errors)),
+                          'frequency': np.std(parameter_errors, axis=1).tolist()}
+        reported_error[parameter] = float(np.mean(np.concatenate(reported[parameter])))
+    signals = len(frequencies) * trials
+    return BenchmarkResult(name, float(fs), float(T), float(snr), frequencies.tolist(), signals,
+                           seconds, signals / seconds if seconds else float('inf'), bias, std, reported_error)
+
+
+def report(results:List[BenchmarkResult]) -> Dict:
+    '''
+    :param results: results returned by `benchmark`
+    return report which can be saved as JSON
+    '''
+    entries = []
+    for result in results:
+        entry = result._asdict()
+        # JSON has no infinity, signals without noise have no SNR
+        entry['snr'] = entry['snr'] if np.isfinite(entry['snr']) else None
+        entries.append(entry)
+    return {
+        'parameters': list(PARAMETERS),
+        'results': entries,
+    }
+
+
+def main(argv:List[str]=None) -> int:
+    '''
+    :param argv: command line arguments, `sys.argv[1:]` if None
+    console entry point, return exit code
+    '''
+    parser = argparse.ArgumentParser(prog='python -m electrode_tester.benchmark',
+                                     description='Measure accuracy and speed of estimators on synthetic signals.')
+    parser.add_argument('-e', '--estimators', nargs='+', choices=list(ESTIMATORS),
+                        default=['fourier', 'hilbert', 'three-param'],
+                        help='tested estimators, fourier, hilbert and three-param by default')
+    parser.add_argument('-f', '--frequencies', nargs='+', type=float, default=list(range(1, 101)),
+                        help='frequencies of signals in Hz, 1 to 100 by default')
+    parser.add_argument('--fs', nargs='+', type=float, default=[1000.],
+                        help='sampling rates in Hz')
+    parser.add_argument('-T', '--time', nargs='+', type=float, default=[5.],
+                        help='durations of signals in seconds')
+    parser.add_argument('--snr', nargs='+', type=float, default=[40.],
+                        help='signal to noise ratios in dB, inf for signals without noise')
+    parser.add_argument('-n', '--trials', type=int, default=100,
+                        help='number of signals of every frequency')
+    parser.add_argument('--batch-size', type=int, default=1000,
+                        help='maximal number of signals estimated at once')
+    parser.add_argument('--seed', type=int, default=None, help='seed of random numbers')
+    parser.add_argument('-o', '--output', default=None,
+                        help='JSON file for the report, report is printed if not given')
+    args = parser.parse_args(argv)
+
+    def progress(result:BenchmarkResult) -> None:
+        std = ' '.join(f'{parameter}={result.std[parameter]["all"]:.3g}' for parameter in PARAMETERS)
+        print(f'{result.estimator:>12} fs={result.fs:g} T={result.T:g} snr={result.snr:g}: '
+              f'{result.throughput:.0f} signals/s, std {std}', file=sys.stderr)
+
+    estimators = {name: ESTIMATORS[name]() for name in args.estimators}
+    results = benchmark(estimators, frequencies=args.frequencies, fs=args.fs, T=args.time, snr=args.snr,
+                        trials=args.trials, batch_size=args.batch_size, seed=args.seed, progress=progress)
+    if args.output is None:
+        json.dump(report(results), sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, 'w') as file:
+            json.dump(report(results), file, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -17,7 +17,11 @@ class BaseDevice(ABC):
 
     @abstractmethod
     def set_generator(self, *, frequency=1, amplitude=0.1, offset=0,
-                            signal_type='SINE') -> None:
+                            signal_type='SINE', waveform=None) -> None:
+        '''
+        :param frequency: frequency of sine, or of repetitions of `waveform` for "arbitrary" signal type
+        :param waveform: one repetition of "arbitrary" signal, samples between -1 and 1
+        '''
         ...
 
     @abstractmethod
@@ -20,18 +20,29 @@ class DummyDevice(BaseDevice):
         return self.__name
 
     def get_data(self) -> np.ndarray:
-        time = np.linspace(0, self.record_time, self.len_sig, endpoint=True)
-        data = self.amplitude * np.sin(2 * np.pi * self.gen_freq * time)
+        if self.waveform is not None:
+            # generator repeats the waveform, scope samples it every 1 / scope_freq
+            time = np.arange(self.len_sig) / self.scope_freq
+            position = np.floor(time * self.gen_freq * len(self.waveform) + 1e-6).astype(int)
+            data = self.amplitude * self.waveform[position % len(self.waveform)]
+        else:
+            time = np.linspace(0, self.record_time, self.len_sig, endpoint=True)
+            data = self.amplitude * np.sin(2 * np.pi * self.gen_freq * time)
         data = np.stack((data, 2 / 3. * data, 1 / 3. * data, data))
         data = data + self.amplitude / 10 * np.random.random(data.shape)
         return data
 
     def set_generator(self, *, frequency=1, amplitude=0.1, offset=0,
-                            signal_type='SINE') -> None:
+                            signal_type='SINE', waveform=None) -> None:
 
         self.gen_freq = frequency
         self.amplitude = amplitude
         self.offset = offset
+        self.waveform = None
+        if signal_type == 'arbitrary':
+            if waveform is None:
+                raise ValueError('"waveform" is required for "arbitrary" signal type')
+            self.waveform = np.asarray(waveform, dtype=float)
 
     def start_generator(self) -> None:
         pass
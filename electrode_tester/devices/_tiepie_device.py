@@ -44,12 +44,21 @@ class TiePieDevice(BaseDevice):
         return data
 
     def set_generator(self, *, frequency=1, amplitude=2, offset=0,
-                            signal_type='sine'):
+                            signal_type='sine', waveform=None):
 
         if signal_type=='sine':
             self.gen.signal_type = libtiepie.ST_SINE
             self.gen.frequency = frequency # Hz
             self.gen.amplitude = amplitude # V
+        elif signal_type == 'arbitrary':
+            if waveform is None:
+                raise ValueError('"waveform" is required for "arbitrary" signal type')
+            self.gen.signal_type = libtiepie.ST_ARBITRARY
+            self.gen.set_data(waveform)
+            # frequency of repetitions of the whole waveform
+            self.gen.frequency_mode = libtiepie.FM_SIGNALFREQUENCY
+            self.gen.frequency = frequency # Hz
+            self.gen.amplitude = amplitude # V
         elif signal_type in ('DC', 'dc', 'const', 'CONST'):
             self.gen.signal_type = libtiepie.ST_DC
         self.gen.offset = offset # V
@@ -1,4 +1,8 @@
-from ._base_estimator import BaseEstimator, Params
-from ._fit_sinus import FitSinus
+from ._base_estimator import BaseEstimator, Params, stack_params
+from ._fit_sinus import FitSinus, FitStats
 from ._fit_hilbert import FitHilbert
 from ._fit_fourier import FitFourier
+from ._fit_sinus_three_param import FitSinusThreeParam
+from ._fit_sinus_four_param import FitSinusFourParam
+from ._calibration import Calibration, ErrorTable
+from ._fit_lock_in import FitLockIn
@@ -1,12 +1,55 @@
 from abc import ABC, abstractmethod
-from typing import Dict
+from typing import Dict, Iterable, List, Union
 from collections import namedtuple
 
+import numpy as np
+
 Params = namedtuple('Params', ['amplitude', 'amplitude_error', 'phase', 'phase_error', 'offset', 'offset_error', 'frequency', 'frequency_error', 'function'])
 
 class BaseEstimator(ABC):
+    '''
+    Estimator of sinus parameters. Every `*_error` field of returned `Params` is
+    standard uncertainty (standard deviation) of the parameter in its units, not variance.
+    '''
+
+    # changed when results of the estimator change, so cached results are not reused
+    version = 1
+
+    def config(self) -> Dict:
+        '''
+        return settings of the estimator which change its results
+        '''
+        return {}
 
     @abstractmethod
     def estimate(self, x, y, **kwargs) -> Params:
         ...
 
+    def estimate_batch(self, x, Y, frequencies:Union[float, Iterable[float]], **kwargs) -> Params:
+        '''
+        :param x: time vector shared by all signals
+        :param Y: signals x samples array
+        :param frequencies: frequency of every signal or one frequency of all signals
+        Estimates parameters of every signal, returns `Params` of arrays with one element per signal
+        '''
+        Y = np.atleast_2d(Y)
+        frequencies = np.broadcast_to(frequencies, Y.shape[:1])
+        params = [self.estimate(x, y, **{**kwargs, 'frequency': frequency})
+                  for y, frequency in zip(Y, frequencies)]
+        return stack_params(params)
+
+
+def stack_params(params:List[Params]) -> Params:
+    '''
+    :param params: parameters of many signals
+    return `Params` of arrays, fields which are None for every signal stay None
+    '''
+    fields = {}
+    for name, values in zip(Params._fields, zip(*params)):
+        if all(value is None for value in values):
+            fields[name] = None
+        elif name == 'function':
+            fields[name] = values
+        else:
+            fields[name] = np.array([np.nan if value is None else value for value in values], dtype=float)
+    return Params(**fields)
@@ -0,0 +1,269 @@
+import copy
+import hashlib
+import json
+import os
+
+from pathlib import Path
+from typing import Dict, Iterable, Union
+
+import numpy as np
+
+from ._base_estimator import Params
+from ._simulation import PARAMETERS, synthetic_signals, estimation_errors
+
+
+class ErrorTable():
+    '''
+    Errors of one estimator for one sampling rate and number of samples,
+    measured for grid of frequencies and SNRs. Errors of amplitude and offset
+    are relative to amplitude of the signal, error of phase is in radians.
+    '''
+
+    def __init__(self, frequencies:np.ndarray, snrs:np.ndarray, errors:Dict[str, np.ndarray]):
+        '''
+        :param frequencies: increasing frequencies of the grid
+        :param snrs: increasing SNRs of the grid in dB
+        :param errors: SNRs x frequencies array of RMS errors of every parameter
+        '''
+        self.frequencies = np.asarray(frequencies, dtype=float)
+        self.snrs = np.asarray(snrs, dtype=float)
+        self.errors = {name: np.asarray(errors[name], dtype=float) for name in PARAMETERS}
+
+    def __call__(self, frequencies:Iterable[float], snr:Iterable[float]) -> Dict[str, np.ndarray]:
+        '''
+        :param frequencies: frequency of every signal
+        :param snr: SNR of every signal in dB
+        return errors of every parameter interpolated bilinearly in logarithm of error,
+        frequencies and SNRs out of the grid get errors from its edge
+        '''
+        frequencies, snr = np.broadcast_arrays(np.asarray(frequencies, dtype=float),
+                                               np.asarray(snr, dtype=float))
+        i0, i1, wf = self._weights(self.frequencies, frequencies)
+        j0, j1, ws = self._weights(self.snrs, snr)
+        errors = {}
+        for name, values in self.errors.items():
+            log_values = np.log(np.maximum(values, np.finfo(float).tiny))
+            low = (1 - wf) * log_values[j0, i0] + wf * log_values[j0, i1]
+            high = (1 - wf) * log_values[j1, i0] + wf * log_values[j1, i1]
+            errors[name] = np.exp((1 - ws) * low + ws * high)
+        return errors
+
+    @staticmethod
+    def _weights(grid:np.ndarray, values:np.ndarray):
+        values = np.clip(values, grid[0], grid[-1])
+        if len(grid) == 1:
+            index = np.zeros(values.shape, dtype=int)
+            return index, index, np.zeros(values.shape)
+        index = np.clip(np.searchsorted(grid, values, side='right') - 1, 0, len(grid) - 2)
+        weight = (values - grid[index]) / (grid[index + 1] - grid[index])
+        return index, index + 1, weight
+
+    def missing(self, frequencies:Iterable[float]) -> np.ndarray:
+        '''
+        :param frequencies: frequencies of signals
+        return sorted unique frequencies which are not in the grid
+        '''
+        frequencies = np.unique(np.asarray(frequencies, dtype=float))
+        known = np.isclose(frequencies[:, np.newaxis], self.frequencies, rtol=1e-9, atol=0).any(axis=1)
+        return frequencies[~known]
+
+    def merge(self, table:'ErrorTable') -> 'ErrorTable':
+        '''
+        :param table: table with the same SNRs and other frequencies
+        return table with frequencies of both tables
+        '''
+        if not np.array_equal(self.snrs, table.snrs):
+            raise ValueError('tables with different SNRs can\'t be merged')
+        frequencies = np.concatenate([self.frequencies, table.frequencies])
+        order = np.argsort(frequencies, kind='stable')
+        errors = {name: np.concatenate([self.errors[name], table.errors[name]], axis=1)[:, order]
+                  for name in PARAMETERS}
+        return ErrorTable(frequencies[order], self.snrs, errors)
+
+    def save(self, path:Union[str, Path]) -> None:
+        '''
+        :param path: npz file, written under temporary name and renamed
+        '''
+        path = Path(path)
+        temporary_path = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+        with open(temporary_path, 'wb') as file:
+            np.savez(file, frequencies=self.frequencies, snrs=self.snrs, **self.errors)
+        os.replace(temporary_path, path)
+
+    @staticmethod
+    def load(path:Union[str, Path]) -> 'ErrorTable':
+        with np.load(path) as data:
+            return ErrorTable(data['frequencies'], data['snrs'], {name: data[name] for name in PARAMETERS})
+
+
+class Calibration():
+    '''
+    Errors of estimators measured by Monte Carlo simulation.
+
+    Estimator created with `calibration` replaces its constant errors with
+    errors interpolated from `ErrorTable` by frequency and SNR of every
+    signal. SNR is measured from residuals of the fit. The table is simulated
+    once for every estimator, sampling rate and number of samples, kept in
+    memory and, if `path` is given, saved there for next sessions. Frequencies
+    of estimated signals which are not in the table are simulated when they
+    are first estimated and added to it, so errors are never interpolated
+    between frequencies with and without whole number of periods.
+    '''
+
+    def __init__(self, path:Union[str, Path]=None, *, frequencies:Iterable[float]=None,
+                 snrs:Iterable[float]=(0., 10., 20., 30., 40., 60., 80.), trials:int=50,
+                 seed:int=0, batch_size:int=1000):
+        '''
+        :param path: folder for simulated tables, tables are only kept in memory if None
+        :param frequencies: frequencies simulated with every table, 40 frequencies with whole number
+                            of periods from the lowest one to 0.45 of sampling rate if None
+        :param snrs: SNRs of the grid in dB
+        :param trials: number of simulated signals for every frequency and SNR
+        :param seed: seed of random numbers
+        :param batch_size: maximal number of signals simulated at once
+        '''
+        if not isinstance(trials, int) or trials <= 1:
+            raise ValueError(f'"trials" should be integer bigger than 1, not "{trials}"')
+        snrs = sorted(float(snr) for snr in snrs)
+        if not snrs or not np.all(np.isfinite(snrs)):
+            raise ValueError(f'"snrs" should be finite numbers, not "{snrs}"')
+        self._path = Path(path) if path is not None else None
+        if self._path is not None:
+            self._path.mkdir(parents=True, exist_ok=True)
+        self._frequencies = sorted(float(f) for f in frequencies) if frequencies is not None else None
+        self._snrs = snrs
+        self._trials = trials
+        self._seed = seed
+        self._batch_size = batch_size
+        self._tables = {}
+
+    def __repr__(self) -> str:
+        return f'Calibration("{self._path}", trials={self._trials})'
+
+    def config(self) -> Dict:
+        '''
+        return settings of the simulation
+        '''
+        return {'frequencies': self._frequencies, 'snrs': self._snrs, 'trials': self._trials, 'seed': self._seed}
+
+    def table(self, estimator, fs:float, n_samples:int, frequencies:Iterable[float]=None) -> ErrorTable:
+        '''
+        :param estimator: calibrated estimator
+        :param fs: sampling rate in Hz
+        :param n_samples: number of samples of signals
+        :param frequencies: frequencies which should be in the table
+        return table of errors, simulated if it is neither in memory nor on disk,
+        frequencies below half of sampling rate missing in the table are simulated and added
+        '''
+        reference = self._reference(estimator)
+        identity = {
+            'estimator': f'{type(reference).__module__}.{type(reference).__qualname__}',
+            'version': reference.version,
+            'config': reference.config(),
+            'fs': float(f'{fs:.9g}'),
+            'n_samples': int(n_samples),
+            'calibration': self.config(),
+        }
+        key = hashlib.sha256(json.dumps(identity, sort_keys=True, default=repr).encode()).hexdigest()
+        path = self._path / f'{key}.npz' if self._path is not None else None
+        table = self._tables.get(key)
+        if table is None and path is not None:
+            try:
+                table = ErrorTable.load(path)
+            except (OSError, ValueError, KeyError):
+                table = None
+
+        required = self._grid(fs, n_samples) if table is None else np.empty(0)
+        if frequencies is not None:
+            frequencies = np.asarray(frequencies, dtype=float)
+            required = np.concatenate([required, frequencies[(frequencies > 0) & (frequencies < fs / 2)]])
+        missing = table.missing(required) if table is not None else np.unique(required)
+        if len(missing):
+            simulated = self._simulate(reference, fs, n_samples, missing)
+            table = simulated if table is None else table.merge(simulated)
+            if path is not None:
+                table.save(path)
+        self._tables[key] = table
+        return table
+
+    def apply(self, estimator, x, Y:np.ndarray, params:Params, frequencies:Iterable[float],
+              fs:float=None) -> Params:
+        '''
+        :param estimator: calibrated estimator
+        :param x: time vector shared by all signals
+        :param Y: signals x samples array
+        :param params: `Params` of arrays returned by the estimator
+        :param frequencies: frequency of every signal
+        :param fs: sampling rate in Hz, computed from `x` if None
+        return `params` with errors of amplitude, phase and offset from the table
+        '''
+        x = np.asarray(x, dtype=float)
+        Y = np.atleast_2d(Y)
+        frequencies = np.broadcast_to(np.asarray(frequencies, dtype=float), Y.shape[:1])
+        if not fs:
+            fs = (len(x) - 1) / (x[-1] - x[0])
+
+        amplitude = np.abs(params.amplitude)
+        model = np.sin(2 * np.pi * frequencies[:, np.newaxis] * x + params.phase[:, np.newaxis])
+        model *= params.amplitude[:, np.newaxis]
+        model += params.offset[:, np.newaxis]
+        noise = np.mean((Y - model) ** 2, axis=-1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            snr = 10 * np.log10(amplitude ** 2 / 2 / noise)
+        snr = np.nan_to_num(snr, nan=self._snrs[0], posinf=self._snrs[-1], neginf=self._snrs[0])
+
+        errors = self.table(estimator, fs, len(x), frequencies)(frequencies, snr)
+        return params._replace(amplitude_error=errors['amplitude'] * amplitude,
+                               phase_error=errors['phase'],
+                               offset_error=errors['offset'] * amplitude)
+
+    @staticmethod
+    def _reference(estimator):
+        '''
+        return copy of the estimator returning its own errors
+        '''
+        reference = copy.copy(estimator)
+        reference.calibration = None
+        return reference
+
+    def _grid(self, fs:float, n_samples:int) -> np.ndarray:
+        if self._frequencies is not None:
+            return np.asarray(self._frequencies)
+        periods = np.unique(np.round(np.geomspace(1, max(1, 0.45 * n_samples), 40)))
+        return periods * fs / n_samples
+
+    def _simulate(self, reference, fs:float, n_samples:int, frequencies:np.ndarray) -> ErrorTable:
+        '''
+        :param frequencies: sorted frequencies of the table
+        return RMS errors of the estimator for every frequency and SNR,
+        signals of every frequency and SNR are random numbers of their own,
+        so errors of a frequency don't depend on other simulated frequencies
+        '''
+        per_batch = max(1, self._batch_size // self._trials)
+        errors = {name: np.empty((len(self._snrs), len(frequencies))) for name in PARAMETERS}
+        for j, snr in enumerate(self._snrs):
+            for start in range(0, len(frequencies), per_batch):
+                stop = start + per_batch
+                t, Y, truth = self._signals(frequencies[start:stop], fs, n_samples, snr)
+                batch_errors, _, _ = estimation_errors(reference, t, Y, truth, fs)
+                for name in PARAMETERS:
+                    error = batch_errors[name]
+                    if name != 'phase':
+                        error = error / truth['amplitude']
+                    errors[name][j, start:stop] = np.sqrt(np.mean(error.reshape(-1, self._trials) ** 2, axis=1))
+        return ErrorTable(frequencies, self._snrs, errors)
+
+    def _signals(self, frequencies:np.ndarray, fs:float, n_samples:int, snr:float):
+        '''
+        return `synthetic_signals` of the frequencies, generated by random numbers seeded
+        by seed of the calibration, frequency and SNR
+        '''
+        batches = []
+        for frequency in frequencies:
+            entropy = [self._seed, *np.array([frequency, snr]).view(np.uint64).tolist()]
+            batches.append(synthetic_signals([frequency], fs, n_samples / fs, snr, trials=self._trials,
+                                             rng=np.random.default_rng(entropy)))
+        t = batches[0][0]
+        Y = np.concatenate([Y for _, Y, _ in batches])
+        truth = {name: np.concatenate([truth[name] for _, _, truth in batches]) for name in batches[0][2]}
+        return t, Y, truth
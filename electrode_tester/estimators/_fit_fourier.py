@@ -1,45 +1,76 @@
+from typing import Dict
+
 from ._base_estimator import BaseEstimator, Params
 import numpy as np
 
 class FitFourier(BaseEstimator):
-    
-    def __search_min(self, A, value):
-        B = np.abs(A - value)
-        idx = np.argwhere(B == np.min(B))[0][0]
-        return idx
+
+    def __init__(self, *, calibration=None):
+        '''
+        :param calibration: `Calibration` giving errors dependent on frequency and SNR,
+                            constant errors are returned if None
+        '''
+        self.calibration = calibration
+
+    def config(self) -> Dict:
+        calibration = getattr(self, 'calibration', None)
+        if calibration is None:
+            return {}
+        return {'calibration': calibration.config()}
 
     def estimate(self, x, y, **kwargs):
         frequency = kwargs.get('frequency')
+        if not frequency:
+            raise ValueError('"frequency" argument is not passed')
+        params = self.estimate_batch(x, np.asarray(y)[np.newaxis], [frequency], **kwargs)
+        return Params(*(value if value is None else value[0] for value in params))
+
+    def estimate_batch(self, x, Y, frequencies, **kwargs):
+        '''
+        :param x: time vector shared by all signals
+        :param Y: signals x samples array
+        :param frequencies: frequency of every signal or one frequency of all signals
+        Computes one FFT of all signals and reads bins of their frequencies
+        '''
         Fs = kwargs.get('fs')
         if not Fs:
             raise ValueError('"fs" argument is not passed')
-        if not frequency:
+
+        Y = np.atleast_2d(Y)
+        n = Y.shape[-1]
+        frequencies = np.broadcast_to(np.asarray(frequencies, dtype=float), Y.shape[:1])
+        if not np.all(frequencies):
             raise ValueError('"frequency" argument is not passed')
-    
-        S = np.fft.rfft(y) / len(y)
-        S[1:] *= 2
-        F = np.fft.rfftfreq(len(y), 1/Fs)
+
+        S = np.fft.rfft(Y, axis=-1) / n
+        S[:, 1:] *= 2
+
+        # nearest bin of rfftfreq, lower one if frequency is in the middle
+        idx_freq = np.ceil(frequencies * n / Fs - 0.5).astype(int)
+        idx_freq = np.clip(idx_freq, 0, S.shape[-1] - 1)
+        rows = np.arange(S.shape[0])
+        S_offset = S[:, 0]
+        S_freq = S[rows, idx_freq]
 
         args = {}
-        
-        idx_offset = self.__search_min(F, 0)
-        args['offset'] = np.abs(S[idx_offset]) * np.sign(np.real(S[idx_offset]))
-        args['offset_error'] = 0.00024
-        
-        idx_freq = self.__search_min(F, frequency)
-        args['amplitude'] = np.abs(S[idx_freq])
-        args['amplitude_error'] = 0.00033
-        
-        phase = np.angle(S[idx_freq]) + np.pi / 2
-        if phase < 0:
-            phase += np.pi * 2
+
+        args['offset'] = np.abs(S_offset) * np.sign(np.real(S_offset))
+        args['offset_error'] = np.full(len(rows), 0.00024)
+
+        args['amplitude'] = np.abs(S_freq)
+        args['amplitude_error'] = np.full(len(rows), 0.00033)
+
+        phase = np.angle(S_freq) + np.pi / 2
+        phase[phase < 0] += np.pi * 2
         args['phase'] = phase
-        args['phase_error'] = 0.00052
-        
+        args['phase_error'] = np.full(len(rows), 0.00052)
+
         args['function'] = None
-        
+
         args['frequency_error'] = None
         args['frequency'] = None
-        
+
         params = Params(**args)
+        if getattr(self, 'calibration', None) is not None:
+            params = self.calibration.apply(self, x, Y, params, frequencies, fs=Fs)
         return params
@@ -1,55 +1,140 @@
+import threading
+
 import numpy as np
-import scipy.signal as ss
+import scipy.fft
+
+from typing import Dict
 
 from ._base_estimator import BaseEstimator, Params
 
+# spectrum buffers reused by calls from the same thread
+_workspaces = threading.local()
+WORKSPACE_MAX_BYTES = 64 * 2**20
+
+
 class FitHilbert(BaseEstimator):
+    '''
+    Demodulation of sinus by analytic signal from Hilbert transform.
+
+    All signals of a batch are transformed at once along the last axis,
+    padded with zeros to fast FFT length. Signals are only read, so they can
+    be views of memory-mapped or shared arrays.
+    '''
+
+    # zero padding to fast FFT length changed results of signals of other lengths
+    version = 2
+
+    def __init__(self, *, calibration=None):
+        '''
+        :param calibration: `Calibration` giving errors dependent on frequency and SNR,
+                            constant errors are returned if None
+        '''
+        self.calibration = calibration
+
+    def config(self) -> Dict:
+        calibration = getattr(self, 'calibration', None)
+        if calibration is None:
+            return {}
+        return {'calibration': calibration.config()}
 
     def estimate(self, x, y, **kwargs):
-        
+        '''
+        :param x: time vector
+        :param y: signal vector
+        Computes "amplitude" and "phase" by signal demoulation using Hilbert transform and analitical signal
+        '''
         frequency = kwargs.get('frequency')
         if not frequency:
             raise ValueError('"frequency" argument is not passed')
+        params = self.estimate_batch(x, np.asarray(y)[np.newaxis], [frequency], **kwargs)
+        return Params(*(value if value is None else value[0] for value in params))
 
+    def estimate_batch(self, x, Y, frequencies, **kwargs):
         '''
-        :param x: time vector
-        :param y: signal vector
-        Computes "amplitude" and "phase" by signal demoulation using Hilbert transform and analitical signal
+        :param x: time vector shared by all signals
+        :param Y: signals x samples array
+        :param frequencies: frequency of every signal or one frequency of all signals
+        Demodulates all signals at once
         '''
-        
-        args = {}
-        
-        offset = np.mean(y)
-        y -= offset
-        
-        
-        hilbert = ss.hilbert(y)
-        
-        hilbert_abs = np.abs(hilbert)
-        hilbert_abs_std = np.std(hilbert_abs)
-        hilbert_abs_mean = np.mean(hilbert_abs)
-        amplitudes = hilbert_abs[(hilbert_abs < hilbert_abs_mean + hilbert_abs_std) * (hilbert_abs > hilbert_abs_mean - hilbert_abs_std)]
-        args['amplitude'] = np.median(amplitudes)
-        args['amplitude_error'] = 0.00056
-        
-        hilbert_phase = np.unwrap(np.angle(hilbert)) - 2 * np.pi * frequency * x + np.pi/2
-        hilbert_phase_std = np.std(hilbert_phase)
-        hilbert_phase_mean = np.mean(hilbert_phase)
-        phases = hilbert_phase[(hilbert_phase < hilbert_phase_mean + hilbert_phase_std) * (hilbert_phase > hilbert_phase_mean - hilbert_phase_std)]   
-        phase = np.median(phases)
+        x = np.asarray(x, dtype=float)
+        Y = np.atleast_2d(Y)
+        frequencies = np.broadcast_to(np.asarray(frequencies, dtype=float), Y.shape[:1])
+        if not np.all(frequencies):
+            raise ValueError('"frequency" argument is not passed')
+
+        offset = np.mean(Y, axis=-1)
+        analytic = _analytic_signal(Y - offset[:, np.newaxis])
+
+        amplitude = _trimmed_median(np.abs(analytic))
+
+        hilbert_phase = np.unwrap(np.angle(analytic), axis=-1)
+        hilbert_phase -= 2 * np.pi * frequencies[:, np.newaxis] * x
+        hilbert_phase += np.pi / 2
+        phase = _trimmed_median(hilbert_phase)
         phase = ((phase + np.pi) % (2 * np.pi)) - np.pi
-        if phase < 0:
-            phase += 2*np.pi
+        phase = np.where(phase < 0, phase + 2 * np.pi, phase)
+
+        n = len(frequencies)
+        args = {}
+        args['amplitude'] = amplitude
+        args['amplitude_error'] = np.full(n, 0.00056)
         args['phase'] = phase
-        args['phase_error'] = 0.00072
-        
+        args['phase_error'] = np.full(n, 0.00072)
         args['offset'] = offset
-        args['offset_error'] = 0.00024 
+        args['offset_error'] = np.full(n, 0.00024)
         args['frequency'] = None
         args['frequency_error'] = None
         args['function'] = None
-        
+
         params = Params(**args)
+        if getattr(self, 'calibration', None) is not None:
+            params = self.calibration.apply(self, x, Y, params, frequencies, fs=kwargs.get('fs'))
         return params
-        
-        
+
+
+def _analytic_signal(Y:np.ndarray) -> np.ndarray:
+    '''
+    :param Y: signals x samples array, not changed
+    return analytic signal of every signal, Hilbert transform is its imaginary part,
+    signals are padded with zeros to `scipy.fft.next_fast_len` and the padding is cut off;
+    the result is a view of the workspace of this thread, valid until the next call
+    '''
+    n = Y.shape[-1]
+    n_fft = scipy.fft.next_fast_len(n, real=True)
+    n_half = n_fft // 2 + 1
+
+    # one sided spectrum is doubled, DC and Nyquist bins are kept, negative frequencies are zero
+    gain = np.full(n_half, 2.)
+    gain[0] = 1.
+    if n_fft % 2 == 0:
+        gain[-1] = 1.
+
+    spectrum = _workspace(Y.shape[:-1] + (n_fft,))
+    np.multiply(scipy.fft.rfft(Y, n=n_fft, axis=-1), gain, out=spectrum[..., :n_half])
+    spectrum[..., n_half:] = 0
+    # FFT plans of every length are cached by scipy.fft, inverse FFT is computed in the workspace
+    return scipy.fft.ifft(spectrum, axis=-1, overwrite_x=True)[..., :n]
+
+
+def _workspace(shape:tuple) -> np.ndarray:
+    '''
+    return complex buffer of the shape, reused by following calls from this thread
+    if it is not bigger than `WORKSPACE_MAX_BYTES`
+    '''
+    buffer = getattr(_workspaces, 'spectrum', None)
+    if buffer is not None and buffer.shape == shape:
+        return buffer
+    buffer = np.empty(shape, dtype=complex)
+    _workspaces.spectrum = buffer if buffer.nbytes <= WORKSPACE_MAX_BYTES else None
+    return buffer
+
+
+def _trimmed_median(values:np.ndarray) -> np.ndarray:
+    '''
+    :param values: signals x samples array
+    return median of every signal from values closer to its mean than its standard deviation
+    '''
+    mean = np.mean(values, axis=-1, keepdims=True)
+    std = np.std(values, axis=-1, keepdims=True)
+    inside = (values < mean + std) & (values > mean - std)
+    return np.nanmedian(np.where(inside, values, np.nan), axis=-1)
@@ -0,0 +1,112 @@
+import numpy as np
+import scipy.signal as ss
+
+from typing import Dict, Union
+from .._basis import cached_phasors
+from ._base_estimator import BaseEstimator, Params
+
+
+class FitLockIn(BaseEstimator):
+    '''
+    Lock-in (quadrature) demodulation of sinus with known frequency.
+
+    Signal without offset is multiplied by in-phase `sin(2 pi f t)` and
+    quadrature `cos(2 pi f t)` references and averaged with a window, which
+    gives `A cos(p)` and `A sin(p)`. All signals of a batch are demodulated at
+    once with cached references. Errors follow from noise floor, i.e. RMS of
+    residuals, and effective number of averaged samples.
+    '''
+
+    def __init__(self, *, window:Union[str, tuple]=None, whole_periods:bool=True):
+        '''
+        :param window: averaging (low-pass) window, name or tuple accepted by `scipy.signal.get_window`,
+                       rectangular if None
+        :param whole_periods: if average only the longest whole number of periods from the beginning of the signal
+        '''
+        if window is not None:
+            # invalid windows are reported before signals are estimated
+            ss.get_window(window, 8)
+        self.window = window
+        self.whole_periods = whole_periods
+
+    def config(self) -> Dict:
+        return {'window': self.window, 'whole_periods': self.whole_periods}
+
+    def estimate(self, x, y, **kwargs):
+        '''
+        :param x: time vector
+        :param y: signal vector
+        Computes "amplitude", "phase" and "offset" by quadrature demodulation
+        '''
+        frequency = kwargs.get('frequency')
+        if not frequency:
+            raise ValueError('"frequency" argument is not passed')
+        params = self.estimate_batch(x, np.asarray(y)[np.newaxis], [frequency], **kwargs)
+        return Params(*(value if value is None else value[0] for value in params))
+
+    def estimate_batch(self, x, Y, frequencies, **kwargs):
+        '''
+        :param x: time vector shared by all signals
+        :param Y: signals x samples array
+        :param frequencies: frequency of every signal or one frequency of all signals
+        Demodulates all signals at once
+        '''
+        x = np.asarray(x, dtype=float)
+        Y = np.atleast_2d(np.asarray(Y, dtype=float))
+        frequencies = np.broadcast_to(np.asarray(frequencies, dtype=float), Y.shape[:1])
+        if not np.all(frequencies):
+            raise ValueError('"frequency" argument is not passed')
+
+        W = self._weights(x, frequencies)
+        W_sum = W.sum(axis=1)
+        # effective number of averaged samples
+        n_eff = W_sum**2 / np.einsum('ij,ij->i', W, W)
+
+        offset = np.einsum('ij,ij->i', W, Y) / W_sum
+        Y = Y - offset[:, None]
+        E = cached_phasors(x, frequencies)
+        Z = 2 * np.einsum('ij,ij->i', W * Y, E) / W_sum
+        # in-phase part A cos(p), quadrature part A sin(p)
+        in_phase, quadrature = Z.imag, Z.real
+
+        A = np.hypot(in_phase, quadrature)
+        p = np.arctan2(quadrature, in_phase) % (2 * np.pi)
+
+        residuals = Y - (E * (A * np.exp(1j * p))[:, None]).imag
+        noise = np.sqrt(np.einsum('ij,ij->i', W, residuals**2) / W_sum)
+
+        args = {}
+        args['amplitude'] = A
+        args['amplitude_error'] = noise * np.sqrt(2 / n_eff)
+        args['phase'] = p
+        with np.errstate(divide='ignore', invalid='ignore'):
+            args['phase_error'] = args['amplitude_error'] / A
+        args['offset'] = offset
+        args['offset_error'] = noise / np.sqrt(n_eff)
+        args['frequency'] = None
+        args['frequency_error'] = None
+        args['function'] = None
+
+        params = Params(**args)
+        return params
+
+    def _weights(self, x, frequencies):
+        '''
+        :param x: time vector
+        :param frequencies: frequency of every signal
+        return signals x samples array of averaging weights
+        '''
+        n = x.size
+        lengths = np.full(len(frequencies), n)
+        if self.whole_periods and n > 1:
+            step = (x[-1] - x[0]) / (n - 1)
+            periods = np.floor(frequencies * n * step + 1e-9)
+            whole = np.rint(periods / (frequencies * step)).astype(int)
+            # signals shorter than one period are averaged whole
+            lengths = np.where(periods >= 1, np.minimum(whole, n), n)
+
+        W = np.zeros((len(frequencies), n))
+        for length in np.unique(lengths):
+            rows = lengths == length
+            W[rows, :length] = ss.get_window(self.window, length, fftbins=False) if self.window is not None else 1.
+        return W
@@ -1,15 +1,55 @@
 import numpy as np
 import scipy.optimize
 
+from collections import namedtuple
 from functools import partial
+from typing import Dict
 from ._base_estimator import BaseEstimator, Params
 
+FitStats = namedtuple('FitStats', ['fits', 'warm_starts', 'fallbacks', 'evaluations'])
+
+
+def sinfunc(t, A, p, c, f):  return A * np.sin(2*np.pi * f *t + p) + c
+
+
 class FitSinus(BaseEstimator):
 
-    def estimate(self, x, y, **kwargs):        
+    # errors are standard deviations since version 2, variances before
+    version = 2
+
+    def __init__(self, *, warm_start:bool=False):
+        '''
+        :param warm_start: if start every fit from solution of previous fit of the same channel and frequency
+        '''
+        self.warm_start = warm_start
+        self.reset()
+
+    def config(self) -> Dict:
+        return {'warm_start': self.warm_start}
+
+    def reset(self) -> None:
+        '''
+        forget solutions of previous fits and zero counters
+        '''
+        self._solutions = {}
+        self._fits = 0
+        self._warm_starts = 0
+        self._fallbacks = 0
+        self._evaluations = 0
+
+    @property
+    def stats(self) -> FitStats:
+        '''
+        return number of fits, warm started fits, warm starts which failed
+        and function evaluations done by all fits
+        '''
+        return FitStats(self._fits, self._warm_starts, self._fallbacks, self._evaluations)
+
+    def estimate(self, x, y, **kwargs):
         '''
         :param x: time vector
         :param y: signal vector
+        :param channel: name of the channel, used with frequency as key of warm start
         Computes sinal paramitest by fitting sinus funtion
         '''
         frequency = kwargs.get('frequency')
@@ -19,33 +59,74 @@ class FitSinus(BaseEstimator):
 
         x = np.array(x)
         y = np.array(y)
+        self._fits += 1
 
-        guess_amplitude = np.std(y) * 2.**0.5
-        guess_offset = np.mean(y)
-        guess_frequency = frequency
-        guess = np.array([guess_amplitude, 0., guess_offset, guess_frequency])
-
-        def sinfunc(t, A, p, c, f):  return A * np.sin(2*np.pi * f *t + p) + c
+        key = (kwargs.get('channel'), frequency)
+        popt = None
+        if self.warm_start and key in self._solutions:
+            self._warm_starts += 1
+            popt, pcov = self._warm_fit(x, y, self._solutions[key])
+            if popt is None:
+                self._fallbacks += 1
+        if popt is None:
+            popt, pcov = self._cold_fit(x, y, frequency)
 
-        popt, pcov = scipy.optimize.curve_fit(sinfunc, x, y, p0=guess, maxfev = 10000)
         A, p, c, f = popt
-        if A < 0:
-            params = self.estimate(x, -(y-c)+c, **kwargs)
-            y = -(y-c)+c
-            popt, pcov = scipy.optimize.curve_fit(sinfunc, x, y, p0=guess, maxfev = 10000)
-            A, p, c, f = popt
-            p = p - np.pi
         p = (p + 2 * np.pi ) % (2 * np.pi)
-        
+
         popt = A, p, c, f
+        if self.warm_start:
+            self._solutions[key] = popt
         function = partial(sinfunc, A=A,p=p,c=c, f=f)
-        
+
         args = {}
         names = ['amplitude', 'phase', 'offset', 'frequency']
-        for val, val_error, name in zip(popt, np.diag(pcov), names):
+        for val, val_error, name in zip(popt, np.sqrt(np.diag(pcov)), names):
             args[name] = val
             args[name+'_error'] = val_error
         args['function'] = function
 
         params = Params(**args)
         return params
+
+    def _cold_fit(self, x, y, frequency):
+        '''
+        :param x: time vector
+        :param y: signal vector
+        :param frequency: expected frequency
+        fit starting from amplitude and offset of the signal, refit inverted signal if amplitude is negative
+        '''
+        guess_amplitude = np.std(y) * 2.**0.5
+        guess_offset = np.mean(y)
+        guess_frequency = frequency
+        guess = np.array([guess_amplitude, 0., guess_offset, guess_frequency])
+
+        popt, pcov = self._curve_fit(x, y, guess)
+        A, p, c, f = popt
+        if A < 0:
+            y = -(y-c)+c
+            popt, pcov = self._curve_fit(x, y, guess)
+            A, p, c, f = popt
+            p = p - np.pi
+        return (A, p, c, f), pcov
+
+    def _warm_fit(self, x, y, guess):
+        '''
+        :param x: time vector
+        :param y: signal vector
+        :param guess: solution of previous fit
+        fit starting from previous solution, return None if fit failed
+        '''
+        try:
+            popt, pcov = self._curve_fit(x, y, np.array(guess))
+        except (RuntimeError, ValueError):
+            return None, None
+        if popt[0] < 0 or not np.all(np.isfinite(pcov)):
+            return None, None
+        return popt, pcov
+
+    def _curve_fit(self, x, y, guess):
+        popt, pcov, info, *_ = scipy.optimize.curve_fit(sinfunc, x, y, p0=guess, maxfev = 10000,
+                                                         full_output=True)
+        self._evaluations += info['nfev']
+        return popt, pcov
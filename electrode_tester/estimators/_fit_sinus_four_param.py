@@ -0,0 +1,130 @@
+import numpy as np
+
+from functools import partial
+from typing import Dict
+from .._basis import phasors
+from ._base_estimator import BaseEstimator, Params
+from ._fit_sinus import sinfunc
+from ._fit_sinus_three_param import FitSinusThreeParam
+
+
+class FitSinusFourParam(BaseEstimator):
+    '''
+    Iterative least squares fit of sinus with unknown frequency (IEEE 1057 four parameter sine fit).
+
+    Starts from three parameter fit at given frequency, then every Gauss-Newton
+    step solves `a * sin + b * cos + c + df * d/df` with analytic derivative
+    with respect to frequency, until relative frequency change is below
+    `tolerance`. Signals of a batch are iterated together, converged ones are
+    left out of next steps. Numbers of steps of the last batch are kept in
+    `iterations`.
+    '''
+
+    def __init__(self, *, tolerance:float=1e-10, max_iterations:int=50):
+        '''
+        :param tolerance: relative change of frequency at which fit is finished
+        :param max_iterations: maximal number of Gauss-Newton steps
+        '''
+        if not tolerance > 0:
+            raise ValueError(f'"tolerance" should be positive, not "{tolerance}"')
+        if not isinstance(max_iterations, int) or max_iterations <= 0:
+            raise ValueError(f'"max_iterations" should be positive integer, not "{max_iterations}"')
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+
+    def config(self) -> Dict:
+        return {'tolerance': self.tolerance, 'max_iterations': self.max_iterations}
+
+    def estimate(self, x, y, **kwargs):
+        '''
+        :param x: time vector
+        :param y: signal vector
+        Computes sinus parameters with frequency by iterative fit
+        '''
+        frequency = kwargs.get('frequency')
+        if not frequency:
+            raise ValueError('"frequency" argument is not passed')
+        params = self.estimate_batch(x, np.asarray(y)[np.newaxis], [frequency])
+        return Params(*(value[0] for value in params))
+
+    def estimate_batch(self, x, Y, frequencies, **kwargs):
+        '''
+        :param x: time vector shared by all signals
+        :param Y: signals x samples array
+        :param frequencies: initial frequency of every signal or one frequency of all signals
+        Iterates fits of all signals in lock-step
+        '''
+        x = np.asarray(x, dtype=float)
+        Y = np.atleast_2d(np.asarray(Y, dtype=float))
+        f = np.array(np.broadcast_to(np.asarray(frequencies, dtype=float), Y.shape[:1]))
+        if not np.all(f):
+            raise ValueError('"frequency" argument is not passed')
+
+        a, b, c, _ = FitSinusThreeParam.fit(x, Y, f)
+        a, b, c = a.copy(), b.copy(), c.copy()
+        cov = np.full((len(f), 4, 4), np.nan)
+        self.iterations = np.zeros(len(f), dtype=int)
+
+        max_step = 0.25 / (x.max() - x.min())
+        active = np.arange(len(f))
+        for _ in range(self.max_iterations):
+            beta, cov[active] = self._step(x, Y[active], f[active], a[active], b[active])
+            a[active], b[active], c[active] = beta[:, 0], beta[:, 1], beta[:, 2]
+            # linearization holds while phase drift over the signal is small
+            f[active] += np.clip(beta[:, 3], -max_step, max_step)
+            self.iterations[active] += 1
+            converged = np.abs(beta[:, 3]) <= self.tolerance * np.abs(f[active])
+            active = active[~converged]
+            if not active.size:
+                break
+
+        A = np.hypot(a, b)
+        p = np.arctan2(b, a) % (2 * np.pi)
+
+        # gradients of amplitude and phase with respect to a and b
+        dA = np.stack([a / A, b / A], axis=-1)
+        dp = np.stack([-b / A**2, a / A**2], axis=-1)
+        cov_ab = cov[:, :2, :2]
+
+        args = {}
+        args['amplitude'] = A
+        args['amplitude_error'] = np.sqrt(np.einsum('...i,...ij,...j', dA, cov_ab, dA))
+        args['phase'] = p
+        args['phase_error'] = np.sqrt(np.einsum('...i,...ij,...j', dp, cov_ab, dp))
+        args['offset'] = c
+        args['offset_error'] = np.sqrt(cov[:, 2, 2])
+        args['frequency'] = f
+        args['frequency_error'] = np.sqrt(cov[:, 3, 3])
+        args['function'] = tuple(partial(sinfunc, A=A_, p=p_, c=c_, f=f_)
+                                 for A_, p_, c_, f_ in zip(A, p, c, f))
+
+        params = Params(**args)
+        return params
+
+    @staticmethod
+    def _step(x, Y, f, a, b):
+        '''
+        :param x: time vector shared by all signals
+        :param Y: signals x samples array
+        :param f: current frequencies
+        :param a: current sinus coefficients
+        :param b: current cosinus coefficients
+        return new a, b, c with frequency change of every signal and covariance matrices
+        '''
+        n = x.size
+        # frequencies change in every iteration, bases are not cached
+        E = phasors(x, f)
+        S, C = E.imag, E.real
+        # derivative of a * sin(2 pi f t) + b * cos(2 pi f t) with respect to f
+        G = 2 * np.pi * x * (a[:, None] * C - b[:, None] * S)
+        D = np.stack([S, C, np.ones_like(S), G], axis=1)
+
+        DD = D @ D.transpose(0, 2, 1)
+        Dy = (D @ Y[:, :, None])[:, :, 0]
+        DD_inv = np.linalg.inv(DD)
+        beta = np.einsum('...ij,...j->...i', DD_inv, Dy)
+
+        # residual sum of squares at the minimum, without computing residuals
+        rss = np.einsum('ij,ij->i', Y, Y) - np.einsum('...i,...i', beta, Dy)
+        variance = np.maximum(rss, 0) / max(n - 4, 1)
+        return beta, DD_inv * variance[:, None, None]
@@ -0,0 +1,106 @@
+import numpy as np
+
+from functools import partial
+from .._basis import cached_phasors
+from ._base_estimator import BaseEstimator, Params
+from ._fit_sinus import sinfunc
+
+
+class FitSinusThreeParam(BaseEstimator):
+    '''
+    Linear least squares fit of sinus with known frequency (three parameter sine fit).
+
+    Signal is fitted with `a * sin(2 pi f t) + b * cos(2 pi f t) + c`, which is
+    solved in closed form instead of iterations. Errors are standard deviations
+    from covariance matrix of the fit.
+    '''
+
+    def estimate(self, x, y, **kwargs):
+        '''
+        :param x: time vector
+        :param y: signal vector
+        Computes sinus parameters by linear least squares fit with known frequency
+        '''
+        frequency = kwargs.get('frequency')
+        if not frequency:
+            raise ValueError('"frequency" argument is not passed')
+        params = self.estimate_batch(x, np.asarray(y)[np.newaxis], [frequency])
+        return Params(*(value[0] for value in params))
+
+    def estimate_batch(self, x, Y, frequencies, **kwargs):
+        '''
+        :param x: time vector shared by all signals
+        :param Y: signals x samples array
+        :param frequencies: frequency of every signal or one frequency of all signals
+        Solves normal equations of all signals at once
+        '''
+        x = np.asarray(x, dtype=float)
+        Y = np.atleast_2d(np.asarray(Y, dtype=float))
+        frequencies = np.broadcast_to(np.asarray(frequencies, dtype=float), Y.shape[:1])
+        if not np.all(frequencies):
+            raise ValueError('"frequency" argument is not passed')
+
+        a, b, c, cov = self.fit(x, Y, frequencies)
+
+        A = np.hypot(a, b)
+        p = np.arctan2(b, a) % (2 * np.pi)
+
+        # gradients of amplitude and phase with respect to a and b
+        dA = np.stack([a / A, b / A], axis=-1)
+        dp = np.stack([-b / A**2, a / A**2], axis=-1)
+        cov_ab = cov[:, :2, :2]
+        A_var = np.einsum('...i,...ij,...j', dA, cov_ab, dA)
+        p_var = np.einsum('...i,...ij,...j', dp, cov_ab, dp)
+
+        args = {}
+        args['amplitude'] = A
+        args['amplitude_error'] = np.sqrt(A_var)
+        args['phase'] = p
+        args['phase_error'] = np.sqrt(p_var)
+        args['offset'] = c
+        args['offset_error'] = np.sqrt(cov[:, 2, 2])
+        args['frequency'] = np.array(frequencies)
+        args['frequency_error'] = np.zeros(len(frequencies))
+        args['function'] = tuple(partial(sinfunc, A=A_, p=p_, c=c_, f=f_)
+                                 for A_, p_, c_, f_ in zip(A, p, c, frequencies))
+
+        params = Params(**args)
+        return params
+
+    @staticmethod
+    def fit(x, Y, frequencies):
+        '''
+        :param x: time vector shared by all signals
+        :param Y: signals x samples array
+        :param frequencies: frequency of every signal
+        return sinus and cosinus coefficients, offsets and covariance matrices
+        '''
+        n = x.size
+        # cos + i sin of every sample, sums of products of regressors follow from it
+        E = cached_phasors(x, frequencies)
+        E1 = E.sum(axis=1)
+        E2 = np.einsum('ij,ij->i', E, E)
+        S1, C1 = E1.imag, E1.real
+        SS = (n - E2.real) / 2
+        CC = (n + E2.real) / 2
+        SC = E2.imag / 2
+
+        # normal equations D^T D beta = D^T y of every signal, D = [sin, cos, 1]
+        N = np.full(len(frequencies), float(n))
+        DD = np.stack([np.stack([SS, SC, S1], axis=-1),
+                       np.stack([SC, CC, C1], axis=-1),
+                       np.stack([S1, C1, N], axis=-1)], axis=-2)
+        Dy = np.stack([np.einsum('ij,ij->i', E.imag, Y),
+                       np.einsum('ij,ij->i', E.real, Y),
+                       Y.sum(axis=1)], axis=-1)
+
+        DD_inv = np.linalg.inv(DD)
+        beta = np.einsum('...ij,...j->...i', DD_inv, Dy)
+        a, b, c = beta[:, 0], beta[:, 1], beta[:, 2]
+
+        # residual sum of squares at the minimum, without computing residuals
+        rss = np.einsum('ij,ij->i', Y, Y) - np.einsum('...i,...i', beta, Dy)
+        variance = np.maximum(rss, 0) / max(n - 3, 1)
+        cov = DD_inv * variance[:, None, None]
+        return a, b, c, cov
+
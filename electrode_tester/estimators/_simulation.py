@@ -0,0 +1,74 @@
+import time
+
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+from ._base_estimator import BaseEstimator
+
+PARAMETERS = ('amplitude', 'phase', 'offset')
+
+RANGES = {
+    'amplitude': (0.1, 4.),
+    'phase': (0., 2 * np.pi),
+    'offset': (-1., 1.),
+}
+
+
+def synthetic_signals(frequencies:Iterable[float], fs:float, T:float, snr:float, *, trials:int,
+                      rng:np.random.Generator=None, ranges:Dict=RANGES) -> Tuple[np.ndarray, np.ndarray, Dict]:
+    '''
+    :param frequencies: frequencies of signals
+    :param fs: sampling rate in Hz
+    :param T: duration of signals in seconds
+    :param snr: signal to noise ratio in dB, inf for signals without noise
+    :param trials: number of signals of every frequency
+    :param rng: generator of random numbers, new one if None
+    :param ranges: ranges of uniformly drawn amplitude, phase and offset
+    return time vector, signals x samples array and true parameters of signals,
+    signals of the same frequency are next to each other
+    '''
+    rng = rng if rng is not None else np.random.default_rng()
+    t = np.arange(int(round(fs * T))) / fs
+    n = len(frequencies) * trials
+    truth = {'frequency': np.repeat(np.asarray(frequencies, dtype=float), trials)}
+    for name in PARAMETERS:
+        truth[name] = rng.uniform(*ranges[name], size=n)
+
+    Y = np.sin(2 * np.pi * truth['frequency'][:, np.newaxis] * t + truth['phase'][:, np.newaxis])
+    Y *= truth['amplitude'][:, np.newaxis]
+    Y += truth['offset'][:, np.newaxis]
+    if np.isfinite(snr):
+        noise_std = truth['amplitude'] / np.sqrt(2) / 10 ** (snr / 20)
+        Y += rng.standard_normal(Y.shape) * noise_std[:, np.newaxis]
+    return t, Y, truth
+
+
+def estimation_errors(estimator:BaseEstimator, t:np.ndarray, Y:np.ndarray, truth:Dict, fs:float,
+                      **estimator_params) -> Tuple[Dict, Dict, float]:
+    '''
+    :param estimator: tested estimator
+    :param t: time vector
+    :param Y: signals x samples array
+    :param truth: true parameters returned by `synthetic_signals`
+    :param fs: sampling rate in Hz
+    return errors of amplitude, phase and offset of every signal, errors reported by the estimator
+    and seconds of estimation
+    '''
+    # estimators are not allowed to change signals, but the copy is not timed
+    Y = Y.copy()
+    start = time.perf_counter()
+    params = estimator.estimate_batch(t, Y, truth['frequency'], fs=fs, **estimator_params)
+    seconds = time.perf_counter() - start
+
+    errors = {}
+    reported = {}
+    for name in PARAMETERS:
+        error = np.asarray(getattr(params, name), dtype=float) - truth[name]
+        if name == 'phase':
+            error = np.angle(np.exp(1j * error))
+        errors[name] = error
+        reported_error = getattr(params, name + '_error')
+        reported[name] = (np.broadcast_to(np.asarray(reported_error, dtype=float), error.shape)
+                          if reported_error is not None else np.full(error.shape, np.nan))
+    return errors, reported, seconds
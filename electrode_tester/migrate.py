@@ -0,0 +1,261 @@
+"""
+Conversion of experiments saved as pickle trees (exp file, folder with mes
+files and folders with cont files) to chunked storage.
+
+Every experiment found in `results_path` is converted in a process pool and
+written to `destination` under the same name. Converted data are compared
+with the source before the experiment file is published, and already
+converted experiments are skipped, so the conversion can be interrupted and
+run again.
+
+usage: python -m electrode_tester.migrate RESULTS_PATH [DESTINATION] [options]
+"""
+import argparse
+import copy
+import os
+import pickle
+import sys
+import traceback
+
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Union, List
+
+import numpy as np
+
+from ._experiment import Experiment
+from ._signal_container import SignalContainer
+from .storage import ChunkedFile, Durability, SAMPLE_FORMATS
+
+MigrationResult = namedtuple('MigrationResult', ['source', 'destination', 'status', 'measurements', 'error'])
+
+MIGRATED = 'migrated'
+SKIPPED = 'skipped'
+FAILED = 'failed'
+
+_PARTIAL = '.partial'
+
+
+def default_destination(results_path:Union[str, Path]) -> Path:
+    '''
+    :param results_path: folder with experiments saved as pickle trees
+    return folder next to `results_path` for converted experiments
+    '''
+    results_path = Path(results_path)
+    return results_path.with_name(results_path.name + '_chunked')
+
+
+def find_experiments(results_path:Union[str, Path]) -> List[Path]:
+    '''
+    :param results_path: folder with experiments
+    return sorted paths of experiments saved as pickle trees
+    '''
+    paths = []
+    for path in sorted(Path(results_path).glob('*.exp')):
+        if Experiment.load(path).storage == 'pickle':
+            paths.append(path)
+    return paths
+
+
+def migrate_experiment(path:Union[str, Path], destination:Union[str, Path], *,
+                       sample_format:str=None, verify:bool=True,
+                       overwrite:bool=False) -> MigrationResult:
+    '''
+    :param path: exp file of experiment saved as pickle tree
+    :param destination: folder for converted experiment
+    :param sample_format: format of converted samples, format of the experiment if None
+    :param verify: if compare converted data with the source
+    :param overwrite: if convert again already converted experiment
+    convert one experiment to chunked storage, errors are returned in the result
+    '''
+    path = Path(path)
+    destination = Path(destination)
+    target = destination / path.name
+    try:
+        source = Experiment.load(path)
+        if source.storage != 'pickle':
+            raise ValueError(f'"{path}" is not saved as pickle tree')
+
+        if target.exists() and not overwrite:
+            converted = Experiment.load(target)
+            try:
+                # converted experiment is published last, so it is complete
+                if verify:
+                    _verify(source, converted)
+                return MigrationResult(path, target, SKIPPED, len(converted), None)
+            finally:
+                converted.close()
+
+        destination.mkdir(parents=True, exist_ok=True)
+        if target.exists():
+            # old chunked file must not be published with old exp file
+            target.unlink()
+        n_measurements = _convert(source, target, sample_format)
+        converted = Experiment.load(target)
+        try:
+            if verify:
+                _verify(source, converted)
+        finally:
+            converted.close()
+        return MigrationResult(path, target, MIGRATED, n_measurements, None)
+    except Exception:
+        return MigrationResult(path, target, FAILED, 0, traceback.format_exc())
+
+
+def migrate(results_path:Union[str, Path], destination:Union[str, Path]=None, *,
+            processes:int=None, sample_format:str=None, verify:bool=True,
+            overwrite:bool=False, progress=None) -> List[MigrationResult]:
+    '''
+    :param results_path: folder with experiments saved as pickle trees
+    :param destination: folder for converted experiments, `default_destination` if None
+    :param processes: number of worker processes, number of CPUs if None, 1 converts in this process
+    :param sample_format: format of converted samples, format of every experiment if None
+    :param verify: if compare converted data with the source
+    :param overwrite: if convert again already converted experiments
+    :param progress: function called with every `MigrationResult` when it is ready
+    convert all experiments from `results_path`, return results in order of experiments
+    '''
+    if processes is not None and (not isinstance(processes, int) or processes <= 0):
+        raise ValueError(f'"processes" should be positive integer, not "{processes}"')
+    if sample_format is not None and sample_format not in SAMPLE_FORMATS:
+        formats = '", "'.join(SAMPLE_FORMATS)
+        raise ValueError(f'"sample_format" should be one of "{formats}", not "{sample_format}"')
+
+    destination = Path(destination) if destination is not None else default_destination(results_path)
+    paths = find_experiments(results_path)
+    options = dict(sample_format=sample_format, verify=verify, overwrite=overwrite)
+
+    results = []
+    if processes == 1:
+        for path in paths:
+            results.append(migrate_experiment(path, destination, **options))
+            if progress is not None:
+                progress(results[-1])
+        return results
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [executor.submit(migrate_experiment, path, destination, **options) for path in paths]
+        for future in futures:
+            results.append(future.result())
+            if progress is not None:
+                progress(results[-1])
+    return results
+
+
+def _convert(source:Experiment, target:Path, sample_format:Union[str, None]) -> int:
+    '''
+    :param source: loaded experiment saved as pickle tree
+    :param target: path of converted exp file
+    :param sample_format: format of converted samples, format of the experiment if None
+    write chunked file and exp file under temporary names, then rename them
+    '''
+    sample_format = sample_format or source.sample_format
+    data_path = target.with_suffix(ChunkedFile.SUFFIX)
+    partial_data_path = target.with_name(target.stem + _PARTIAL + ChunkedFile.SUFFIX)
+    partial_path = target.with_name(target.name + _PARTIAL)
+    durability = Durability('file')
+
+    metadata = {
+        'uuid': source.uuid,
+        'date': source._date,
+        'sampling_rate': source.sampling_rate,
+        'sampling_time': source.sampling_time,
+    }
+    store = ChunkedFile.create(partial_data_path, frequencies=source.frequencies,
+                               n_samples=int(source.sampling_rate * source.sampling_time),
+                               dtype=sample_format, metadata=metadata, overwrite=True)
+    try:
+        n_measurements = 0
+        for measurement in source:
+            index = store.append_try()
+            for frequency_index, container in enumerate(measurement):
+                store.write_container(index, frequency_index, container.data)
+            header = measurement._to_header()
+            header['measurements_data'] = list(range(len(measurement._measurements_data)))
+            store.write_header(index, header)
+            n_measurements += 1
+        durability.written(store)
+    finally:
+        store.close()
+
+    object_data = copy.copy(source.__dict__)
+    for name in ('_Experiment__store', '_Experiment__mmap', '_Experiment__catalog',
+                 '_Experiment__working_dir', '_Experiment__iter_measurements'):
+        object_data.pop(name, None)
+    object_data['_storage'] = 'chunked'
+    object_data['_sample_format'] = sample_format
+    object_data['_measurements'] = list(range(n_measurements))
+    object_data['_results_path'] = target.parent
+    object_data['_device'] = None
+    with open(partial_path, 'wb') as file:
+        pickle.dump(object_data, file)
+        durability.written(file)
+
+    # exp file is renamed last, its presence marks finished conversion
+    os.replace(partial_data_path, data_path)
+    os.replace(partial_path, target)
+    Durability._sync_folder(target.parent)
+    return n_measurements
+
+
+def _verify(source:Experiment, converted:Experiment) -> None:
+    '''
+    :param source: experiment saved as pickle tree
+    :param converted: the same experiment saved in chunked storage
+    raise ValueError if metadata or samples of experiments differ
+    '''
+    if source.uuid != converted.uuid:
+        raise ValueError(f'uuid "{converted.uuid}" differs from source "{source.uuid}"')
+    if len(source) != len(converted):
+        raise ValueError(f'{len(converted)} measurements converted, source has {len(source)}')
+    sample_format = converted.sample_format
+    for position, (expected, actual) in enumerate(zip(source, converted)):
+        if expected.uuid != actual.uuid or expected.frequencies != actual.frequencies:
+            raise ValueError(f'measurement {position} differs from source')
+        if len(expected._measurements_data) != len(actual._measurements_data):
+            raise ValueError(f'measurement {position} has different number of containers')
+        for expected_container, actual_container in zip(expected, actual):
+            # lossy formats are compared with source encoded the same way
+            expected_data = SignalContainer(expected_container.data,
+                                            frequency=expected_container.frequency).encode(sample_format).data
+            if not np.array_equal(expected_data, actual_container.data):
+                raise ValueError(f'samples of measurement {position} for frequency '
+                                 f'{expected_container.frequency} differ from source')
+
+
+def main(argv:List[str]=None) -> int:
+    '''
+    :param argv: command line arguments, `sys.argv[1:]` if None
+    console entry point, return exit code
+    '''
+    parser = argparse.ArgumentParser(prog='python -m electrode_tester.migrate',
+                                     description='Convert experiments saved as pickle trees to chunked storage.')
+    parser.add_argument('results_path', type=Path, help='folder with experiments')
+    parser.add_argument('destination', type=Path, nargs='?',
+                        help='folder for converted experiments, RESULTS_PATH_chunked by default')
+    parser.add_argument('-j', '--processes', type=int, default=None,
+                        help='number of worker processes, number of CPUs by default')
+    parser.add_argument('--sample-format', choices=SAMPLE_FORMATS, default=None,
+                        help='format of converted samples, format of every experiment by default')
+    parser.add_argument('--no-verify', dest='verify', action='store_false',
+                        help='do not compare converted data with the source')
+    parser.add_argument('--overwrite', action='store_true',
+                        help='convert again already converted experiments')
+    args = parser.parse_args(argv)
+
+    def report(result:MigrationResult) -> None:
+        print(f'{result.status:>8} {result.source.name} ({result.measurements} measurements)')
+        if result.error:
+            print(result.error, file=sys.stderr)
+
+    results = migrate(args.results_path, args.destination, processes=args.processes,
+                      sample_format=args.sample_format, verify=args.verify,
+                      overwrite=args.overwrite, progress=report)
+    failed = sum(result.status == FAILED for result in results)
+    print(f'{len(results) - failed} of {len(results)} experiments converted')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
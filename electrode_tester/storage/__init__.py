@@ -0,0 +1,4 @@
+from ._chunked_file import ChunkedFile
+from ._durability import Durability
+from ._writer import BackgroundWriter
+from ._encoding import SAMPLE_FORMATS, encode, decode
@@ -0,0 +1,489 @@
+import json
+import os
+import struct
+import threading
+
+from pathlib import Path
+from typing import Union, Iterable, Dict, List
+
+import numpy as np
+
+from ._encoding import encode, decode, check_sample_format
+
+class ChunkedFile:
+    '''
+    Single binary file holding all signals of one experiment.
+
+    Layout of the file:
+        file header  - magic, length of JSON metadata, JSON metadata, padded to `header_size`
+        chunk 0      - try header (JSON) padded to `chunk_header_size`, which grows
+                       with number of frequencies, then
+                       for integer samples frequencies x 2 x channels array of
+                       scales and offsets padded to `scale_size`, then
+                       frequencies x channels x samples array of samples
+        chunk 1      - ...
+
+    Every chunk has the same size, so chunk `i` starts at
+    `header_size + i * chunk_size` and any container can be read without
+    scanning the file. Samples of all tries form a
+    tries x frequencies x channels x samples array.
+
+    Samples are saved as float64, float32 or int16 codes with per channel
+    scale and offset (see `SAMPLE_FORMATS`). Readers decode them to float64
+    unless `raw=True` is passed.
+
+    With `mmap=True` samples are not read into memory, readers return read
+    only views of memory mapped file instead.
+
+    Methods can be called from many threads.
+    '''
+
+    MAGIC = b'ETDCHUNK'
+    VERSION = 1
+    SUFFIX = '.etd'
+
+    _ALIGNMENT = 4096
+    _LENGTH = struct.Struct('<Q')
+    # try header lists every frequency with the entry of its container, other fields fit in the rest
+    _TRY_HEADER_BASE = 2048
+    _ENTRY_SIZE = 24
+
+    def __init__(self, path:Union[str, Path], mode:str='r', *, mmap:bool=False):
+        '''
+        :param path: path to existing file with etd extension
+        :param mode: "r" for reading, "r+" for reading and writing
+        :param mmap: if return views of memory mapped file instead of reading samples
+        open existing file
+        '''
+        if mode not in ('r', 'r+'):
+            raise ValueError(f'"mode" should be "r" or "r+", not "{mode}"')
+
+        self._path = Path(path)
+        if self._path.suffix != self.SUFFIX:
+            raise ValueError(f'Wrong file extension! Load "{self.SUFFIX[1:]}" file.')
+        self._mode = mode
+        self._mmap = mmap
+        self._map = None
+        self._lock = threading.RLock()
+        self._file = open(self._path, mode + 'b')
+
+        magic = self._file.read(len(self.MAGIC))
+        if magic != self.MAGIC:
+            self._file.close()
+            raise ValueError(f'"{self._path}" is not chunked experiment file')
+        header = self._read_json(len(self.MAGIC))
+
+        if header['version'] > self.VERSION:
+            self._file.close()
+            raise ValueError(f'Unsupported file version "{header["version"]}"')
+
+        self._header = header
+        self._frequencies = tuple(header['frequencies'])
+        self._dtype = np.dtype(header['dtype'])
+        self._shape = (len(self._frequencies), header['n_channels'], header['n_samples'])
+        self._header_size = header['header_size']
+        self._chunk_header_size = header['chunk_header_size']
+        self._scale_size = header.get('scale_size', 0)
+
+    @classmethod
+    def create(cls, path:Union[str, Path], *, frequencies:Iterable[Union[int, float]],
+               n_samples:int, n_channels:int=3, dtype:str='float64',
+               metadata:Dict=None, overwrite:bool=False, chunk_header_size:int=None) -> 'ChunkedFile':
+        '''
+        :param path: path of the new file
+        :param frequencies: frequencies measured in every try
+        :param n_samples: number of samples of one signal
+        :param n_channels: number of channels of one container
+        :param dtype: type of stored samples, one of `SAMPLE_FORMATS`
+        :param metadata: JSON serializable experiment metadata
+        :param overwrite: if overwrite existing file
+        :param chunk_header_size: bytes reserved for header of every try,
+                                  enough for header listing every frequency twice if None
+        create new empty file and open it for writing
+        '''
+        path = Path(path)
+        if path.suffix != cls.SUFFIX:
+            raise ValueError(f'Wrong file extension! Save "{cls.SUFFIX[1:]}" file.')
+        if path.exists() and not overwrite:
+            raise IOError(f'File "{path}" already exists')
+
+        dtype = np.dtype(check_sample_format(np.dtype(dtype).name))
+        frequencies = list(frequencies)
+        if chunk_header_size is None:
+            chunk_header_size = cls._chunk_header_size_for(frequencies)
+        if not isinstance(chunk_header_size, int) or chunk_header_size <= cls._LENGTH.size:
+            raise ValueError(f'"chunk_header_size" should be integer bigger than {cls._LENGTH.size}, '
+                             f'not "{chunk_header_size}"')
+        scale_size = 0
+        if dtype.kind == 'i':
+            scale_size = cls._align(len(frequencies) * 2 * n_channels * np.dtype(np.float64).itemsize)
+
+        header = {
+            'version': cls.VERSION,
+            'frequencies': frequencies,
+            'n_channels': int(n_channels),
+            'n_samples': int(n_samples),
+            'dtype': np.dtype(dtype).str,
+            'chunk_header_size': cls._align(chunk_header_size),
+            'scale_size': scale_size,
+            'metadata': metadata or {},
+        }
+        # header size depends on itself, so reserve place for its digits
+        header['header_size'] = 0
+        raw_length = len(cls.MAGIC) + cls._LENGTH.size + len(json.dumps(header)) + 32
+        header['header_size'] = cls._align(raw_length)
+
+        with open(path, 'wb') as file:
+            file.write(cls.MAGIC)
+            file.write(cls._encode_json(header, header['header_size'] - len(cls.MAGIC)))
+
+        return cls(path, mode='r+')
+
+    def __len__(self) -> int:
+        '''
+        return number of tries in the file
+        '''
+        size = os.fstat(self._file.fileno()).st_size
+        return max(0, (size - self._header_size) // self.chunk_size)
+
+    def __repr__(self) -> str:
+        '''
+        return string representation of the object
+        '''
+        return f'ChunkedFile(path="{self._path}", tries={len(self)}, shape={self._shape})'
+
+    def __enter__(self) -> 'ChunkedFile':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def __getstate__(self) -> dict:
+        return {'path': self._path, 'mode': self._mode, 'mmap': self._mmap}
+
+    def __setstate__(self, state) -> None:
+        self.__init__(state['path'], mode=state['mode'], mmap=state.get('mmap', False))
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @property
+    def name(self) -> str:
+        return str(self._path)
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+    @property
+    def frequencies(self) -> tuple:
+        return self._frequencies
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self._dtype
+
+    @property
+    def scaled(self) -> bool:
+        '''
+        return True if samples are saved as integer codes with scales and offsets
+        '''
+        return self._scale_size > 0
+
+    @property
+    def mmap(self) -> bool:
+        return self._mmap
+
+    @property
+    def metadata(self) -> dict:
+        return dict(self._header['metadata'])
+
+    @property
+    def chunk_shape(self) -> tuple:
+        '''
+        shape of samples of one try: frequencies x channels x samples
+        '''
+        return self._shape
+
+    @property
+    def container_shape(self) -> tuple:
+        '''
+        shape of samples of one container: channels x samples
+        '''
+        return self._shape[1:]
+
+    @property
+    def chunk_size(self) -> int:
+        return self._chunk_header_size + self._scale_size + self._align(self._data_size)
+
+    @property
+    def _data_size(self) -> int:
+        return int(np.prod(self._shape)) * self._dtype.itemsize
+
+    @property
+    def _container_size(self) -> int:
+        return int(np.prod(self._shape[1:])) * self._dtype.itemsize
+
+    def append_try(self, header:Dict=None) -> int:
+        '''
+        :param header: JSON serializable metadata of the try
+        reserve space for new try and return its index
+        '''
+        self._check_writable()
+        with self._lock:
+            index = len(self)
+            self._file.truncate(self._chunk_offset(index + 1))
+            self.write_header(index, header or {})
+        return index
+
+    def write_header(self, index:int, header:Dict) -> None:
+        '''
+        :param index: index of the try
+        :param header: JSON serializable metadata of the try
+        overwrite metadata of the try
+        '''
+        self._check_writable()
+        self._check_index(index)
+        raw = self._encode_json(header, self._chunk_header_size)
+        with self._lock:
+            self._file.seek(self._chunk_offset(index))
+            self._file.write(raw)
+
+    def read_header(self, index:int) -> dict:
+        '''
+        :param index: index of the try
+        return metadata of the try
+        '''
+        self._check_index(index)
+        return self._read_json(self._chunk_offset(index))
+
+    def headers(self) -> List[dict]:
+        '''
+        return metadata of all tries
+        '''
+        return [self.read_header(index) for index in range(len(self))]
+
+    def write_container(self, index:int, frequency_index:int, data:np.ndarray) -> None:
+        '''
+        :param index: index of the try
+        :param frequency_index: index of the frequency in `frequencies`
+        :param data: channels x samples array
+        write samples of one container, encoded to type of the file
+        '''
+        self._check_writable()
+        self._check_index(index)
+        data = np.asarray(data)
+        if data.shape != self.container_shape:
+            raise ValueError(f'data should be shape {self.container_shape}, not {data.shape}')
+        codes, scale, offset = encode(data, self._dtype.name)
+        raw = np.ascontiguousarray(codes).tobytes()
+        with self._lock:
+            self._file.seek(self._container_offset(index, frequency_index))
+            self._file.write(raw)
+            if self.scaled:
+                self._file.seek(self._scale_offset(index, frequency_index))
+                self._file.write(np.stack([scale, offset]).astype(np.float64).tobytes())
+
+    def read_container(self, index:int, frequency_index:int, *, raw:bool=False) -> np.ndarray:
+        '''
+        :param index: index of the try
+        :param frequency_index: index of the frequency in `frequencies`
+        :param raw: if return samples as saved, without decoding
+        return channels x samples array of one container
+        '''
+        self._check_index(index)
+        offset = self._container_offset(index, frequency_index)
+        if self._mmap:
+            data = self._view(offset, self.container_shape)
+        else:
+            with self._lock:
+                self._file.seek(offset)
+                data = np.fromfile(self._file, dtype=self._dtype,
+                                   count=int(np.prod(self.container_shape)))
+            data = data.reshape(self.container_shape)
+        if raw:
+            return data
+        return decode(data, *self.read_scale(index, frequency_index))
+
+    def read_scale(self, index:int, frequency_index:int) -> tuple:
+        '''
+        :param index: index of the try
+        :param frequency_index: index of the frequency in `frequencies`
+        return per channel scale and offset of the container, (None, None) for float samples
+        '''
+        self._check_index(index)
+        if not self.scaled:
+            return None, None
+        with self._lock:
+            self._file.seek(self._scale_offset(index, frequency_index))
+            scale, offset = np.fromfile(self._file, dtype=np.float64,
+                                        count=2 * self._shape[1]).reshape(2, -1)
+        return scale, offset
+
+    def read_scales(self, index:int) -> tuple:
+        '''
+        :param index: index of the try
+        return frequencies x channels arrays of scales and offsets, (None, None) for float samples
+        '''
+        self._check_index(index)
+        if not self.scaled:
+            return None, None
+        frequencies, channels, _ = self._shape
+        with self._lock:
+            self._file.seek(self._scale_offset(index, 0))
+            scales = np.fromfile(self._file, dtype=np.float64,
+                                 count=frequencies * 2 * channels).reshape(frequencies, 2, channels)
+        return scales[:, 0], scales[:, 1]
+
+    def read_try(self, index:int, *, raw:bool=False) -> np.ndarray:
+        '''
+        :param index: index of the try
+        :param raw: if return samples as saved, without decoding
+        return frequencies x channels x samples array of the try in one read
+        '''
+        self._check_index(index)
+        offset = self._data_offset(index)
+        if self._mmap:
+            data = self._view(offset, self._shape)
+        else:
+            with self._lock:
+                self._file.seek(offset)
+                data = np.fromfile(self._file, dtype=self._dtype, count=int(np.prod(self._shape)))
+            data = data.reshape(self._shape)
+        if raw:
+            return data
+        return decode(data, *self.read_scales(index))
+
+    def read(self, *, raw:bool=False) -> np.ndarray:
+        '''
+        :param raw: if return samples as saved, without decoding
+        return tries x frequencies x channels x samples array of all samples
+        read with one sequential read, or view of memory mapped file
+        '''
+        with self._lock:
+            tries = len(self)
+            if self._mmap:
+                buffer = self._mapped(self._chunk_offset(tries))[self._header_size:]
+            else:
+                self._file.seek(self._header_size)
+                buffer = bytearray(tries * self.chunk_size)
+                self._file.readinto(buffer)
+        itemsize = self._dtype.itemsize
+        frequencies, channels, samples = self._shape
+        data = np.ndarray(shape=(tries, *self._shape), dtype=self._dtype, buffer=buffer,
+                          offset=self._chunk_header_size + self._scale_size,
+                          strides=(self.chunk_size, channels * samples * itemsize,
+                                   samples * itemsize, itemsize))
+        if not raw:
+            scale, offset = None, None
+            if self.scaled:
+                scales = np.ndarray(shape=(tries, frequencies, 2, channels), dtype=np.float64,
+                                    buffer=buffer, offset=self._chunk_header_size,
+                                    strides=(self.chunk_size, 2 * channels * 8, channels * 8, 8))
+                scale, offset = scales[:, :, 0], scales[:, :, 1]
+            return decode(data, scale, offset)
+        if self._mmap:
+            data.flags.writeable = False
+        return data
+
+    def flush(self) -> None:
+        '''
+        flush written data to the operating system
+        '''
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+
+    def fileno(self) -> int:
+        '''
+        return file descriptor of the opened file
+        '''
+        return self._file.fileno()
+
+    def close(self) -> None:
+        '''
+        close the file, views returned earlier stay valid
+        '''
+        with self._lock:
+            self._map = None
+            if not self._file.closed:
+                self._file.close()
+
+    def _mapped(self, size:int) -> np.memmap:
+        '''
+        :param size: number of bytes from the beginning of the file which must be mapped
+        return bytes of memory mapped file, mapping again if the file has grown
+        '''
+        with self._lock:
+            if self._map is None or len(self._map) < size:
+                self.flush()
+                self._map = np.memmap(self._path, dtype=np.uint8, mode='r')
+            return self._map
+
+    def _view(self, offset:int, shape:tuple) -> np.ndarray:
+        '''
+        :param offset: position of the samples in the file
+        :param shape: shape of returned array
+        return read only view of samples in memory mapped file
+        '''
+        size = int(np.prod(shape)) * self._dtype.itemsize
+        raw = self._mapped(offset + size)[offset:offset + size]
+        return raw.view(self._dtype).reshape(shape)
+
+    def _check_writable(self) -> None:
+        if self._mode != 'r+':
+            raise IOError(f'File "{self._path}" is opened read only')
+
+    def _check_index(self, index:int) -> None:
+        if not 0 <= index < len(self):
+            raise IndexError('"index" must be between 0 and number of tries')
+
+    def _chunk_offset(self, index:int) -> int:
+        return self._header_size + index * self.chunk_size
+
+    def _data_offset(self, index:int) -> int:
+        return self._chunk_offset(index) + self._chunk_header_size + self._scale_size
+
+    def _container_offset(self, index:int, frequency_index:int) -> int:
+        self._check_frequency_index(frequency_index)
+        return self._data_offset(index) + frequency_index * self._container_size
+
+    def _scale_offset(self, index:int, frequency_index:int) -> int:
+        self._check_frequency_index(frequency_index)
+        channel_scales_size = 2 * self._shape[1] * np.dtype(np.float64).itemsize
+        return (self._chunk_offset(index) + self._chunk_header_size
+                + frequency_index * channel_scales_size)
+
+    def _check_frequency_index(self, frequency_index:int) -> None:
+        if not 0 <= frequency_index < len(self._frequencies):
+            raise IndexError('"frequency_index" must be between 0 and number of frequencies')
+
+    def _read_json(self, offset:int) -> dict:
+        with self._lock:
+            self._file.seek(offset)
+            length, = self._LENGTH.unpack(self._file.read(self._LENGTH.size))
+            raw = self._file.read(length)
+        if not length:
+            return {}
+        return json.loads(raw.decode('utf-8'))
+
+    @classmethod
+    def _encode_json(cls, data:Dict, size:int) -> bytes:
+        raw = json.dumps(data).encode('utf-8')
+        if len(raw) + cls._LENGTH.size > size:
+            raise ValueError(f'metadata does not fit in {size} bytes')
+        return (cls._LENGTH.pack(len(raw)) + raw).ljust(size, b'\0')
+
+    @classmethod
+    def _chunk_header_size_for(cls, frequencies:List[Union[int, float]]) -> int:
+        '''
+        :param frequencies: frequencies measured in every try
+        return aligned size of try header with every frequency and entry of its container
+        '''
+        per_frequency = max((len(json.dumps(f)) for f in frequencies), default=0) + 2 + cls._ENTRY_SIZE
+        return cls._align(cls._TRY_HEADER_BASE + len(frequencies) * per_frequency)
+
+    @classmethod
+    def _align(cls, size:int) -> int:
+        return -(-size // cls._ALIGNMENT) * cls._ALIGNMENT
@@ -0,0 +1,98 @@
+import os
+
+from pathlib import Path
+
+
+class Durability:
+    '''
+    Decides when written files are forced to disk.
+
+    Modes:
+        "none"        - leave flushing to the operating system
+        "file"        - fsync every file right after it is written
+        "measurement" - fsync all files written during a measurement once it is finished
+        "experiment"  - fsync all files written during an experiment once it is finished
+
+    Contrary to `os.sync()` only files written by the experiment are synchronized.
+    '''
+
+    MODES = ('none', 'file', 'measurement', 'experiment')
+
+    def __init__(self, mode:str='file'):
+        '''
+        :param mode: one of `Durability.MODES`
+        '''
+        if mode not in self.MODES:
+            modes = '", "'.join(self.MODES)
+            raise ValueError(f'"mode" should be one of "{modes}", not "{mode}"')
+        self._mode = mode
+        self._pending = set()
+
+    def __repr__(self) -> str:
+        return f'Durability(mode="{self._mode}")'
+
+    def __getstate__(self) -> dict:
+        return {'_mode': self._mode, '_pending': set()}
+
+    @property
+    def mode(self) -> str:
+        return self._mode
+
+    @property
+    def pending(self) -> int:
+        '''
+        return number of files waiting for synchronization
+        '''
+        return len(self._pending)
+
+    def written(self, file) -> None:
+        '''
+        :param file: opened file object which was just written
+        synchronize the file now or remember it for group commit
+        '''
+        if self._mode == 'none':
+            return
+        file.flush()
+        if self._mode == 'file':
+            os.fsync(file.fileno())
+            return
+        self._pending.add(Path(file.name))
+
+    def commit(self, level:str) -> None:
+        '''
+        :param level: "measurement" or "experiment", what has just finished
+        synchronize files remembered for group commit
+        '''
+        if level not in ('measurement', 'experiment'):
+            raise ValueError(f'"level" should be "measurement" or "experiment", not "{level}"')
+        if self._mode == 'measurement' or level == 'experiment':
+            self.sync()
+
+    def sync(self) -> None:
+        '''
+        synchronize all remembered files and their folders
+        '''
+        folders = set()
+        for path in self._pending:
+            if not path.exists():
+                continue
+            with open(path, 'ab') as file:
+                os.fsync(file.fileno())
+            folders.add(path.parent)
+        for folder in folders:
+            self._sync_folder(folder)
+        self._pending.clear()
+
+    @staticmethod
+    def _sync_folder(folder:Path) -> None:
+        '''
+        :param folder: folder with new files
+        make creation of files durable, not possible on every system
+        '''
+        if not hasattr(os, 'O_DIRECTORY'):
+            return
+        fd = os.open(folder, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
@@ -0,0 +1,54 @@
+from typing import Tuple, Union
+
+import numpy as np
+
+SAMPLE_FORMATS = ('float64', 'float32', 'int16')
+
+
+def check_sample_format(sample_format:str) -> str:
+    '''
+    :param sample_format: name of the format of saved samples
+    return valid sample format or raise ValueError
+    '''
+    if sample_format not in SAMPLE_FORMATS:
+        formats = '", "'.join(SAMPLE_FORMATS)
+        raise ValueError(f'"sample_format" should be one of "{formats}", not "{sample_format}"')
+    return sample_format
+
+
+def encode(data:np.ndarray, sample_format:str) -> Tuple[np.ndarray, Union[np.ndarray, None], Union[np.ndarray, None]]:
+    '''
+    :param data: channels x samples array
+    :param sample_format: one of `SAMPLE_FORMATS`
+    return samples converted to `sample_format` with per channel scale and offset,
+    scale and offset are None for floating point formats
+    '''
+    dtype = np.dtype(check_sample_format(sample_format))
+    data = np.asarray(data, dtype=np.float64)
+    if dtype.kind == 'f':
+        return data.astype(dtype, copy=False), None, None
+
+    # whole range of integer codes is used by every channel
+    info = np.iinfo(dtype)
+    low = data.min(axis=-1)
+    high = data.max(axis=-1)
+    offset = (high + low) / 2
+    scale = (high - low) / (float(info.max) - float(info.min))
+    scale[scale == 0] = 1.
+    codes = np.rint((data - offset[..., None]) / scale[..., None])
+    codes = np.clip(codes, info.min, info.max).astype(dtype)
+    return codes, scale, offset
+
+
+def decode(codes:np.ndarray, scale:np.ndarray=None, offset:np.ndarray=None) -> np.ndarray:
+    '''
+    :param codes: saved samples, channels in the last but one axis
+    :param scale: per channel scale, None for floating point samples
+    :param offset: per channel offset, None for floating point samples
+    return samples as float64 array, float64 samples are returned without copying
+    '''
+    if scale is None:
+        if codes.dtype == np.float64:
+            return codes
+        return codes.astype(np.float64)
+    return codes * np.asarray(scale)[..., None] + np.asarray(offset)[..., None]
@@ -0,0 +1,105 @@
+import queue
+import threading
+import warnings
+
+
+class BackgroundWriter:
+    '''
+    Runs saving functions in background threads.
+
+    Tasks go through a bounded queue: `submit` blocks when the queue is full,
+    so acquisition can't run away from the disk. The first error raised by
+    a task is re-raised in the thread calling `submit`, `flush` or `close`.
+    '''
+
+    def __init__(self, *, workers:int=1, queue_size:int=8):
+        '''
+        :param workers: number of writing threads
+        :param queue_size: number of tasks waiting for writing before `submit` blocks
+        '''
+        if not isinstance(workers, int) or workers <= 0:
+            raise ValueError(f'"workers" should be positive integer, not "{workers}"')
+        if not isinstance(queue_size, int) or queue_size <= 0:
+            raise ValueError(f'"queue_size" should be positive integer, not "{queue_size}"')
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._error = None
+        self._closed = False
+        self._threads = [threading.Thread(target=self._work, daemon=True,
+                                          name=f'electrode-tester-writer-{i}')
+                         for i in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def __enter__(self) -> 'BackgroundWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        # error raised in the block is not replaced by error of saving
+        self.close(raise_error=exc_type is None)
+
+    @property
+    def pending(self) -> int:
+        '''
+        return number of tasks waiting in the queue
+        '''
+        return self._queue.qsize()
+
+    def submit(self, function, *args, **kwargs) -> None:
+        '''
+        :param function: function saving data
+        queue `function(*args, **kwargs)`, block if the queue is full
+        '''
+        if self._closed:
+            raise RuntimeError('Can\'t submit task to closed "BackgroundWriter"')
+        self._raise_error()
+        self._queue.put((function, args, kwargs))
+
+    def flush(self) -> None:
+        '''
+        wait until all submitted tasks are done
+        '''
+        self._queue.join()
+        self._raise_error()
+
+    def close(self, *, raise_error:bool=True) -> None:
+        '''
+        :param raise_error: if re-raise the first error of tasks, otherwise it is only reported as warning
+        finish submitted tasks and stop threads
+        '''
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        if raise_error:
+            self._raise_error()
+            return
+        with self._lock:
+            error, self._error = self._error, None
+        if error is not None:
+            warnings.warn(f'saving in background failed: {error!r}')
+
+    def _work(self) -> None:
+        while True:
+            task = self._queue.get()
+            try:
+                if task is None:
+                    return
+                function, args, kwargs = task
+                function(*args, **kwargs)
+            except BaseException as error:
+                with self._lock:
+                    if self._error is None:
+                        self._error = error
+            finally:
+                self._queue.task_done()
+
+    def _raise_error(self) -> None:
+        with self._lock:
+            error, self._error = self._error, None
+        if error is not None:
+            raise error
@@ -13,7 +13,12 @@ def limit_measurements(experiemnt, time_limit:timedelta=None):
     time_first_measurement = datetime.fromtimestamp(measurement_first._date)
     time_since_first_measurement = datetime.fromtimestamp(measurement_first._date) - time_first_measurement
     yield time_since_first_measurement, measurement_first
-    for measurement in measurements:
+    # `for` would call `iter` of the experiment again, which starts from the first measurement
+    while True:
+        try:
+            measurement = next(measurements)
+        except StopIteration:
+            return
         if measurement._date - measurement_first._date > time_limit.total_seconds():
             break
         time_since_first_measurement = datetime.fromtimestamp(measurement._date) - time_first_measurement
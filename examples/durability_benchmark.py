@@ -0,0 +1,46 @@
+import time
+
+from contextlib import redirect_stdout, redirect_stderr
+from io import StringIO
+from tempfile import TemporaryDirectory
+
+from electrode_tester import Experiment
+from electrode_tester.devices import DummyDevice
+from electrode_tester.electrodes import ViledaElectrode
+from electrode_tester.storage import Durability
+
+freqs = list(range(1, 101, 1))
+tries = 5
+sampling_rate = 1_000
+
+electrode = ViledaElectrode(
+    salt_type = 'saline',
+    salty_value = 0.9,
+    normal_height= 1.5,
+    squeeze_height = 0.5,
+    height_delta = 0.1,
+    normal_height_var = .1,
+    width = .5,
+)
+
+for storage in ('pickle', 'chunked'):
+    for durability in Durability.MODES:
+        with TemporaryDirectory() as results_path:
+            start = time.perf_counter()
+            with redirect_stdout(StringIO()), redirect_stderr(StringIO()):
+                with Experiment(device=DummyDevice(),
+                                frequencies=freqs,
+                                electrode=electrode,
+                                resistances=('392.000', '385.000'),
+                                sampling_rate=sampling_rate,
+                                sampling_time=5,
+                                tries=tries,
+                                results_path=results_path,
+                                storage=storage,
+                                durability=durability) as e:
+                    e.start()
+            elapsed = time.perf_counter() - start
+
+        containers = tries * len(freqs)
+        print(f'storage={storage:<8} durability={durability:<12} '
+              f'{elapsed:7.2f} s  {containers / elapsed:8.1f} containers/s')
@@ -0,0 +1,87 @@
+import unittest
+import warnings
+
+from contextlib import contextmanager, redirect_stdout, redirect_stderr
+from io import StringIO
+from tempfile import TemporaryDirectory
+
+from electrode_tester import Experiment
+from electrode_tester.devices import DummyDevice
+from electrode_tester.electrodes import ViledaElectrode
+
+RESISTANCES = ('392.000', '385.000')
+
+
+def make_electrode(salt_type='saline'):
+    '''
+    :param salt_type: salt type of the electrode
+    return electrode used by tests
+    '''
+    return ViledaElectrode(salt_type=salt_type, salty_value=0.9, normal_height=1.5,
+                           squeeze_height=0.5, height_delta=0.1,
+                           normal_height_var=0.1, width=0.5)
+
+
+@contextmanager
+def quiet(output=None):
+    '''
+    :param output: stream for progress and messages, new `StringIO` if None
+    hide progress, messages and warnings of experiments
+    '''
+    output = output if output is not None else StringIO()
+    with redirect_stdout(output), redirect_stderr(output), warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        yield output
+
+
+class InterruptedDevice(DummyDevice):
+    '''
+    dummy device interrupted by user after given number of signals
+    '''
+
+    def __init__(self, signals):
+        super().__init__()
+        self.signals = signals
+
+    def get_data(self):
+        if self.signals == 0:
+            raise KeyboardInterrupt
+        self.signals -= 1
+        return super().get_data()
+
+
+class ExperimentTestCase(unittest.TestCase):
+    '''
+    test case with temporary results folder and experiments with dummy device
+    '''
+
+    frequencies = [1, 10]
+
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.electrode = make_electrode()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def make_experiment(self, save_name='experiment', *, device=None, **kwargs) -> Experiment:
+        '''
+        :param save_name: name of experiment file
+        :param device: device of the experiment, new `DummyDevice` if None
+        return new experiment, keyword arguments replace default arguments of `Experiment`
+        '''
+        arguments = dict(frequencies=self.frequencies, electrode=self.electrode, resistances=RESISTANCES,
+                         sampling_rate=100, sampling_time=1, tries=2, results_path=self.tmp_dir.name)
+        arguments.update(kwargs)
+        with quiet():
+            return Experiment(device=device if device is not None else DummyDevice(), save_name=save_name,
+                              **arguments)
+
+    def run_experiment(self, save_name='experiment', *, device=None, **kwargs) -> Experiment:
+        '''
+        return experiment made by `make_experiment` which was run to the end, saved and closed
+        '''
+        experiment = self.make_experiment(save_name, device=device, **kwargs)
+        with quiet(), experiment:
+            experiment.start()
+        return experiment
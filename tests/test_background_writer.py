@@ -0,0 +1,98 @@
+import threading
+import time
+import unittest
+
+from unittest import mock
+
+from electrode_tester._measurement import Measurement
+from electrode_tester.devices import DummyDevice
+from electrode_tester.storage import BackgroundWriter
+
+from .helpers import ExperimentTestCase, quiet
+
+
+class BackgroundWriterTest(unittest.TestCase):
+
+    def test_runs_tasks(self):
+        results = []
+        with BackgroundWriter(queue_size=2) as writer:
+            for i in range(10):
+                writer.submit(results.append, i)
+            writer.flush()
+            self.assertEqual(results, list(range(10)))
+
+    def test_back_pressure(self):
+        release = threading.Event()
+        writer = BackgroundWriter(queue_size=1)
+        writer.submit(release.wait)
+        writer.submit(time.sleep, 0)
+
+        blocked = threading.Thread(target=writer.submit, args=(time.sleep, 0))
+        blocked.start()
+        blocked.join(0.1)
+        self.assertTrue(blocked.is_alive())
+
+        release.set()
+        blocked.join()
+        writer.close()
+
+    def test_error_propagation(self):
+        def fail():
+            raise IOError('disk full')
+
+        writer = BackgroundWriter()
+        writer.submit(fail)
+        with self.assertRaises(IOError):
+            writer.flush()
+        writer.close()
+
+    def test_error_of_block_is_kept(self):
+        def fail():
+            raise IOError('disk full')
+
+        with self.assertWarns(UserWarning), self.assertRaises(ValueError):
+            with BackgroundWriter() as writer:
+                writer.submit(fail)
+                raise ValueError('measurement failed')
+
+    def test_submit_after_close(self):
+        writer = BackgroundWriter()
+        writer.close()
+        with self.assertRaises(RuntimeError):
+            writer.submit(time.sleep, 0)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            BackgroundWriter(workers=0)
+        with self.assertRaises(ValueError):
+            BackgroundWriter(queue_size=0)
+
+
+class FailingDevice(DummyDevice):
+    '''
+    dummy device failing after given number of signals
+    '''
+
+    def __init__(self, signals):
+        super().__init__()
+        self.signals = signals
+
+    def get_data(self):
+        if self.signals == 0:
+            raise RuntimeError('device disconnected')
+        self.signals -= 1
+        return super().get_data()
+
+
+class ExperimentWriterTest(ExperimentTestCase):
+
+    def test_error_of_measurement_is_kept(self):
+        experiment = self.make_experiment(device=FailingDevice(1), write_queue_size=2)
+        with mock.patch.object(Measurement, '_save_container', side_effect=IOError('disk full')):
+            with quiet(), self.assertRaisesRegex(RuntimeError, 'device disconnected'):
+                experiment.start()
+        experiment.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+
+import numpy as np
+
+from electrode_tester import BasisCache, enable_basis_cache, disable_basis_cache
+from electrode_tester._basis import get_basis_cache, phasors, time_vector
+from electrode_tester.estimators import FitSinusThreeParam
+
+
+class BasisCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = BasisCache()
+
+    def tearDown(self):
+        enable_basis_cache()
+
+    def test_time_vector(self):
+        x = self.cache.time_vector(100, 2)
+        np.testing.assert_array_equal(x, np.linspace(0, 2, 200, endpoint=True))
+        self.assertIs(self.cache.time_vector(100, 2), x)
+        self.assertIsNot(self.cache.time_vector(100, 1), x)
+        with self.assertRaises(ValueError):
+            x[0] = 1
+
+    def test_phasors(self):
+        x = self.cache.time_vector(1000, 1)
+        E = self.cache.phasors(x, [5, 10, 5])
+        np.testing.assert_array_equal(E, phasors(x, [5, 10, 5]))
+        misses = self.cache.stats.misses
+        np.testing.assert_array_equal(self.cache.phasors(x, [10, 5]), E[1::-1])
+        self.assertEqual(self.cache.stats.misses, misses)
+
+    def test_foreign_time_vector_is_not_cached(self):
+        x = time_vector(1000, 1)
+        np.testing.assert_array_equal(self.cache.phasors(x, [5]), phasors(x, [5]))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_eviction(self):
+        x = time_vector(1000, 1)
+        cache = BasisCache(max_bytes=4 * x.nbytes)
+        x = cache.time_vector(1000, 1)
+        cache.phasors(x, [1])
+        self.assertEqual(len(cache), 2)
+        cache.phasors(x, [2])
+        self.assertEqual(cache.stats.evictions, 1)
+        self.assertLessEqual(cache.stats.size, cache.max_bytes)
+        # evicted time vector is created again
+        self.assertIsNot(cache.time_vector(1000, 1), x)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+    def test_estimator_uses_active_cache(self):
+        cache = enable_basis_cache()
+        self.assertIs(get_basis_cache(), cache)
+        x = cache.time_vector(1000, 1)
+        Y = np.sin(2 * np.pi * 5 * x)[np.newaxis]
+        expected = FitSinusThreeParam().estimate_batch(x, Y, [5])
+        self.assertEqual(len(cache), 2)
+        disable_basis_cache()
+        params = FitSinusThreeParam().estimate_batch(x, Y, [5])
+        self.assertEqual(params.amplitude[0], expected.amplitude[0])
+        self.assertEqual(params.phase[0], expected.phase[0])
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            BasisCache(max_bytes=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import json
+import os
+import unittest
+
+from contextlib import redirect_stderr
+from io import StringIO
+from tempfile import TemporaryDirectory
+
+import numpy as np
+
+from electrode_tester import benchmark
+from electrode_tester.estimators import FitFourier, FitSinusThreeParam
+
+
+class BenchmarkTest(unittest.TestCase):
+
+    def test_synthetic_signals(self):
+        t, Y, truth = benchmark.synthetic_signals([1, 5], 100, 2, np.inf, trials=3,
+                                                  rng=np.random.default_rng(0))
+        self.assertEqual(Y.shape, (6, 200))
+        np.testing.assert_array_equal(truth['frequency'], [1, 1, 1, 5, 5, 5])
+        expected = truth['amplitude'][4] * np.sin(2 * np.pi * 5 * t + truth['phase'][4]) + truth['offset'][4]
+        np.testing.assert_allclose(Y[4], expected)
+
+    def test_noise(self):
+        _, Y, truth = benchmark.synthetic_signals([10], 1000, 5, 20, trials=50, rng=np.random.default_rng(0))
+        _, clean, _ = benchmark.synthetic_signals([10], 1000, 5, np.inf, trials=50,
+                                                  rng=np.random.default_rng(0))
+        noise_std = np.std(Y - clean, axis=1)
+        np.testing.assert_allclose(noise_std, truth['amplitude'] / np.sqrt(2) / 10, rtol=0.1)
+
+    def test_estimators_see_the_same_signals(self):
+        results = benchmark.benchmark({'fourier': FitFourier(), 'three-param': FitSinusThreeParam()},
+                                      frequencies=[1, 5, 10], fs=[100], T=[1], snr=[40], trials=10, seed=0)
+        self.assertEqual([r.estimator for r in results], ['fourier', 'three-param'])
+        fourier, three_param = results
+        # both estimators are exact for whole number of periods
+        for parameter in benchmark.PARAMETERS:
+            self.assertAlmostEqual(fourier.std[parameter]['all'], three_param.std[parameter]['all'])
+            self.assertEqual(len(fourier.std[parameter]['frequency']), 3)
+        self.assertEqual(fourier.signals, 30)
+        self.assertGreater(fourier.throughput, 0)
+        self.assertLess(fourier.std['amplitude']['all'], 0.05)
+
+    def test_sweep(self):
+        results = benchmark.benchmark({'fourier': FitFourier()}, frequencies=[1, 40], fs=[50, 100], T=[1, 2],
+                                      snr=[np.inf], trials=2, batch_size=1)
+        self.assertEqual([(r.fs, r.T) for r in results], [(50, 1), (50, 2), (100, 1), (100, 2)])
+        # 40 Hz is above Nyquist frequency of 50 Hz
+        self.assertEqual(results[0].frequencies, [1])
+        self.assertEqual(results[2].frequencies, [1, 40])
+        self.assertLess(results[2].std['amplitude']['all'], 1e-9)
+
+    def test_invalid_trials(self):
+        with self.assertRaises(ValueError):
+            benchmark.benchmark({'fourier': FitFourier()}, frequencies=[1], fs=[100], T=[1], snr=[40], trials=0)
+
+    def test_main(self):
+        with TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'report.json')
+            with redirect_stderr(StringIO()):
+                code = benchmark.main(['-e', 'fourier', 'hilbert', '-f', '1', '10', '--fs', '200',
+                                       '-T', '1', '--snr', '30', 'inf', '-n', '5', '-o', path])
+            self.assertEqual(code, 0)
+            with open(path) as file:
+                report = json.load(file)
+        self.assertEqual(len(report['results']), 4)
+        self.assertEqual(report['results'][0]['estimator'], 'fourier')
+        self.assertIsNone(report['results'][-1]['snr'])
+        self.assertIn('amplitude', report['results'][0]['bias'])
+
+
+if __name__ == '__main__':
+    unittest.main()
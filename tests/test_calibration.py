@@ -0,0 +1,133 @@
+import os
+import unittest
+
+from tempfile import TemporaryDirectory
+
+import numpy as np
+
+from electrode_tester.benchmark import synthetic_signals
+from electrode_tester.estimators import Calibration, ErrorTable, FitFourier, FitHilbert
+
+
+class ErrorTableTest(unittest.TestCase):
+
+    def setUp(self):
+        errors = {name: np.array([[1e-2, 1e-1], [1e-4, 1e-3]]) for name in ('amplitude', 'phase', 'offset')}
+        self.table = ErrorTable([10, 20], [0, 40], errors)
+
+    def test_grid_points(self):
+        errors = self.table([10, 20, 10], [0, 0, 40])
+        np.testing.assert_allclose(errors['amplitude'], [1e-2, 1e-1, 1e-4])
+
+    def test_interpolation_in_logarithm(self):
+        errors = self.table([15, 10], [0, 20])
+        np.testing.assert_allclose(errors['phase'], [10 ** -1.5, 1e-3])
+
+    def test_clipping(self):
+        errors = self.table([5, 30], [-10, 100])
+        np.testing.assert_allclose(errors['offset'], [1e-2, 1e-3])
+
+    def test_merge(self):
+        errors = {name: np.array([[5e-2], [5e-4]]) for name in ('amplitude', 'phase', 'offset')}
+        merged = self.table.merge(ErrorTable([15], [0, 40], errors))
+        np.testing.assert_array_equal(merged.frequencies, [10, 15, 20])
+        np.testing.assert_allclose(merged([15], [40])['amplitude'], [5e-4])
+        np.testing.assert_array_equal(merged.missing([20, 12.5, 12.5]), [12.5])
+
+    def test_save_load(self):
+        with TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'table.npz')
+            self.table.save(path)
+            loaded = ErrorTable.load(path)
+        np.testing.assert_array_equal(loaded.snrs, self.table.snrs)
+        np.testing.assert_array_equal(loaded.errors['amplitude'], self.table.errors['amplitude'])
+
+
+class CalibrationTest(unittest.TestCase):
+
+    fs = 100
+    n_samples = 200
+
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.calibration = Calibration(self.tmp_dir.name, snrs=(10, 30, 50), trials=20)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def signals(self, snr):
+        return synthetic_signals([2, 5, 20], self.fs, self.n_samples / self.fs, snr, trials=50,
+                                 rng=np.random.default_rng(1))
+
+    def test_constant_errors_without_calibration(self):
+        t, Y, truth = self.signals(30)
+        params = FitFourier().estimate_batch(t, Y, truth['frequency'], fs=self.fs)
+        np.testing.assert_array_equal(params.amplitude_error, 0.00033)
+
+    def test_errors_follow_snr(self):
+        estimator = FitFourier(calibration=self.calibration)
+        errors = []
+        for snr in (10, 50):
+            t, Y, truth = self.signals(snr)
+            params = estimator.estimate_batch(t, Y, truth['frequency'], fs=self.fs)
+            relative = params.amplitude_error / truth['amplitude']
+            measured = np.sqrt(np.mean(((params.amplitude - truth['amplitude']) / truth['amplitude']) ** 2))
+            # reported error agrees with the real one up to accuracy of the simulation
+            self.assertLess(abs(np.log(np.mean(relative) / measured)), np.log(1.5))
+            errors.append(np.mean(params.phase_error))
+        self.assertGreater(errors[0], 50 * errors[1])
+
+    def test_estimate(self):
+        t, Y, truth = self.signals(30)
+        estimator = FitHilbert(calibration=self.calibration)
+        params = estimator.estimate(t, Y[0], frequency=truth['frequency'][0])
+        batch = estimator.estimate_batch(t, Y[:1], truth['frequency'][:1])
+        self.assertEqual(params.amplitude, batch.amplitude[0])
+        self.assertEqual(params.phase_error, batch.phase_error[0])
+        self.assertNotEqual(params.phase_error, 0.00072)
+
+    def test_tables_are_saved(self):
+        estimator = FitFourier(calibration=self.calibration)
+        table = self.calibration.table(estimator, self.fs, self.n_samples)
+        self.assertEqual(len([name for name in os.listdir(self.tmp_dir.name) if name.endswith('.npz')]), 1)
+        self.assertIs(self.calibration.table(estimator, self.fs, self.n_samples), table)
+
+        loaded = Calibration(self.tmp_dir.name, snrs=(10, 30, 50), trials=20).table(estimator, self.fs,
+                                                                                     self.n_samples)
+        np.testing.assert_array_equal(loaded.errors['phase'], table.errors['phase'])
+
+        # other estimator and other settings get own tables
+        self.calibration.table(FitHilbert(), self.fs, self.n_samples)
+        Calibration(self.tmp_dir.name, snrs=(10, 30), trials=20).table(estimator, self.fs, self.n_samples)
+        self.assertEqual(len([name for name in os.listdir(self.tmp_dir.name) if name.endswith('.npz')]), 3)
+
+    def test_frequencies_of_signals_are_simulated(self):
+        estimator = FitFourier(calibration=self.calibration)
+        # 2.7 Hz has not whole number of periods, so it is not in the default grid
+        t, Y, truth = synthetic_signals([2.7], self.fs, self.n_samples / self.fs, 30, trials=5,
+                                        rng=np.random.default_rng(1))
+        self.assertIn(2.7, self.calibration.table(estimator, self.fs, self.n_samples).missing([2.7]))
+        estimator.estimate_batch(t, Y, truth['frequency'], fs=self.fs)
+        table = self.calibration.table(estimator, self.fs, self.n_samples)
+        self.assertEqual(len(table.missing([2.7])), 0)
+
+        # errors of a frequency don't depend on other simulated frequencies and added ones are saved
+        calibration = Calibration(snrs=(10, 30, 50), trials=20, frequencies=[2.7])
+        alone = calibration.table(estimator, self.fs, self.n_samples)
+        index = np.flatnonzero(np.isclose(table.frequencies, 2.7))[0]
+        np.testing.assert_array_equal(table.errors['phase'][:, index], alone.errors['phase'][:, 0])
+        loaded = Calibration(self.tmp_dir.name, snrs=(10, 30, 50), trials=20).table(estimator, self.fs,
+                                                                                     self.n_samples)
+        np.testing.assert_array_equal(loaded.frequencies, table.frequencies)
+
+    def test_config(self):
+        self.assertEqual(FitFourier().config(), {})
+        self.assertEqual(FitFourier(calibration=self.calibration).config()['calibration']['snrs'], [10, 30, 50])
+
+    def test_invalid_trials(self):
+        with self.assertRaises(ValueError):
+            Calibration(trials=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import datetime
+import sqlite3
+import unittest
+
+from pathlib import Path
+from unittest import mock
+
+from electrode_tester import Experiment, ExperimentAnalysis, Catalog
+from electrode_tester._analysis import MeasurementAnalysis
+from electrode_tester.estimators import FitFourier
+
+from electrode_tester.utils import limit_measurements
+
+from .helpers import ExperimentTestCase, InterruptedDevice, make_electrode
+
+
+class CatalogTest(ExperimentTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.make_catalogued('first', 'saline', [1, 10])
+        self.make_catalogued('second', 'tap solution', [10, 20])
+
+    def make_catalogued(self, name, salt_type, frequencies):
+        self.run_experiment(name, frequencies=frequencies, electrode=make_electrode(salt_type),
+                            storage='chunked', use_catalog=True)
+
+    def test_find(self):
+        with Catalog(self.tmp_dir.name) as catalog:
+            self.assertEqual(len(catalog), 2)
+            self.assertEqual([p.stem for p in catalog.find(salt_type='saline')], ['first'])
+            self.assertEqual([p.stem for p in catalog.find(frequency=10)], ['first', 'second'])
+            self.assertEqual([p.stem for p in catalog.find(electrode_type='vileda', frequency=20)],
+                             ['second'])
+            week_ago = datetime.datetime.now() - datetime.timedelta(days=7)
+            self.assertEqual(len(catalog.find(since=week_ago)), 2)
+            self.assertEqual(catalog.find(until=week_ago), [])
+
+    def test_limit_measurements(self):
+        with Catalog(self.tmp_dir.name) as catalog:
+            path, = catalog.find(salt_type='saline')
+            experiment = Experiment.load(path)
+            selected = list(catalog.limit_measurements(experiment))
+            self.assertEqual([m.uuid for _, m in selected], [m.uuid for m in experiment[:]])
+            self.assertEqual(selected[0][0], datetime.timedelta(0))
+            # the first measurement is always selected, like by `utils.limit_measurements`
+            self.assertEqual(catalog.measurement_dates(experiment.uuid, datetime.timedelta(-1)),
+                             [(0, datetime.timedelta(0))])
+            experiment.close()
+
+    def test_interrupted_measurement(self):
+        experiment = self.run_experiment('interrupted', device=InterruptedDevice(3), tries=3,
+                                         storage='chunked', use_catalog=True)
+        with Catalog(self.tmp_dir.name) as catalog:
+            rows = catalog._connection.execute(
+                'SELECT position, complete FROM measurements WHERE experiment_uuid=? ORDER BY position',
+                (experiment.uuid,)).fetchall()
+            self.assertEqual([tuple(row) for row in rows], [(0, 1), (1, 0)])
+            experiment = Experiment.load(experiment.save_path)
+            selected = [(time_delta, m.uuid) for time_delta, m in catalog.limit_measurements(experiment)]
+            self.assertEqual(selected, [(time_delta, m.uuid) for time_delta, m in limit_measurements(experiment)])
+            experiment.close()
+
+    def test_results(self):
+        with Catalog(self.tmp_dir.name) as catalog:
+            results = {'resistance': ([1., 2.], [.1, .2])}
+            path, = catalog.find(salt_type='saline')
+            measurement = Experiment.load(path)[0]
+            self.assertTrue(catalog.add_results(measurement.uuid, 'FitFourier', {'fs': 100}, [1, 10], results))
+            catalog.add_results(measurement.uuid, 'FitFourier', {'fs': 100}, [1, 10],
+                                {'phase': ([0., .1], [.01, .01])})
+            cached = catalog.results(measurement.uuid, 'FitFourier', {'fs': 100})
+            # results added later don't remove other parameters
+            self.assertEqual([row['resistance'] for row in cached], [1., 2.])
+            self.assertEqual([row['phase'] for row in cached], [0., .1])
+            self.assertIsNone(cached[0]['resistivity'])
+            self.assertEqual(catalog.results(measurement.uuid, 'FitSinus', {}), [])
+            self.assertFalse(catalog.add_results('unknown', 'FitFourier', {}, [1], results))
+
+    def test_analysis_results_are_cached(self):
+        experiment = Experiment.load(Path(self.tmp_dir.name) / 'first.exp')
+        expected = ExperimentAnalysis().analyze(experiment, estimator=FitFourier(), estimator_params={'fs': 100})
+        with mock.patch.object(MeasurementAnalysis, 'analyze', autospec=True,
+                               side_effect=MeasurementAnalysis.analyze) as analyze:
+            cached = ExperimentAnalysis().analyze(experiment, estimator=FitFourier(),
+                                                  estimator_params={'fs': 100})
+            self.assertEqual(analyze.call_count, 0)
+            # the same measurements analysed other way are not in the catalog
+            ExperimentAnalysis().analyze(experiment, estimator=FitFourier(), estimator_params={'fs': 50})
+            self.assertEqual(analyze.call_count, len(experiment))
+        self.assertEqual(cached, expected)
+        experiment.close()
+
+    def test_results_of_older_catalogs_are_kept(self):
+        path = Path(self.tmp_dir.name) / Catalog.FILE_NAME
+        with sqlite3.connect(path) as connection:
+            connection.execute('DROP TABLE analysis_results')
+            # table of catalogs written before results had phase
+            connection.execute('CREATE TABLE analysis_results (measurement_uuid TEXT NOT NULL, '
+                               'estimator TEXT NOT NULL, parameters TEXT NOT NULL, frequency REAL NOT NULL, '
+                               'resistance REAL, resistance_error REAL, resistivity REAL, '
+                               'resistivity_error REAL, '
+                               'PRIMARY KEY (measurement_uuid, estimator, parameters, frequency))')
+            connection.execute("INSERT INTO analysis_results VALUES ('uuid', 'FitFourier', '{}', 1, 1, .1, 2, .2)")
+        connection.close()
+        for _ in range(2):
+            with Catalog(self.tmp_dir.name) as catalog:
+                self.assertEqual(catalog.results('uuid', 'FitFourier', {}),
+                                 [{'frequency': 1., 'resistance': 1., 'resistance_error': .1, 'resistivity': 2.,
+                                   'resistivity_error': .2, 'phase': None, 'phase_error': None}])
+
+    def test_rebuild(self):
+        (Path(self.tmp_dir.name) / Catalog.FILE_NAME).unlink()
+        with Catalog(self.tmp_dir.name) as catalog:
+            self.assertEqual(len(catalog), 0)
+            self.assertEqual(catalog.rebuild(), 2)
+            self.assertEqual(len(catalog.find(frequency=10)), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
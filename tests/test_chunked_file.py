@@ -0,0 +1,127 @@
+import unittest
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import numpy as np
+
+from electrode_tester import Experiment
+from electrode_tester.storage import ChunkedFile
+
+from .helpers import ExperimentTestCase
+
+
+class ChunkedFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name) / 'experiment.etd'
+        self.frequencies = (1, 2, 5)
+        self.store = ChunkedFile.create(self.path, frequencies=self.frequencies, n_samples=100,
+                                        metadata={'uuid': 'abc'})
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp_dir.cleanup()
+
+    def make_try(self, seed):
+        data = np.random.default_rng(seed).normal(size=(len(self.frequencies), 3, 100))
+        index = self.store.append_try({'seed': seed})
+        for i, container in enumerate(data):
+            self.store.write_container(index, i, container)
+        return data
+
+    def test_empty(self):
+        self.assertEqual(len(self.store), 0)
+        self.assertEqual(self.store.metadata, {'uuid': 'abc'})
+        self.assertEqual(self.store.frequencies, self.frequencies)
+
+    def test_write_read(self):
+        first = self.make_try(0)
+        second = self.make_try(1)
+
+        self.assertEqual(len(self.store), 2)
+        np.testing.assert_array_equal(self.store.read_container(1, 2), second[2])
+        np.testing.assert_array_equal(self.store.read_try(0), first)
+        np.testing.assert_array_equal(self.store.read(), np.stack([first, second]))
+        self.assertEqual(self.store.read_header(1), {'seed': 1})
+
+    def test_reopen(self):
+        data = self.make_try(0)
+        self.store.close()
+
+        with ChunkedFile(self.path) as store:
+            self.assertEqual(len(store), 1)
+            self.assertEqual(store.chunk_shape, (3, 3, 100))
+            np.testing.assert_array_equal(store.read_try(0), data)
+            with self.assertRaises(IOError):
+                store.append_try()
+
+    def test_mmap(self):
+        data = self.make_try(0)
+        self.store.flush()
+
+        with ChunkedFile(self.path, mmap=True) as store:
+            container = store.read_container(0, 1)
+            self.assertIsInstance(container, np.memmap)
+            self.assertFalse(container.flags.writeable)
+            np.testing.assert_array_equal(container, data[1])
+            np.testing.assert_array_equal(store.read()[0], data)
+
+    def test_int16(self):
+        path = Path(self.tmp_dir.name) / 'compact.etd'
+        data = np.random.default_rng(0).normal(size=(len(self.frequencies), 3, 100))
+        with ChunkedFile.create(path, frequencies=self.frequencies, n_samples=100,
+                                dtype='int16') as store:
+            index = store.append_try()
+            for i, container in enumerate(data):
+                store.write_container(index, i, container)
+
+            self.assertTrue(store.scaled)
+            self.assertEqual(store.read_container(0, 1, raw=True).dtype, np.int16)
+            np.testing.assert_allclose(store.read_container(0, 1), data[1], atol=1e-3)
+            np.testing.assert_allclose(store.read_try(0), data, atol=1e-3)
+            np.testing.assert_allclose(store.read()[0], data, atol=1e-3)
+
+    def test_invalid_shape(self):
+        index = self.store.append_try()
+        with self.assertRaises(ValueError):
+            self.store.write_container(index, 0, np.zeros((3, 10)))
+
+    def test_invalid_index(self):
+        with self.assertRaises(IndexError):
+            self.store.read_try(0)
+
+    def test_existing_file(self):
+        with self.assertRaises(IOError):
+            ChunkedFile.create(self.path, frequencies=self.frequencies, n_samples=100)
+
+
+class ChunkHeaderSizeTest(ExperimentTestCase):
+
+    frequencies = [float(f) for f in np.logspace(0, 2.3, 200)]
+
+    def test_header_grows_with_frequencies(self):
+        path = Path(self.tmp_dir.name) / 'many.etd'
+        with ChunkedFile.create(path, frequencies=self.frequencies, n_samples=10) as store:
+            index = store.append_try()
+            store.write_header(index, {'frequencies': self.frequencies,
+                                       'measurements_data': list(range(len(self.frequencies)))})
+        with ChunkedFile(path) as store:
+            self.assertEqual(store.read_header(0)['frequencies'], self.frequencies)
+
+    def test_experiment_with_many_frequencies(self):
+        experiment = self.run_experiment(storage='chunked')
+        loaded = Experiment.load(experiment.save_path)
+        self.assertEqual(len(loaded), 2)
+        self.assertTrue(all(loaded))
+        loaded.close()
+
+    def test_invalid_chunk_header_size(self):
+        with self.assertRaises(ValueError):
+            ChunkedFile.create(Path(self.tmp_dir.name) / 'invalid.etd', frequencies=[1], n_samples=10,
+                               chunk_header_size=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from electrode_tester.storage import Durability
+
+
+class DurabilityTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write(self, durability, name='file.bin'):
+        with open(Path(self.tmp_dir.name) / name, 'wb') as file:
+            file.write(b'data')
+            durability.written(file)
+
+    def test_invalid_mode(self):
+        with self.assertRaises(ValueError):
+            Durability('always')
+
+    def test_file_mode_does_not_group(self):
+        durability = Durability('file')
+        self.write(durability)
+        self.assertEqual(durability.pending, 0)
+
+    def test_measurement_group_commit(self):
+        durability = Durability('measurement')
+        self.write(durability, 'a.bin')
+        self.write(durability, 'b.bin')
+        self.assertEqual(durability.pending, 2)
+        durability.commit('measurement')
+        self.assertEqual(durability.pending, 0)
+
+    def test_experiment_group_commit(self):
+        durability = Durability('experiment')
+        self.write(durability)
+        durability.commit('measurement')
+        self.assertEqual(durability.pending, 1)
+        durability.commit('experiment')
+        self.assertEqual(durability.pending, 0)
+
+    def test_none_mode(self):
+        durability = Durability('none')
+        self.write(durability)
+        durability.commit('experiment')
+        self.assertEqual(durability.pending, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
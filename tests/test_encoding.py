@@ -0,0 +1,52 @@
+import unittest
+
+import numpy as np
+
+from electrode_tester._signal_container import SignalContainer
+from electrode_tester.storage import encode, decode
+
+
+class EncodingTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.data = rng.normal(size=(3, 1000)) * np.array([[1.], [0.01], [100.]]) + 5
+
+    def test_float64(self):
+        codes, scale, offset = encode(self.data, 'float64')
+        self.assertIsNone(scale)
+        np.testing.assert_array_equal(decode(codes), self.data)
+
+    def test_float32(self):
+        codes, scale, offset = encode(self.data, 'float32')
+        self.assertEqual(codes.dtype, np.float32)
+        np.testing.assert_allclose(decode(codes), self.data, rtol=1e-6)
+
+    def test_int16(self):
+        codes, scale, offset = encode(self.data, 'int16')
+        self.assertEqual(codes.dtype, np.int16)
+        self.assertEqual(scale.shape, (3,))
+        decoded = decode(codes, scale, offset)
+        span = self.data.max(axis=1) - self.data.min(axis=1)
+        error = np.abs(decoded - self.data).max(axis=1)
+        self.assertTrue(np.all(error <= span / 2**16))
+
+    def test_constant_channel(self):
+        data = np.ones((3, 10))
+        codes, scale, offset = encode(data, 'int16')
+        np.testing.assert_allclose(decode(codes, scale, offset), data)
+
+    def test_invalid_format(self):
+        with self.assertRaises(ValueError):
+            encode(self.data, 'int8')
+
+    def test_container_decodes_lazily(self):
+        container = SignalContainer(self.data, frequency=10).encode('int16')
+        self.assertEqual(container.sample_format, 'int16')
+        self.assertNotIn('_samples', container.__dict__)
+        np.testing.assert_allclose(container.v1, self.data[0] - self.data[1], atol=1e-2)
+        self.assertEqual(container.data.dtype, np.float64)
+
+
+if __name__ == '__main__':
+    unittest.main()
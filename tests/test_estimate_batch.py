@@ -0,0 +1,58 @@
+import unittest
+
+import numpy as np
+
+from electrode_tester.estimators import FitFourier, FitHilbert, FitSinus
+
+
+class EstimateBatchTest(unittest.TestCase):
+
+    fs = 1000
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.x = np.arange(0, 2, 1 / self.fs)
+        self.frequencies = np.array([1, 5, 10, 50, 120])
+        self.amplitudes = rng.uniform(0.5, 2, len(self.frequencies))
+        self.phases = rng.uniform(0, 2 * np.pi, len(self.frequencies))
+        self.offsets = rng.uniform(-1, 1, len(self.frequencies))
+        self.Y = (self.amplitudes[:, None] * np.sin(2 * np.pi * self.frequencies[:, None] * self.x
+                                                     + self.phases[:, None])
+                  + self.offsets[:, None] + 0.01 * rng.standard_normal((len(self.frequencies), self.x.size)))
+
+    def assert_same(self, batch, params):
+        for name in ('amplitude', 'amplitude_error', 'phase', 'phase_error', 'offset', 'offset_error'):
+            np.testing.assert_allclose(getattr(batch, name), [getattr(p, name) for p in params],
+                                       rtol=1e-12, atol=1e-12, err_msg=name)
+
+    def test_fourier_matches_estimate(self):
+        estimator = FitFourier()
+        batch = estimator.estimate_batch(self.x, self.Y, self.frequencies, fs=self.fs)
+        params = [estimator.estimate(self.x, y, frequency=f, fs=self.fs)
+                  for y, f in zip(self.Y, self.frequencies)]
+        self.assert_same(batch, params)
+        self.assertIsNone(batch.frequency)
+        np.testing.assert_allclose(batch.amplitude, self.amplitudes, rtol=1e-2)
+        np.testing.assert_allclose(batch.phase, self.phases, atol=1e-2)
+
+    def test_fourier_requires_fs(self):
+        with self.assertRaises(ValueError):
+            FitFourier().estimate_batch(self.x, self.Y, self.frequencies)
+
+    def test_one_frequency_for_all_signals(self):
+        Y = np.stack([self.Y[1], 2 * self.Y[1]])
+        batch = FitFourier().estimate_batch(self.x, Y, 5, fs=self.fs)
+        np.testing.assert_allclose(batch.amplitude[1], 2 * batch.amplitude[0])
+
+    def test_default_loops_estimate(self):
+        for estimator in (FitHilbert(), FitSinus()):
+            with self.subTest(estimator=type(estimator).__name__):
+                batch = estimator.estimate_batch(self.x, self.Y, self.frequencies)
+                params = [estimator.estimate(self.x, y, frequency=f)
+                          for y, f in zip(self.Y, self.frequencies)]
+                self.assert_same(batch, params)
+                self.assertEqual(len(batch.amplitude), len(self.frequencies))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,311 @@
+import unittest
+
+import numpy as np
+
+from electrode_tester import Experiment, ExperimentAnalysis
+from electrode_tester._excitation import (multisine, schroeder_phases, split_multisine, sequence, split_sequence,
+                                         chirp, chirp_response)
+from electrode_tester.devices import DummyDevice
+from electrode_tester.estimators import FitSinusThreeParam
+
+from .helpers import ExperimentTestCase
+
+
+class CountingDevice(DummyDevice):
+    '''
+    dummy device counting captures
+    '''
+
+    def __init__(self):
+        self.captures = 0
+        super().__init__()
+
+    def get_data(self):
+        self.captures += 1
+        return super().get_data()
+
+
+class TriggeredDevice(DummyDevice):
+    '''
+    dummy device starting captures in the middle of the generator waveform, as scope triggered on level
+    '''
+
+    def get_data(self):
+        data = super().get_data()
+        if self.waveform is None:
+            return data
+        n = len(self.waveform)
+        repetition = np.roll(data[:, :n], -n // 3, axis=-1)
+        return np.concatenate([repetition, repetition[:, :data.shape[-1] - n]], axis=-1)
+
+
+class MultisineTest(unittest.TestCase):
+
+    def test_crest_factor(self):
+        frequencies = np.arange(1, 101)
+        t = np.arange(1000) / 1000
+        waveform = multisine(frequencies, 1000, 1)
+        zero_phases = np.sin(2 * np.pi * frequencies[:, None] * t).sum(axis=0)
+        crest_factor = np.max(np.abs(waveform)) / np.sqrt(np.mean(waveform**2))
+        zero_phases_crest_factor = np.max(np.abs(zero_phases)) / np.sqrt(np.mean(zero_phases**2))
+        self.assertAlmostEqual(np.max(np.abs(waveform)), 1)
+        self.assertLess(crest_factor, 2)
+        self.assertLess(3 * crest_factor, zero_phases_crest_factor)
+        self.assertEqual(len(schroeder_phases(5)), 5)
+
+    def test_split(self):
+        fs = 1000
+        t = np.arange(2 * fs) / fs
+        frequencies = [1, 5.5, 40]
+        amplitudes = [1., 0.5, 0.2]
+        phases = [0.3, 2., 4.]
+        tones = [a * np.sin(2 * np.pi * f * t + p) for f, a, p in zip(frequencies, amplitudes, phases)]
+        data = np.stack([sum(tones) + 0.1, 0.5 * sum(tones), -sum(tones)])
+        for tone, signals in zip(tones, split_multisine(data, frequencies, fs)):
+            np.testing.assert_allclose(signals[0], tone + 0.1, atol=1e-9)
+            np.testing.assert_allclose(signals[1], 0.5 * tone, atol=1e-9)
+            np.testing.assert_allclose(signals[2], -tone, atol=1e-9)
+
+    def test_noise_is_kept(self):
+        fs = 1000
+        t = np.arange(2 * fs) / fs
+        frequencies = [1, 5.5, 40]
+        tones = sum(np.sin(2 * np.pi * f * t) for f in frequencies)
+        rng = np.random.default_rng(0)
+        amplitudes, errors = [], []
+        for _ in range(100):
+            data = np.stack([tones + 0.1 * rng.standard_normal(len(t)) for _ in range(3)])
+            signals = split_multisine(data, frequencies, fs)
+            params = FitSinusThreeParam().estimate_batch(t, [s[0] for s in signals], frequencies)
+            amplitudes.append(params.amplitude)
+            errors.append(params.amplitude_error)
+        # errors from residuals of fits agree with scatter of amplitudes caused by noise of the capture
+        np.testing.assert_allclose(np.mean(errors, axis=0), np.std(amplitudes, axis=0), rtol=0.3)
+        self.assertAlmostEqual(np.std(signals[0][0] - np.sin(2 * np.pi * t)), 0.1, delta=0.01)
+
+    def test_arbitrary_waveform_requires_samples(self):
+        with self.assertRaises(ValueError):
+            DummyDevice().set_generator(signal_type='arbitrary')
+
+
+class SequenceTest(unittest.TestCase):
+
+    def test_segments(self):
+        fs = 1000
+        waveform, starts = sequence([1, 4, 100], fs, 0.5, 2)
+        # two periods of every frequency are played before its signal
+        np.testing.assert_array_equal(starts, [2000, 2000 + 500 + 500, 3000 + 500 + 20])
+        self.assertEqual(len(waveform), starts[-1] + 500)
+        t = np.arange(500) / fs
+        data = np.stack([waveform, 2 * waveform, -waveform])
+        for frequency, signals in zip([1, 4, 100], split_sequence(data, starts, 500)):
+            self.assertEqual(signals.shape, (3, 500))
+            np.testing.assert_allclose(signals[1], 2 * signals[0])
+            # settling periods are whole, so recorded signal starts with phase 0
+            np.testing.assert_allclose(signals[0], np.sin(2 * np.pi * frequency * t), atol=1e-9)
+
+    def test_no_settling(self):
+        waveform, starts = sequence([10, 20], 1000, 1, 0)
+        np.testing.assert_array_equal(starts, [0, 1000])
+        self.assertEqual(len(waveform), 2000)
+
+    def test_short_capture(self):
+        _, starts = sequence([10, 20], 1000, 1, 1)
+        with self.assertRaises(ValueError):
+            split_sequence(np.zeros((3, 2000)), starts, 1000)
+        waveform, _ = sequence([10, 20], 1000, 1, 1)
+        with self.assertRaises(ValueError):
+            split_sequence(np.zeros((3, len(waveform) - 1)), starts, 1000, waveform)
+
+    def test_shifted_capture(self):
+        waveform, starts = sequence([1, 4, 100], 1000, 0.5, 2)
+        data = np.stack([waveform, 2 * waveform, -waveform])
+        expected = split_sequence(data, starts, 500)
+        noise = 0.05 * np.random.default_rng(0).standard_normal(data.shape)
+        for shift in (0, 1, 1234, len(waveform) - 1):
+            with self.subTest(shift=shift):
+                # capture starts at sample `shift` of the waveform and has one extra sample
+                captured = np.roll(data, -shift, axis=-1)
+                captured = np.concatenate([captured, captured[:, :1]], axis=-1)
+                for signals, expected_signals in zip(split_sequence(captured, starts, 500, waveform), expected):
+                    np.testing.assert_array_equal(signals, expected_signals)
+                aligned = split_sequence(np.roll(data + noise, -shift, axis=-1), starts, 500, waveform)
+                np.testing.assert_allclose(aligned[1], expected[1], atol=0.3)
+
+
+class ChirpTest(unittest.TestCase):
+
+    def test_sweep(self):
+        fs = 1000
+        waveform = chirp([2, 100], fs, 2)
+        self.assertEqual(len(waveform), 2000)
+        # energy of the sweep is between slightly below the lowest and above the highest frequency
+        power = np.abs(np.fft.rfft(waveform))**2
+        frequencies = np.fft.rfftfreq(len(waveform), 1 / fs)
+        inside = (frequencies >= 1) & (frequencies <= 130)
+        self.assertGreater(power[inside].sum() / power.sum(), 0.95)
+        self.assertGreater(power[(frequencies > 100) & (frequencies < 110)].sum(), 0)
+
+    def test_response(self):
+        fs = 1000
+        x = chirp([1, 100], fs, 4)
+        gain = 0.5 * np.exp(0.3j)
+        # the same delay of every frequency is phase growing with frequency
+        spectrum = np.fft.rfft(x)
+        y = np.fft.irfft(spectrum * gain, len(x))
+        H, error = chirp_response(x, y, [2, 10, 50], fs)
+        np.testing.assert_allclose(H, gain, rtol=1e-6)
+        np.testing.assert_allclose(error, 0, atol=1e-6)
+
+        noisy = y + 0.05 * np.random.default_rng(0).standard_normal(len(y))
+        H, error = chirp_response(x, noisy, [2, 10, 50], fs)
+        self.assertTrue(np.all(error > 0))
+        np.testing.assert_allclose(np.abs(H), 0.5, rtol=0.2)
+
+
+class MultisineExperimentTest(ExperimentTestCase):
+
+    frequencies = [1, 5, 10, 50]
+
+    def setUp(self):
+        super().setUp()
+        # noise of dummy device
+        np.random.seed(0)
+
+    def experiment(self, device, excitation, **kwargs):
+        experiment = self.run_experiment(excitation, device=device, sampling_rate=1000, sampling_time=2,
+                                         excitation=excitation, **kwargs)
+        return Experiment.load(experiment.save_path)
+
+    def test_one_capture_per_measurement(self):
+        device = CountingDevice()
+        captures = device.captures
+        experiment = self.experiment(device, 'multisine')
+        self.assertEqual(device.captures - captures, 2)
+        self.assertEqual(experiment.excitation, 'multisine')
+        for measurement in experiment:
+            self.assertEqual(measurement.excitation, 'multisine')
+            self.assertEqual([c.frequency for c in measurement], self.frequencies)
+            self.assertEqual(measurement[0].data.shape, (3, 2000))
+
+    def test_analysis(self):
+        results = {}
+        for excitation in ('stepped', 'multisine'):
+            experiment = self.experiment(DummyDevice(), excitation)
+            _, results[excitation] = ExperimentAnalysis().analyze(experiment, estimator=FitSinusThreeParam())
+        for frequency in self.frequencies:
+            np.testing.assert_allclose(results['multisine']['resistance'][0][frequency],
+                                       np.mean(results['stepped']['resistance'][0][frequency]), rtol=0.1)
+
+    def test_sequence(self):
+        device = CountingDevice()
+        captures = device.captures
+        experiment = self.experiment(device, 'sequence', settling_periods=1)
+        self.assertEqual(device.captures - captures, 2)
+        self.assertEqual(experiment.settling_periods, 1)
+        # scope records signals of one frequency again
+        self.assertEqual(device.len_sig, 2000)
+        _, results = ExperimentAnalysis().analyze(experiment, estimator=FitSinusThreeParam())
+        stepped = self.experiment(DummyDevice(), 'stepped')
+        _, expected = ExperimentAnalysis().analyze(stepped, estimator=FitSinusThreeParam())
+        for frequency in self.frequencies:
+            self.assertEqual(experiment[0](frequency).data.shape, (3, 2000))
+            np.testing.assert_allclose(results['resistance'][0][frequency],
+                                       np.mean(expected['resistance'][0][frequency]), rtol=0.1)
+
+    def test_sequence_started_by_trigger(self):
+        np.random.seed(0)
+        expected = self.experiment(DummyDevice(), 'sequence')
+        np.random.seed(0)
+        experiment = Experiment.load(self.run_experiment('triggered', device=TriggeredDevice(), sampling_rate=1000,
+                                                         sampling_time=2, excitation='sequence').save_path)
+        for measurement, expected_measurement in zip(experiment, expected):
+            for container, expected_container in zip(measurement, expected_measurement):
+                np.testing.assert_allclose(container.v1, expected_container.v1, atol=0.1)
+
+    def test_chirp(self):
+        device = CountingDevice()
+        captures = device.captures
+        experiment = self.experiment(device, 'chirp')
+        self.assertEqual(device.captures - captures, 2)
+        for measurement in experiment:
+            self.assertTrue(measurement)
+            self.assertEqual(len(measurement), 1)
+            self.assertEqual(measurement[0].data.shape, (3, 2000))
+        _, results = ExperimentAnalysis().analyze(experiment)
+        stepped = self.experiment(DummyDevice(), 'stepped')
+        _, expected = ExperimentAnalysis().analyze(stepped, estimator=FitSinusThreeParam())
+        for frequency in self.frequencies:
+            self.assertGreater(results['resistance'][1][frequency][0], 0)
+            np.testing.assert_allclose(results['resistance'][0][frequency],
+                                       np.mean(expected['resistance'][0][frequency]), rtol=0.1)
+
+    def test_chirp_above_nyquist(self):
+        with self.assertRaises(ValueError):
+            self.experiment(DummyDevice(), 'chirp', frequencies=[1, 600])
+
+    def test_invalid_settling(self):
+        with self.assertRaises(ValueError):
+            self.experiment(DummyDevice(), 'sequence', settling_periods=-1)
+
+    def test_chunked(self):
+        experiment = self.experiment(DummyDevice(), 'multisine', storage='chunked')
+        self.assertEqual(len(experiment[1]), len(self.frequencies))
+        experiment.close()
+
+    def test_chirp_chunked(self):
+        np.random.seed(0)
+        pickled = self.experiment(DummyDevice(), 'chirp', settling_periods=3)
+        np.random.seed(0)
+        experiment = Experiment.load(self.run_experiment('chirp_chunked', sampling_rate=1000, sampling_time=2,
+                                                         excitation='chirp', storage='chunked',
+                                                         settling_periods=3).save_path)
+        for measurement in experiment:
+            self.assertEqual(measurement.excitation, 'chirp')
+            self.assertEqual(measurement._settling_periods, 3)
+            self.assertTrue(measurement)
+        self.assertEqual(ExperimentAnalysis().analyze(experiment)[1], ExperimentAnalysis().analyze(pickled)[1])
+        experiment.close()
+
+    def test_phase(self):
+        for excitation in ('stepped', 'chirp'):
+            with self.subTest(excitation=excitation):
+                experiment = self.experiment(DummyDevice(), excitation)
+                _, results = ExperimentAnalysis().analyze(experiment, estimator=FitSinusThreeParam())
+                phases, errors = results['phase']
+                # dummy electrode is a resistor
+                for frequency in self.frequencies:
+                    np.testing.assert_array_less(np.abs(phases[frequency]), 3 * np.array(errors[frequency]))
+                _, results = ExperimentAnalysis().analyze(experiment, calculate_parameters=['phase'])
+                self.assertEqual(list(results), ['phase'])
+
+    def test_frequencies_between_bins(self):
+        with self.assertRaises(ValueError):
+            self.experiment(DummyDevice(), 'multisine', frequencies=[1, 5.25])
+
+    def test_setters_check_excitation(self):
+        experiment = self.make_experiment(frequencies=[1, 5.5], sampling_rate=1000, sampling_time=2,
+                                          excitation='multisine')
+        experiment.frequencies = [1, 2.5]
+        self.assertEqual(experiment.frequencies, (1, 2.5))
+        with self.assertRaises(ValueError):
+            experiment.frequencies = [1, 5.25]
+        with self.assertRaises(ValueError):
+            experiment.sampling_time = 1
+        self.assertEqual((experiment.frequencies, experiment.sampling_time), ((1, 2.5), 2))
+
+        experiment.frequencies = [1, 400]
+        experiment.excitation = 'chirp'
+        with self.assertRaises(ValueError):
+            experiment.sampling_rate = 500
+        self.assertEqual(experiment.sampling_rate, 1000)
+        experiment.excitation = 'stepped'
+        experiment.sampling_rate = 500
+
+    def test_invalid_excitation(self):
+        with self.assertRaises(ValueError):
+            self.experiment(DummyDevice(), 'noise')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import unittest
+
+from tempfile import TemporaryDirectory
+
+import numpy as np
+import scipy.signal as ss
+
+from electrode_tester.estimators import FitHilbert
+from electrode_tester.estimators._fit_hilbert import _analytic_signal
+
+
+class FitHilbertTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+        self.fs = 1000
+        self.frequencies = np.array([1., 3.3, 10., 45.7, 100.])
+        self.amplitudes = self.rng.uniform(0.5, 2, len(self.frequencies))
+        self.phases = self.rng.uniform(0, 2 * np.pi, len(self.frequencies))
+        self.offsets = self.rng.uniform(-1, 1, len(self.frequencies))
+
+    def signals(self, n_samples, noise=0.01):
+        x = np.arange(n_samples) / self.fs
+        Y = (self.amplitudes[:, None] * np.sin(2 * np.pi * self.frequencies[:, None] * x + self.phases[:, None])
+             + self.offsets[:, None])
+        return x, Y + noise * self.rng.standard_normal(Y.shape)
+
+    def test_accuracy(self):
+        # 2003 samples are padded to fast length
+        for n_samples in (2000, 2003):
+            with self.subTest(n_samples=n_samples):
+                x, Y = self.signals(n_samples)
+                batch = FitHilbert().estimate_batch(x, Y, self.frequencies)
+                np.testing.assert_allclose(batch.amplitude, self.amplitudes, rtol=2e-2)
+                # offset is mean of the signal, biased by not whole number of periods
+                np.testing.assert_allclose(batch.offset, self.offsets, atol=5e-2)
+                phase_difference = np.angle(np.exp(1j * (batch.phase - self.phases)))
+                np.testing.assert_allclose(phase_difference, 0, atol=2e-2)
+                self.assertTrue(np.all((batch.phase >= 0) & (batch.phase < 2 * np.pi)))
+
+    def test_same_as_scipy_for_fast_length(self):
+        _, Y = self.signals(2000)
+        np.testing.assert_allclose(_analytic_signal(Y), ss.hilbert(Y, axis=-1), atol=1e-9)
+
+    def test_batch_matches_estimate(self):
+        x, Y = self.signals(2003)
+        estimator = FitHilbert()
+        batch = estimator.estimate_batch(x, Y, self.frequencies)
+        for i, (y, frequency) in enumerate(zip(Y, self.frequencies)):
+            params = estimator.estimate(x, y, frequency=frequency)
+            self.assertAlmostEqual(params.amplitude, batch.amplitude[i], places=12)
+            self.assertAlmostEqual(params.phase, batch.phase[i], places=12)
+
+    def test_signals_are_not_changed(self):
+        x, Y = self.signals(2003)
+        with TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'signals.npy')
+            np.save(path, Y)
+            memmap = np.load(path, mmap_mode='r')
+            batch = FitHilbert().estimate_batch(x, memmap, self.frequencies)
+            np.testing.assert_array_equal(memmap, Y)
+            # results are not views of reused workspace
+            amplitude = batch.amplitude.copy()
+            FitHilbert().estimate_batch(x, 2 * Y, self.frequencies)
+            np.testing.assert_array_equal(batch.amplitude, amplitude)
+            del memmap
+
+        view = Y[:, ::2]
+        expected = view.copy()
+        FitHilbert().estimate_batch(x[::2], view, self.frequencies)
+        np.testing.assert_array_equal(view, expected)
+
+    def test_version(self):
+        # results of lengths which are not fast FFT lengths changed with padding
+        self.assertEqual(FitHilbert.version, 2)
+
+    def test_missing_frequency(self):
+        x, Y = self.signals(2000)
+        with self.assertRaises(ValueError):
+            FitHilbert().estimate(x, Y[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+
+import numpy as np
+
+from electrode_tester.estimators import FitFourier, FitLockIn
+
+
+class FitLockInTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+        self.fs = 1000
+        self.x = np.arange(2 * self.fs) / self.fs
+        self.frequencies = np.array([1., 3.3, 10., 45.7, 100.])
+        self.amplitudes = self.rng.uniform(0.5, 2, len(self.frequencies))
+        self.phases = self.rng.uniform(0, 2 * np.pi, len(self.frequencies))
+        self.offsets = self.rng.uniform(-1, 1, len(self.frequencies))
+
+    def signals(self, noise=0.01):
+        Y = (self.amplitudes[:, None] * np.sin(2 * np.pi * self.frequencies[:, None] * self.x + self.phases[:, None])
+             + self.offsets[:, None])
+        return Y + noise * self.rng.standard_normal(Y.shape)
+
+    def test_accuracy(self):
+        for window in (None, 'hann'):
+            with self.subTest(window=window):
+                batch = FitLockIn(window=window).estimate_batch(self.x, self.signals(), self.frequencies)
+                np.testing.assert_allclose(batch.amplitude, self.amplitudes, rtol=1e-2)
+                np.testing.assert_allclose(batch.offset, self.offsets, atol=1e-2)
+                phase_difference = np.angle(np.exp(1j * (batch.phase - self.phases)))
+                np.testing.assert_allclose(phase_difference, 0, atol=1e-2)
+                self.assertTrue(np.all((batch.phase >= 0) & (batch.phase < 2 * np.pi)))
+
+    def test_batch_matches_estimate(self):
+        Y = self.signals()
+        estimator = FitLockIn()
+        batch = estimator.estimate_batch(self.x, Y, self.frequencies)
+        for i, (y, frequency) in enumerate(zip(Y, self.frequencies)):
+            params = estimator.estimate(self.x, y, frequency=frequency)
+            self.assertAlmostEqual(params.amplitude, batch.amplitude[i], places=12)
+            self.assertAlmostEqual(params.phase_error, batch.phase_error[i], places=12)
+
+    def test_same_as_fourier_for_whole_periods(self):
+        self.frequencies = np.array([1., 3., 10., 45., 100.])
+        Y = self.signals()
+        lock_in = FitLockIn().estimate_batch(self.x, Y, self.frequencies)
+        fourier = FitFourier().estimate_batch(self.x, Y, self.frequencies, fs=self.fs)
+        np.testing.assert_allclose(lock_in.amplitude, fourier.amplitude, rtol=1e-9)
+        np.testing.assert_allclose(lock_in.phase, fourier.phase, atol=1e-9)
+
+    def test_whole_periods(self):
+        Y = self.signals(0)
+        whole = FitLockIn().estimate_batch(self.x, Y, self.frequencies)
+        everything = FitLockIn(whole_periods=False).estimate_batch(self.x, Y, self.frequencies)
+        for params in (whole, everything):
+            # signals with whole number of periods are exact in both cases
+            np.testing.assert_allclose(params.amplitude[[0, 2, 4]], self.amplitudes[[0, 2, 4]], rtol=1e-9)
+        whole_error = np.max(np.abs(whole.offset - self.offsets))
+        everything_error = np.max(np.abs(everything.offset - self.offsets))
+        self.assertLess(10 * whole_error, everything_error)
+
+    def test_errors_match_scatter(self):
+        amplitudes = [FitLockIn().estimate_batch(self.x, self.signals(0.1), self.frequencies).amplitude
+                      for _ in range(200)]
+        errors = FitLockIn().estimate_batch(self.x, self.signals(0.1), self.frequencies).amplitude_error
+        np.testing.assert_allclose(np.std(amplitudes, axis=0), errors, rtol=0.25)
+
+    def test_missing_frequency(self):
+        with self.assertRaises(ValueError):
+            FitLockIn().estimate(self.x, self.signals()[0])
+
+    def test_invalid_window(self):
+        with self.assertRaises(ValueError):
+            FitLockIn(window='no such window')
+
+
+if __name__ == '__main__':
+    unittest.main()
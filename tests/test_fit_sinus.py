@@ -0,0 +1,81 @@
+import unittest
+
+import numpy as np
+
+from electrode_tester.estimators import FitSinus
+
+
+class FitSinusWarmStartTest(unittest.TestCase):
+
+    frequency = 10
+
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+        self.x = np.linspace(0, 1, 1000)
+
+    def signal(self, amplitude=1.5, phase=2.5, offset=0.3):
+        return (amplitude * np.sin(2 * np.pi * self.frequency * self.x + phase) + offset
+                + 0.01 * self.rng.standard_normal(self.x.size))
+
+    def test_cold_fits_are_not_cached(self):
+        estimator = FitSinus()
+        estimator.estimate(self.x, self.signal(), frequency=self.frequency)
+        estimator.estimate(self.x, self.signal(), frequency=self.frequency)
+        self.assertEqual(estimator.stats.fits, 2)
+        self.assertEqual(estimator.stats.warm_starts, 0)
+
+    def test_warm_start_saves_evaluations(self):
+        signals = [self.signal(amplitude=1.5 + 0.01 * i) for i in range(5)]
+        cold, warm = FitSinus(), FitSinus(warm_start=True)
+        for y in signals:
+            expected = cold.estimate(self.x, y, frequency=self.frequency, channel='v1')
+            params = warm.estimate(self.x, y, frequency=self.frequency, channel='v1')
+            self.assertAlmostEqual(params.amplitude, expected.amplitude, places=6)
+            self.assertAlmostEqual(params.phase, expected.phase, places=6)
+        self.assertEqual(warm.stats.warm_starts, 4)
+        self.assertEqual(warm.stats.fallbacks, 0)
+        self.assertLess(warm.stats.evaluations, cold.stats.evaluations)
+
+    def test_key_contains_channel(self):
+        estimator = FitSinus(warm_start=True)
+        estimator.estimate(self.x, self.signal(), frequency=self.frequency, channel='v1')
+        estimator.estimate(self.x, self.signal(), frequency=self.frequency, channel='v2')
+        self.assertEqual(estimator.stats.warm_starts, 0)
+
+    def test_fallback(self):
+        estimator = FitSinus(warm_start=True)
+        y = self.signal()
+        params = estimator.estimate(self.x, y, frequency=self.frequency)
+        # the same sinus with negative amplitude is a minimum the warm fit can't leave
+        estimator._solutions[(None, self.frequency)] = (-params.amplitude, params.phase - np.pi,
+                                                        params.offset, params.frequency)
+        fallback = estimator.estimate(self.x, y, frequency=self.frequency)
+        self.assertEqual(estimator.stats.fallbacks, 1)
+        self.assertGreater(fallback.amplitude, 0)
+        self.assertAlmostEqual(fallback.amplitude, params.amplitude, places=6)
+
+    def test_reset(self):
+        estimator = FitSinus(warm_start=True)
+        estimator.estimate(self.x, self.signal(), frequency=self.frequency)
+        estimator.reset()
+        estimator.estimate(self.x, self.signal(), frequency=self.frequency)
+        self.assertEqual(estimator.stats.fits, 1)
+        self.assertEqual(estimator.stats.warm_starts, 0)
+
+
+class FitSinusErrorTest(unittest.TestCase):
+
+    def test_errors_are_standard_deviations(self):
+        rng = np.random.default_rng(0)
+        x = np.linspace(0, 1, 1000)
+        amplitudes, errors = [], []
+        for _ in range(200):
+            y = 1.5 * np.sin(2 * np.pi * 10 * x + 2.5) + 0.3 + 0.1 * rng.standard_normal(x.size)
+            params = FitSinus().estimate(x, y, frequency=10)
+            amplitudes.append(params.amplitude)
+            errors.append(params.amplitude_error)
+        self.assertAlmostEqual(np.mean(errors), np.std(amplitudes), delta=0.25 * np.std(amplitudes))
+
+
+if __name__ == '__main__':
+    unittest.main()
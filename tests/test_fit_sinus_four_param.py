@@ -0,0 +1,62 @@
+import unittest
+
+import numpy as np
+
+from electrode_tester.estimators import FitSinus, FitSinusFourParam
+
+
+class FitSinusFourParamTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+        self.x = np.linspace(0, 2, 2048, endpoint=True)
+        self.nominal = np.array([1., 3., 10., 45., 100.])
+        self.frequencies = self.nominal * (1 + self.rng.uniform(-1e-3, 1e-3, len(self.nominal)))
+        self.amplitudes = self.rng.uniform(0.5, 2, len(self.nominal))
+        self.phases = self.rng.uniform(0, 2 * np.pi, len(self.nominal))
+        self.offsets = self.rng.uniform(-1, 1, len(self.nominal))
+        self.Y = (self.amplitudes[:, None] * np.sin(2 * np.pi * self.frequencies[:, None] * self.x
+                                                     + self.phases[:, None])
+                  + self.offsets[:, None] + 0.01 * self.rng.standard_normal((len(self.nominal), self.x.size)))
+
+    def test_invalid_parameters(self):
+        with self.assertRaises(ValueError):
+            FitSinusFourParam(tolerance=0)
+        with self.assertRaises(ValueError):
+            FitSinusFourParam(max_iterations=0)
+
+    def test_accuracy(self):
+        estimator = FitSinusFourParam()
+        batch = estimator.estimate_batch(self.x, self.Y, self.nominal)
+        np.testing.assert_allclose(batch.frequency, self.frequencies, atol=1e-3)
+        np.testing.assert_allclose(batch.amplitude, self.amplitudes, rtol=1e-2)
+        np.testing.assert_allclose(batch.offset, self.offsets, atol=1e-2)
+        phase_difference = np.angle(np.exp(1j * (batch.phase - self.phases)))
+        np.testing.assert_allclose(phase_difference, 0, atol=1e-2)
+        self.assertTrue(np.all(estimator.iterations < estimator.max_iterations))
+
+    def test_batch_matches_estimate(self):
+        estimator = FitSinusFourParam()
+        batch = estimator.estimate_batch(self.x, self.Y, self.nominal)
+        for i, (y, frequency) in enumerate(zip(self.Y, self.nominal)):
+            params = estimator.estimate(self.x, y, frequency=frequency)
+            self.assertAlmostEqual(params.frequency, batch.frequency[i], places=8)
+            self.assertAlmostEqual(params.amplitude, batch.amplitude[i], places=8)
+            self.assertAlmostEqual(params.function(0.3), batch.function[i](0.3), places=6)
+
+    def test_same_as_fit_sinus(self):
+        batch = FitSinusFourParam().estimate_batch(self.x, self.Y, self.nominal)
+        for i, (y, frequency) in enumerate(zip(self.Y, self.nominal)):
+            params = FitSinus().estimate(self.x, y, frequency=frequency)
+            self.assertAlmostEqual(params.amplitude, batch.amplitude[i], delta=1e-4)
+            self.assertAlmostEqual(params.frequency, batch.frequency[i], delta=1e-5)
+
+    def test_errors(self):
+        batch = FitSinusFourParam().estimate_batch(self.x, self.Y, self.nominal)
+        for name in ('amplitude_error', 'phase_error', 'offset_error', 'frequency_error'):
+            errors = getattr(batch, name)
+            self.assertTrue(np.all(np.isfinite(errors) & (errors > 0)), name)
+
+
+if __name__ == '__main__':
+    unittest.main()
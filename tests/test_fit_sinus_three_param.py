@@ -0,0 +1,70 @@
+import unittest
+
+import numpy as np
+
+from electrode_tester.estimators import FitSinus, FitSinusThreeParam
+
+
+class FitSinusThreeParamTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+        self.x = np.linspace(0, 2, 2048, endpoint=True)
+        self.frequencies = np.array([1., 3., 10., 45., 100.])
+        self.amplitudes = self.rng.uniform(0.5, 2, len(self.frequencies))
+        self.phases = self.rng.uniform(0, 2 * np.pi, len(self.frequencies))
+        self.offsets = self.rng.uniform(-1, 1, len(self.frequencies))
+
+    def signals(self, x, noise=0.01):
+        Y = (self.amplitudes[:, None] * np.sin(2 * np.pi * self.frequencies[:, None] * x + self.phases[:, None])
+             + self.offsets[:, None])
+        return Y + noise * self.rng.standard_normal(Y.shape)
+
+    def test_batch_matches_estimate(self):
+        Y = self.signals(self.x)
+        estimator = FitSinusThreeParam()
+        batch = estimator.estimate_batch(self.x, Y, self.frequencies)
+        for i, (y, frequency) in enumerate(zip(Y, self.frequencies)):
+            params = estimator.estimate(self.x, y, frequency=frequency)
+            self.assertAlmostEqual(params.amplitude, batch.amplitude[i], places=10)
+            self.assertAlmostEqual(params.phase, batch.phase[i], places=10)
+            self.assertAlmostEqual(params.offset, batch.offset[i], places=10)
+            self.assertAlmostEqual(params.function(0.1), batch.function[i](0.1), places=10)
+
+    def test_accuracy(self):
+        batch = FitSinusThreeParam().estimate_batch(self.x, self.signals(self.x), self.frequencies)
+        np.testing.assert_allclose(batch.amplitude, self.amplitudes, rtol=1e-2)
+        np.testing.assert_allclose(batch.offset, self.offsets, atol=1e-2)
+        phase_difference = np.angle(np.exp(1j * (batch.phase - self.phases)))
+        np.testing.assert_allclose(phase_difference, 0, atol=1e-2)
+        self.assertTrue(np.all((batch.phase >= 0) & (batch.phase < 2 * np.pi)))
+
+    def test_same_as_fit_sinus(self):
+        Y = self.signals(self.x)
+        batch = FitSinusThreeParam().estimate_batch(self.x, Y, self.frequencies)
+        for i, (y, frequency) in enumerate(zip(Y, self.frequencies)):
+            params = FitSinus().estimate(self.x, y, frequency=frequency)
+            self.assertAlmostEqual(params.amplitude, batch.amplitude[i], delta=1e-3)
+            self.assertAlmostEqual(params.offset, batch.offset[i], delta=1e-3)
+
+    def test_errors_match_scatter(self):
+        amplitudes = []
+        for _ in range(200):
+            amplitudes.append(FitSinusThreeParam().estimate_batch(self.x, self.signals(self.x, 0.1),
+                                                                  self.frequencies).amplitude)
+        errors = FitSinusThreeParam().estimate_batch(self.x, self.signals(self.x, 0.1),
+                                                     self.frequencies).amplitude_error
+        np.testing.assert_allclose(np.std(amplitudes, axis=0), errors, rtol=0.25)
+
+    def test_uneven_time(self):
+        x = np.sort(self.rng.uniform(0, 2, 2048))
+        batch = FitSinusThreeParam().estimate_batch(x, self.signals(x), self.frequencies)
+        np.testing.assert_allclose(batch.amplitude, self.amplitudes, rtol=1e-2)
+
+    def test_frequency_required(self):
+        with self.assertRaises(ValueError):
+            FitSinusThreeParam().estimate(self.x, self.signals(self.x)[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import threading
+import unittest
+
+from electrode_tester import Experiment, ExperimentAnalysis
+from electrode_tester.estimators import FitFourier
+
+from .helpers import ExperimentTestCase, quiet
+
+
+class FollowTest(ExperimentTestCase):
+
+    frequencies = [1, 5, 10]
+
+    def experiment(self, tries, delay=0, storage='pickle'):
+        return self.make_experiment(storage, tries=tries, delay=delay, storage=storage)
+
+    def follow(self, analysis, path, **kwargs):
+        return analysis.follow(path, estimator=FitFourier(), estimator_params={'fs': 100},
+                               poll_interval=0.05, **kwargs)
+
+    def test_finished_experiment(self):
+        experiment = self.experiment(3)
+        with quiet(), experiment:
+            experiment.start()
+        analysis = ExperimentAnalysis()
+        followed = list(self.follow(analysis, experiment.save_path))
+        self.assertEqual(len(followed), 3)
+        self.assertEqual(len(analysis.time_deltas), 3)
+        self.assertEqual(len(analysis.resistances[5]), 3)
+
+        # the same series as analysis of whole experiment
+        time_deltas, results = ExperimentAnalysis().analyze(Experiment.load(experiment.save_path),
+                                                            estimator=FitFourier(), estimator_params={'fs': 100})
+        self.assertEqual(time_deltas, analysis.time_deltas)
+        for frequency in self.frequencies:
+            self.assertEqual(results['resistance'][0][frequency], analysis.resistances[frequency])
+            self.assertEqual(results['resistance'][1][frequency], analysis.resistances_errors[frequency])
+            self.assertEqual(results['resistivity'][0][frequency], analysis.resistivities[frequency])
+
+    def test_running_experiment(self):
+        for storage in ('pickle', 'chunked'):
+            with self.subTest(storage=storage):
+                experiment = self.experiment(3, delay=1, storage=storage)
+
+                def run():
+                    with quiet(), experiment:
+                        experiment.start()
+
+                thread = threading.Thread(target=run)
+                thread.start()
+                seen = []
+                analysis = ExperimentAnalysis()
+                for time_delta, results in self.follow(analysis, experiment.save_path, idle_timeout=10,
+                                                       callback=lambda *args: seen.append(args)):
+                    self.assertEqual(len(results['resistance'][0]), len(self.frequencies))
+                thread.join()
+                self.assertEqual(len(seen), 3)
+                self.assertEqual(analysis.time_deltas, [time_delta for time_delta, _ in seen])
+                self.assertEqual(len(analysis.resistivities[10]), 3)
+
+    def test_idle_timeout(self):
+        experiment = self.experiment(5)
+        with quiet():
+            experiment.tries = 1
+            experiment.start()
+            experiment.tries = 5
+            experiment.save(overwrite=True)
+        followed = list(self.follow(ExperimentAnalysis(), experiment.save_path, idle_timeout=0.2))
+        self.assertEqual(len(followed), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
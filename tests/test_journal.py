@@ -0,0 +1,74 @@
+import json
+import unittest
+
+from pathlib import Path
+from unittest import mock
+
+from electrode_tester import Experiment
+from electrode_tester.devices import DummyDevice
+
+from .helpers import ExperimentTestCase, InterruptedDevice, quiet
+
+
+class JournalTest(ExperimentTestCase):
+
+    def start(self, tries, **kwargs):
+        # experiment is not saved at the end, tries are only in the journal
+        experiment = self.make_experiment('journal', tries=tries, **kwargs)
+        with quiet():
+            experiment.start()
+        return experiment
+
+    def test_invalid_compaction(self):
+        with self.assertRaises(ValueError):
+            self.start(1, journal_compaction=0)
+
+    def test_replay(self):
+        experiment = self.start(3)
+        # experiment was saved only at the beginning, tries are in the journal
+        self.assertTrue((Path(self.tmp_dir.name) / 'journal.journal').exists())
+        loaded = Experiment.load(experiment.save_path)
+        self.assertEqual(len(loaded), 3)
+        self.assertEqual([m.uuid for m in loaded], [m.uuid for m in experiment])
+
+    def test_compaction(self):
+        experiment = self.start(4, journal_compaction=2)
+        journal = Path(self.tmp_dir.name) / 'journal.journal'
+        self.assertFalse(journal.exists())
+        experiment.save(overwrite=True)
+        self.assertEqual(len(Experiment.load(experiment.save_path)), 4)
+
+    def test_torn_record(self):
+        experiment = self.start(2, storage='chunked')
+        experiment.close()
+        with open(Path(self.tmp_dir.name) / 'journal.journal', 'a') as file:
+            file.write('{"position": 2, "ent')
+        loaded = Experiment.load(experiment.save_path)
+        self.assertEqual(len(loaded), 2)
+        loaded.close()
+
+    def test_torn_record_before_resume(self):
+        # the third try is interrupted before its first frequency
+        experiment = self.make_experiment('journal', tries=4, device=InterruptedDevice(4))
+        with quiet():
+            experiment.start()
+        journal = Path(self.tmp_dir.name) / 'journal.journal'
+        with open(journal, 'a') as file:
+            file.write('{"position": 3, "ent')
+        # resumed run crashes before the experiment is saved, tries are only in the journal
+        with quiet(), mock.patch.object(Experiment, '__exit__', lambda self, *args: self.close()):
+            _, finished = Experiment.resume(experiment.save_path, DummyDevice())
+        self.assertTrue(finished)
+        with open(journal) as file:
+            self.assertEqual([json.loads(line)['position'] for line in file], [0, 1, 2, 3])
+        self.assertEqual(len(Experiment.load(experiment.save_path)), 4)
+
+    def test_save_clears_journal(self):
+        experiment = self.start(2)
+        experiment.save(overwrite=True)
+        self.assertFalse((Path(self.tmp_dir.name) / 'journal.journal').exists())
+        self.assertEqual(len(Experiment.load(experiment.save_path)), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
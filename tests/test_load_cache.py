@@ -0,0 +1,98 @@
+import os
+import pickle
+import types
+import unittest
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import numpy as np
+
+from electrode_tester import LoadCache, enable_load_cache, disable_load_cache
+from electrode_tester._signal_container import SignalContainer
+
+
+class LoadCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name) / 'object.pkl'
+        self.loads = 0
+        self.write({'value': 1})
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write(self, obj, mtime_ns=None):
+        with open(self.path, 'wb') as file:
+            pickle.dump(obj, file)
+        if mtime_ns is not None:
+            os.utime(self.path, ns=(mtime_ns, mtime_ns))
+
+    def load(self):
+        self.loads += 1
+        with open(self.path, 'rb') as file:
+            return pickle.load(file)
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            LoadCache(0)
+
+    def test_hits_and_misses(self):
+        cache = LoadCache()
+        first = cache.get('key', self.path, self.load)
+        second = cache.get('key', self.path, self.load)
+        self.assertEqual(first, second)
+        self.assertEqual(self.loads, 1)
+        self.assertEqual(cache.stats.hits, 1)
+        self.assertEqual(cache.stats.misses, 1)
+
+    def test_invalidated_by_mtime(self):
+        cache = LoadCache()
+        cache.get('key', self.path, self.load)
+        self.write({'value': 2}, mtime_ns=os.stat(self.path).st_mtime_ns + 10**9)
+        self.assertEqual(cache.get('key', self.path, self.load), {'value': 2})
+        self.assertEqual(self.loads, 2)
+        self.assertEqual(cache.stats.invalidations, 1)
+
+    def test_eviction_by_bytes(self):
+        data = np.zeros((3, 1000))
+        cache = LoadCache(max_bytes=100_000)
+        for i in range(5):
+            cache.get(i, self.path, lambda: SignalContainer(data, frequency=1))
+        self.assertLessEqual(cache.stats.size, cache.max_bytes)
+        self.assertGreater(cache.stats.evictions, 0)
+        # least recently used entries are evicted first
+        self.assertEqual(cache.get(4, self.path, self.load).frequency, 1)
+        self.assertEqual(self.loads, 0)
+
+    def test_signal_container_load(self):
+        path = Path(self.tmp_dir.name) / 'container.cont'
+        SignalContainer(np.random.rand(3, 100), frequency=5).save(path)
+        cache = enable_load_cache()
+        try:
+            first = SignalContainer.load(path)
+            second = SignalContainer.load(path)
+        finally:
+            disable_load_cache()
+        self.assertIsNot(first, second)
+        np.testing.assert_array_equal(first.data, second.data)
+        self.assertEqual(cache.stats.hits, 1)
+        # differences are computed once and kept in the cache with the samples
+        self.assertIs(first.v1, second.v1)
+        self.assertIs(first.v2, second.v2)
+        self.assertEqual(cache.stats.size, 1024 + first.data.nbytes + first.v1.nbytes + first.v2.nbytes)
+
+    def test_copies_do_not_share_lists(self):
+        cache = LoadCache()
+        load = lambda: types.SimpleNamespace(entries=[0, 1], names={'a': 1})
+        first = cache.get('key', self.path, load)
+        first.entries.append(2)
+        first.names['b'] = 2
+        second = cache.get('key', self.path, load)
+        self.assertEqual(second.entries, [0, 1])
+        self.assertEqual(second.names, {'a': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
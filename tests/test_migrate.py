@@ -0,0 +1,90 @@
+import unittest
+
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+import numpy as np
+
+from electrode_tester import Experiment, migrate
+from electrode_tester.storage import ChunkedFile
+
+from .helpers import ExperimentTestCase
+
+
+class MigrateTest(ExperimentTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.results_path = Path(self.tmp_dir.name) / 'results'
+        self.destination = Path(self.tmp_dir.name) / 'converted'
+        for name in ('first', 'second'):
+            self.run_experiment(name, results_path=self.results_path)
+
+    def migrate(self, **kwargs):
+        return migrate.migrate(self.results_path, self.destination, processes=1, **kwargs)
+
+    def test_migrate(self):
+        results = self.migrate()
+        self.assertEqual([r.status for r in results], [migrate.MIGRATED] * 2)
+        for result in results:
+            source = Experiment.load(result.source)
+            converted = Experiment.load(result.destination)
+            self.assertEqual(converted.storage, 'chunked')
+            self.assertEqual(len(converted), 2)
+            for expected, actual in zip(source, converted):
+                self.assertEqual(expected.uuid, actual.uuid)
+                for expected_container, actual_container in zip(expected, actual):
+                    np.testing.assert_array_equal(expected_container.data, actual_container.data)
+            converted.close()
+
+    def test_excitation(self):
+        self.run_experiment('chirp', results_path=self.results_path, sampling_rate=1000, sampling_time=2,
+                            excitation='chirp')
+        self.migrate()
+        converted = Experiment.load(self.destination / 'chirp.exp')
+        for measurement in converted:
+            self.assertEqual(measurement.excitation, 'chirp')
+            self.assertTrue(measurement)
+        converted.close()
+
+    def test_idempotent(self):
+        self.migrate()
+        results = self.migrate()
+        self.assertEqual([r.status for r in results], [migrate.SKIPPED] * 2)
+
+    def test_resume_after_interruption(self):
+        self.migrate()
+        # interrupted conversion leaves only partial files
+        (self.destination / 'first.exp').unlink()
+        (self.destination / 'first.etd').rename(self.destination / 'first.partial.etd')
+        results = self.migrate()
+        self.assertEqual([r.status for r in results], [migrate.MIGRATED, migrate.SKIPPED])
+        self.assertFalse((self.destination / 'first.partial.etd').exists())
+
+    def test_verify_detects_corruption(self):
+        self.migrate()
+        with ChunkedFile(self.destination / 'first.etd', mode='r+') as store:
+            store.write_container(0, 0, np.zeros(store.container_shape))
+        results = self.migrate()
+        self.assertEqual(results[0].status, migrate.FAILED)
+        self.assertIn('differ', results[0].error)
+
+    def test_lossy_sample_format(self):
+        results = self.migrate(sample_format='int16')
+        self.assertEqual([r.status for r in results], [migrate.MIGRATED] * 2)
+        self.assertEqual(Experiment.load(results[0].destination).sample_format, 'int16')
+
+    def test_process_pool(self):
+        results = migrate.migrate(self.results_path, self.destination, processes=2)
+        self.assertEqual([r.source.name for r in results], ['first.exp', 'second.exp'])
+        self.assertEqual([r.status for r in results], [migrate.MIGRATED] * 2)
+
+    def test_main(self):
+        with redirect_stdout(StringIO()):
+            self.assertEqual(migrate.main([str(self.results_path), str(self.destination), '-j', '1']), 0)
+        self.assertTrue((self.destination / 'second.exp').exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
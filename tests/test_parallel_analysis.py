@@ -0,0 +1,75 @@
+import unittest
+
+from concurrent.futures import ThreadPoolExecutor
+
+from electrode_tester import Experiment, ExperimentAnalysis
+from electrode_tester.estimators import FitFourier, FitSinus
+
+from .helpers import ExperimentTestCase
+
+
+class ParallelAnalysisTest(ExperimentTestCase):
+
+    frequencies = [1, 5, 10]
+
+    def setUp(self):
+        super().setUp()
+        self.experiments = {storage: self.run_experiment(storage, tries=5, storage=storage).save_path
+                            for storage in ('pickle', 'chunked')}
+
+    def analyze(self, storage, **kwargs):
+        experiment = Experiment.load(self.experiments[storage])
+        try:
+            return ExperimentAnalysis().analyze(experiment, estimator=FitFourier(),
+                                                estimator_params={'fs': 100}, **kwargs)
+        finally:
+            experiment.close()
+
+    def test_process_pool_is_identical(self):
+        for storage in self.experiments:
+            with self.subTest(storage=storage):
+                expected = self.analyze(storage)
+                self.assertEqual(self.analyze(storage, n_jobs=2, chunk_size=2), expected)
+                self.assertEqual(self.analyze(storage, n_jobs=-1), expected)
+
+    def test_executor(self):
+        expected = self.analyze('pickle', calculate_parameters=['resistance'])
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            actual = self.analyze('pickle', calculate_parameters=['resistance'], executor=executor, chunk_size=1)
+        self.assertEqual(actual, expected)
+
+    def test_default_estimator(self):
+        experiment = Experiment.load(self.experiments['pickle'])
+        expected = ExperimentAnalysis().analyze(experiment, estimator=FitSinus())
+        self.assertEqual(ExperimentAnalysis().analyze(experiment, estimator=FitSinus(), n_jobs=2), expected)
+        experiment.close()
+
+    def test_default_estimator_is_not_shared(self):
+        experiment = Experiment.load(self.experiments['pickle'])
+        first, second = ExperimentAnalysis(), ExperimentAnalysis()
+        first.analyze(experiment, calculate_parameters=['resistance'])
+        second.analyze(experiment, calculate_parameters=['resistance'])
+        experiment.close()
+        self.assertIsNot(first.estimator, second.estimator)
+        self.assertEqual(first.estimator.stats, second.estimator.stats)
+
+    def test_invalid_parameters(self):
+        with self.assertRaises(ValueError):
+            self.analyze('pickle', n_jobs=0)
+        with self.assertRaises(ValueError):
+            self.analyze('pickle', n_jobs=2, chunk_size=0)
+
+    def test_warm_start_is_serial(self):
+        experiment = Experiment.load(self.experiments['pickle'])
+        try:
+            with self.assertRaises(ValueError):
+                ExperimentAnalysis().analyze(experiment, estimator=FitSinus(warm_start=True), n_jobs=2)
+            with ThreadPoolExecutor(max_workers=2) as executor, self.assertRaises(ValueError):
+                ExperimentAnalysis().analyze(experiment, estimator=FitSinus(warm_start=True), executor=executor)
+            ExperimentAnalysis().analyze(experiment, estimator=FitSinus(warm_start=True))
+        finally:
+            experiment.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import os
+import unittest
+
+import numpy as np
+
+from electrode_tester import ExperimentAnalysis, ResultCache
+from electrode_tester.estimators import FitFourier, FitSinus
+
+from .helpers import ExperimentTestCase
+
+
+class CountingFourier(FitFourier):
+    '''
+    FitFourier counting batches of estimated signals
+    '''
+
+    def __init__(self):
+        self.batches = 0
+
+    def estimate_batch(self, x, Y, frequencies, **kwargs):
+        self.batches += 1
+        return super().estimate_batch(x, Y, frequencies, **kwargs)
+
+
+class ResultCacheTest(ExperimentTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cache_path = os.path.join(self.tmp_dir.name, 'cache')
+        self.experiment = self.run_experiment('cached', tries=3)
+
+    def analyze(self, estimator, cache, **estimator_params):
+        estimator_params = estimator_params or {'fs': 100}
+        return ExperimentAnalysis().analyze(self.experiment, estimator=estimator,
+                                            estimator_params=estimator_params, cache=cache)
+
+    def test_results_are_reused(self):
+        cache = ResultCache(self.cache_path)
+        estimator = CountingFourier()
+        _, expected = self.analyze(estimator, cache)
+        batches = estimator.batches
+        self.assertGreater(batches, 0)
+
+        _, results = self.analyze(estimator, ResultCache(self.cache_path))
+        self.assertEqual(estimator.batches, batches)
+        for name in ('resistance', 'resistivity'):
+            for frequency in self.experiment.frequencies:
+                np.testing.assert_array_equal(results[name][0][frequency], expected[name][0][frequency])
+                np.testing.assert_array_equal(results[name][1][frequency], expected[name][1][frequency])
+
+    def test_results_without_cache(self):
+        _, expected = self.analyze(FitFourier(), None)
+        _, results = self.analyze(FitFourier(), ResultCache(self.cache_path))
+        _, cached = self.analyze(FitFourier(), ResultCache(self.cache_path))
+        for frequency in self.experiment.frequencies:
+            self.assertEqual(results['resistance'][0][frequency], expected['resistance'][0][frequency])
+            self.assertEqual(cached['resistance'][0][frequency], expected['resistance'][0][frequency])
+
+    def test_key(self):
+        measurement = self.experiment[0]
+        key = ResultCache.key(measurement, FitFourier(), {'fs': 100})
+        self.assertEqual(key, ResultCache.key(measurement, FitFourier(), {'fs': 100}))
+        self.assertNotEqual(key, ResultCache.key(measurement, FitFourier(), {'fs': 200}))
+        self.assertNotEqual(key, ResultCache.key(self.experiment[1], FitFourier(), {'fs': 100}))
+        self.assertNotEqual(key, ResultCache.key(measurement, CountingFourier(), {'fs': 100}))
+        self.assertNotEqual(ResultCache.key(measurement, FitSinus(), {}),
+                            ResultCache.key(measurement, FitSinus(warm_start=True), {}))
+
+        class NewFourier(FitFourier):
+            version = 2
+        NewFourier.__qualname__ = FitFourier.__qualname__
+        NewFourier.__module__ = FitFourier.__module__
+        self.assertNotEqual(key, ResultCache.key(measurement, NewFourier(), {'fs': 100}))
+
+    def test_rewritten_container_invalidates(self):
+        measurement = self.experiment[0]
+        key = ResultCache.key(measurement, FitFourier(), {'fs': 100})
+        folder = measurement._Measurement__working_dir / measurement.folder_path.name
+        path = folder / measurement._measurements_data[0]
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertNotEqual(key, ResultCache.key(measurement, FitFourier(), {'fs': 100}))
+
+    def test_eviction(self):
+        cache = ResultCache(self.cache_path)
+        self.analyze(FitFourier(), cache)
+        stats = cache.stats
+        self.assertEqual(stats.entries, len(self.experiment))
+        self.assertEqual(stats.misses, len(self.experiment))
+
+        small = ResultCache(self.cache_path, max_bytes=stats.size // len(self.experiment) + 1)
+        self.analyze(FitFourier(), small, fs=200)
+        self.assertEqual(len(small), 1)
+        self.assertGreater(small.stats.evictions, 0)
+
+        small.clear()
+        self.assertEqual(len(small), 0)
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            ResultCache(self.cache_path, max_bytes=0)
+
+    def test_parallel(self):
+        cache = ResultCache(self.cache_path)
+        _, expected = self.analyze(FitFourier(), cache)
+        analysis = ExperimentAnalysis()
+        _, results = analysis.analyze(self.experiment, estimator=FitFourier(), estimator_params={'fs': 100},
+                                      n_jobs=2, cache=cache)
+        self.assertEqual(results['resistance'][0][1], expected['resistance'][0][1])
+        self.assertEqual(len(cache), len(self.experiment))
+
+
+if __name__ == '__main__':
+    unittest.main()
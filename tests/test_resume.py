@@ -0,0 +1,77 @@
+import unittest
+
+from tempfile import TemporaryDirectory
+
+from electrode_tester import Experiment, ExperimentAnalysis
+from electrode_tester.devices import DummyDevice
+from electrode_tester.estimators import FitFourier
+
+from .helpers import ExperimentTestCase, InterruptedDevice, quiet
+
+
+class ResumeTest(ExperimentTestCase):
+
+    frequencies = [1, 5, 10]
+
+    def interrupted_experiment(self, signals, storage='pickle'):
+        experiment = self.run_experiment('resume', device=InterruptedDevice(signals), tries=3, storage=storage)
+        return experiment.save_path
+
+    def resume(self, path, **kwargs):
+        with quiet():
+            return Experiment.resume(path, DummyDevice(), **kwargs)
+
+    def test_partial_measurement_is_kept(self):
+        path = self.interrupted_experiment(4)
+        experiment = Experiment.load(path)
+        self.assertEqual(len(experiment), 2)
+        self.assertEqual(len(experiment[-1]), 1)
+        self.assertFalse(experiment[-1])
+
+    def test_finish(self):
+        for storage in ('pickle', 'chunked'):
+            with self.subTest(storage=storage):
+                path = self.interrupted_experiment(4, storage)
+                partial_uuid = Experiment.load(path)[-1].uuid
+                _, finished = self.resume(path)
+                self.assertTrue(finished)
+                experiment = Experiment.load(path)
+                self.assertEqual(len(experiment), 3)
+                self.assertTrue(all(experiment))
+                self.assertEqual(experiment[1].uuid, partial_uuid)
+                self.assertEqual([c.frequency for c in experiment[1]], self.frequencies)
+                experiment.close()
+                self.tmp_dir.cleanup()
+                self.tmp_dir = TemporaryDirectory()
+
+    def test_discard(self):
+        path = self.interrupted_experiment(4)
+        partial_uuid = Experiment.load(path)[-1].uuid
+        _, finished = self.resume(path, partial='discard')
+        self.assertTrue(finished)
+        experiment = Experiment.load(path)
+        self.assertEqual(len(experiment), 3)
+        self.assertNotIn(partial_uuid, [m.uuid for m in experiment])
+
+    def test_finished_experiment(self):
+        path = self.interrupted_experiment(len(self.frequencies) * 3)
+        _, finished = self.resume(path)
+        self.assertTrue(finished)
+        self.assertEqual(len(Experiment.load(path)), 3)
+
+    def test_invalid_policy(self):
+        path = self.interrupted_experiment(4)
+        with self.assertRaises(ValueError):
+            self.resume(path, partial='keep')
+
+    def test_analysis_skips_partial_measurement(self):
+        path = self.interrupted_experiment(4)
+        _, results = ExperimentAnalysis().analyze(Experiment.load(path), estimator=FitFourier(),
+                                                  estimator_params={'fs': 100})
+        resistances, _ = results['resistance']
+        for frequency in self.frequencies:
+            self.assertEqual(len(resistances[frequency]), len(resistances[self.frequencies[0]]))
+
+
+if __name__ == '__main__':
+    unittest.main()